@@ -1,26 +1,66 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, Response, UploadFile, File, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator, Literal
+import io
+import re
+import csv
 import uuid
-from datetime import datetime, timezone, timedelta
+import json
+import math
+import time
+import mmap
+import fcntl
+import struct
+import gzip
+import hashlib
+import importlib
+import heapq
+import random
+import asyncio
+import itertools
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timezone, timedelta
 import jwt
+import httpx
 import bcrypt
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+import numpy as np
+from cachetools import TTLCache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened during startup (see connect_database)
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '10'))
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+def connect_database():
+    global client, db
+    client = AsyncIOMotorClient(
+        os.environ['MONGO_URL'],
+        maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        connectTimeoutMS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        socketTimeoutMS=int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '10000')),
+        waitQueueTimeoutMS=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+    )
+    db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'fallback_secret')
@@ -29,9 +69,20 @@ JWT_EXPIRATION_HOURS = 24
 
 # Gemini Configuration
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
+# The LLM SDK is imported on the first search that needs it (see load_llm_client)
+LlmChat = None
+UserMessage = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_services(app)
+    try:
+        yield
+    finally:
+        await stop_services(app)
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
@@ -45,7 +96,7 @@ class UserCreate(BaseModel):
     name: str
     email: EmailStr
     password: str
-    role: str = "student"
+    role: Literal["student", "faculty"] = "student"
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -88,6 +139,89 @@ class SearchResponse(BaseModel):
     rooms: Optional[List[RoomAvailability]] = None
     clarification_needed: Optional[str] = None
 
+class FreeWindow(BaseModel):
+    room_id: str
+    floor: str
+    capacity: int
+    facilities: List[str]
+    map_link: str
+    date: str
+    start_hour: float
+    end_hour: float
+
+class AvailabilityCheck(BaseModel):
+    room_id: str
+    start_hour: float
+    end_hour: float
+
+class BatchAvailabilityRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    day: Optional[date] = Field(None, alias="date")
+    checks: Optional[List[AvailabilityCheck]] = None
+    # Filter x ranges: every matching room is checked against every range
+    ranges: Optional[List[Tuple[float, float]]] = None
+    floor: Optional[str] = None
+    min_capacity: Optional[int] = None
+    facilities: Optional[List[str]] = None
+    room_ids: Optional[List[str]] = None
+
+class BatchAvailabilityResponse(BaseModel):
+    date: str
+    # One character per check/range: "1" free, "0" occupied, "-" unknown room
+    results: Optional[str] = None
+    rooms: Optional[List[str]] = None
+    ranges: Optional[List[Tuple[float, float]]] = None
+    matrix: Optional[List[str]] = None
+
+class DayGridResponse(BaseModel):
+    date: str
+    slot_minutes: int
+    slots: List[float]
+    rooms: List[str]
+    # Per room, one character per slot: "1" free for the whole slot, "0" occupied at some point
+    matrix: List[str]
+
+class BookingCreate(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    room_id: str
+    day: Optional[date] = Field(None, alias="date")
+    start_hour: float
+    end_hour: float
+    purpose: str = Field("", max_length=200)
+
+class Booking(BaseModel):
+    id: str
+    room_id: str
+    date: str
+    start_hour: float
+    end_hour: float
+    user_id: str
+    user_name: str
+    purpose: str
+    created_at: str
+
+class Notification(BaseModel):
+    id: int
+    room_id: str
+    status: str
+    at: str
+
+class ImportReport(BaseModel):
+    rows: int
+    accepted: int
+    rejected: int
+    duplicates: int
+    overlaps_merged: int
+    rooms: int
+    changed_rooms: List[str]
+    errors: List[str]
+    seconds: float
+
+class CatalogImportReport(BaseModel):
+    rooms: int
+    rejected: int
+    errors: List[str]
+
 # ===================== CLASSROOM DATA =====================
 
 CLASSROOMS = [
@@ -154,68 +288,2021 @@ MOCK_SCHEDULE = {
     "212": [(8, 9), (11, 12), (14, 16), (17, 18)],
 }
 
+# ===================== ROOM ATTRIBUTE INDEX =====================
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class RoomAttributeIndex:
+    """Inverted index over the classroom catalog; room sets are int bitsets over catalog positions"""
+
+    def __init__(self, rooms: List[dict]):
+        self.rooms = rooms
+        self.by_id: Dict[str, dict] = {}
+        self.positions: Dict[str, int] = {}
+        self.facility_bits: Dict[str, int] = {}
+        self.facility_masks: List[int] = []  # per room, bits from facility_bits
+        self.by_floor: Dict[str, int] = {}
+        self.by_facility: Dict[str, int] = {}
+        self.all = (1 << len(rooms)) - 1
+        for position, room in enumerate(rooms):
+            bit = 1 << position
+            self.by_id[room["room_id"]] = room
+            self.positions[room["room_id"]] = position
+            self.by_floor[room["floor"]] = self.by_floor.get(room["floor"], 0) | bit
+            facility_mask = 0
+            for facility in room["facilities"]:
+                facility_mask |= self.facility_bits.setdefault(facility, 1 << len(self.facility_bits))
+                self.by_facility[facility] = self.by_facility.get(facility, 0) | bit
+            self.facility_masks.append(facility_mask)
+        # Capacity tiers: rooms seating at least capacity_tiers[i], as cumulative bitsets
+        self.capacity_tiers = sorted({room["capacity"] for room in rooms})
+        self.at_least_capacity: List[int] = [0] * len(self.capacity_tiers)
+        for position, room in enumerate(rooms):
+            tier = bisect_right(self.capacity_tiers, room["capacity"])
+            for i in range(tier):
+                self.at_least_capacity[i] |= 1 << position
+
+    def match(self, floor: Optional[str] = None, room_ids: Optional[List[str]] = None,
+              min_capacity: Optional[int] = None, facilities: Optional[List[str]] = None) -> int:
+        mask = self.all
+        if floor:
+            mask &= self.by_floor.get(floor, 0)
+        if room_ids:
+            mask &= sum(1 << self.positions[room_id] for room_id in set(room_ids) if room_id in self.positions)
+        if min_capacity:
+            tier = bisect_right(self.capacity_tiers, min_capacity - 1)
+            mask &= self.at_least_capacity[tier] if tier < len(self.capacity_tiers) else 0
+        for facility in facilities or ():
+            mask &= self.by_facility.get(facility, 0)
+        return mask
+
+    def select(self, mask: int) -> List[dict]:
+        """Rooms in the bitset, in catalog order"""
+        return [self.rooms[position] for position in iter_bits(mask)]
+
+room_index: Optional[RoomAttributeIndex] = None  # built during startup (see build_indexes)
+
+# ===================== AVAILABILITY INDEX =====================
+
+MINUTES_PER_DAY = 24 * 60
+CAMPUS_OPEN_HOUR = 8
+CAMPUS_CLOSE_HOUR = 18.5
+PREDICTION_WINDOWS = [(30, "next30"), (60, "next60"), (90, "next90")]
+
+def hour_to_minute(hour: float) -> int:
+    """First whole minute at or after the given hour"""
+    return math.ceil(hour * 60 - 1e-9)
+
+class RoomTimeline:
+    """Sorted occupied intervals for one room plus a minute-resolution occupancy bitmap"""
+    __slots__ = ("starts", "ends", "bitmap")
+
+    def __init__(self, intervals):
+        merged = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            # Only genuinely overlapping slots are merged; back-to-back slots stay
+            # separate so zero-length queries at a boundary behave as before.
+            if merged and start < merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+        bitmap = 0
+        for start, end in merged:
+            lo, hi = hour_to_minute(start), min(hour_to_minute(end), MINUTES_PER_DAY)
+            if hi > lo:
+                bitmap |= ((1 << (hi - lo)) - 1) << lo
+        self.bitmap = bitmap
+
+    def is_free(self, start_hour: float, end_hour: float) -> bool:
+        """True if no occupied interval intersects [start_hour, end_hour)"""
+        i = bisect_right(self.ends, start_hour)
+        return i == len(self.ends) or self.starts[i] >= end_hour
+
+    def is_occupied_at(self, hour: float) -> bool:
+        minute = hour * 60.0  # hours parsed from JSON may be ints
+        if minute.is_integer() and 0 <= minute < MINUTES_PER_DAY:
+            return bool((self.bitmap >> int(minute)) & 1)
+        i = bisect_right(self.starts, hour) - 1
+        return i >= 0 and hour < self.ends[i]
+
+    def intervals(self) -> List[Tuple[float, float]]:
+        return list(zip(self.starts, self.ends))
+
+    def gaps(self, open_hour: float, close_hour: float) -> Iterator[Tuple[float, float]]:
+        """Free spans within [open_hour, close_hour), earliest first"""
+        cursor = open_hour
+        i = bisect_right(self.ends, open_hour)
+        while i < len(self.starts) and self.starts[i] < close_hour:
+            if self.starts[i] > cursor:
+                yield cursor, self.starts[i]
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if cursor < close_hour:
+            yield cursor, close_hour
+
+    def next_change(self, minute: int) -> Optional[int]:
+        """First minute after `minute` at which an occupied interval starts or ends"""
+        hour = minute / 60
+        i, j = bisect_right(self.starts, hour), bisect_right(self.ends, hour)
+        candidates = [hour_to_minute(hours[k]) for hours, k in ((self.starts, i), (self.ends, j)) if k < len(hours)]
+        return min(candidates, default=None)
+
+    def free_flags(self, ranges: List[Tuple[float, float]]) -> List[bool]:
+        """is_free for each range in one sweep; ranges must be sorted by start"""
+        flags, i, n = [], 0, len(self.ends)
+        for start, end in ranges:
+            while i < n and self.ends[i] <= start:
+                i += 1
+            flags.append(i == n or self.starts[i] >= end)
+        return flags
+
+EMPTY_TIMELINE = RoomTimeline([])
+_index_versions = itertools.count(1)
+
+class DayGrid:
+    """Rooms x campus-minutes occupancy matrix with row-wise prefix sums.
+
+    Whether a room is free over any whole-minute range inside campus hours is one
+    subtraction of two prefix sums, whatever the length of the range.
+    """
+
+    def __init__(self, timelines: Dict[str, RoomTimeline]):
+        self.first_minute = CAMPUS_OPEN_HOUR * 60
+        self.last_minute = hour_to_minute(CAMPUS_CLOSE_HOUR)
+        width = self.last_minute - self.first_minute
+        self.room_ids = list(timelines)
+        self.rows = {room_id: row for row, room_id in enumerate(self.room_ids)}
+        rows, los, his = [], [], []
+        for row, timeline in enumerate(timelines.values()):
+            for start, end in zip(timeline.starts, timeline.ends):
+                # A minute counts as occupied if the interval overlaps it at all, which keeps
+                # whole-minute range checks identical to RoomTimeline.is_free.
+                lo = max(math.floor(start * 60 + 1e-9), self.first_minute) - self.first_minute
+                hi = min(hour_to_minute(end), self.last_minute) - self.first_minute
+                if hi > lo:
+                    rows.append(row)
+                    los.append(lo)
+                    his.append(hi)
+        edges = np.zeros((len(self.room_ids), width + 1), dtype=np.int32)
+        np.add.at(edges, (rows, los), 1)
+        np.add.at(edges, (rows, his), -1)
+        occupied = np.cumsum(edges[:, :width], axis=1) > 0
+        self.prefix = np.zeros((len(self.room_ids), width + 1), dtype=np.int16)
+        np.cumsum(occupied, axis=1, out=self.prefix[:, 1:])
+        self._slot_rows: Dict[int, Dict[str, str]] = {}
+
+    @classmethod
+    def from_prefix(cls, room_ids: List[str], rows: Dict[str, int], prefix: np.ndarray) -> "DayGrid":
+        """Grid over precomputed prefix sums, e.g. a read-only view into the shared snapshot file"""
+        grid = cls.__new__(cls)
+        grid.first_minute = CAMPUS_OPEN_HOUR * 60
+        grid.last_minute = hour_to_minute(CAMPUS_CLOSE_HOUR)
+        grid.room_ids, grid.rows, grid.prefix = room_ids, rows, prefix
+        grid._slot_rows = {}
+        return grid
+
+    def minute_of(self, hour: float) -> Optional[int]:
+        """Grid column for an hour, or None if it is not a whole minute inside campus hours"""
+        minute = round(hour * 60)
+        if abs(hour * 60 - minute) > 1e-9 or not self.first_minute <= minute <= self.last_minute:
+            return None
+        return minute
+
+    def is_free(self, room_id: str, start_minute: int, end_minute: int) -> bool:
+        row = self.rows.get(room_id)
+        if row is None:
+            return True
+        prefix, first = self.prefix, self.first_minute
+        return prefix.item(row, end_minute - first) == prefix.item(row, start_minute - first)
+
+    def slot_rows(self, slot_minutes: int) -> Dict[str, str]:
+        """room_id -> one character per slot ("1" free for the whole slot, "0" not)"""
+        rows = self._slot_rows.get(slot_minutes)
+        if rows is None:
+            edges = np.append(np.arange(0, self.last_minute - self.first_minute, slot_minutes), self.last_minute - self.first_minute)
+            free = (self.prefix[:, edges[1:]] - self.prefix[:, edges[:-1]]) == 0
+            cells = np.where(free, ord("1"), ord("0")).astype(np.uint8)
+            rows = {room_id: cells[row].tobytes().decode("ascii") for row, room_id in enumerate(self.room_ids)}
+            self._slot_rows[slot_minutes] = rows
+        return rows
+
+    def slot_starts(self, slot_minutes: int) -> List[float]:
+        return [minute / 60 for minute in range(self.first_minute, self.last_minute, slot_minutes)]
+
+class AvailabilityIndex:
+    """Immutable per-room timelines compiled from a schedule mapping"""
+
+    def __init__(self, schedule: Dict[str, List[Tuple[float, float]]]):
+        self.version = next(_index_versions)
+        self.timelines = {room_id: RoomTimeline(slots) for room_id, slots in schedule.items()}
+        self._segment_boundaries: Optional[List[int]] = None
+        self._grid: Optional[DayGrid] = None
+
+    def timeline(self, room_id: str) -> RoomTimeline:
+        return self.timelines.get(room_id, EMPTY_TIMELINE)
+
+    @property
+    def grid(self) -> DayGrid:
+        """Day grid for this index, built on first use (so cached per date and version)"""
+        if self._grid is None:
+            self._grid = DayGrid(self.timelines)
+        return self._grid
+
+    @property
+    def segment_boundaries(self) -> List[int]:
+        """Minutes of the day at which any room's status or prediction can change"""
+        boundaries = self._segment_boundaries
+        if boundaries is None:
+            points = set()
+            # Status flips at slot start/end; an "after X" edge first shows up one minute past X.
+            after = lambda hour: math.floor(hour * 60 + 1e-9) + 1
+            for mins, _ in PREDICTION_WINDOWS:
+                points.add(after(CAMPUS_CLOSE_HOUR - mins / 60))
+            for timeline in self.timelines.values():
+                for start, end in zip(timeline.starts, timeline.ends):
+                    points.add(hour_to_minute(start))
+                    points.add(hour_to_minute(end))
+                    for mins, _ in PREDICTION_WINDOWS:
+                        points.add(after(start - mins / 60))
+            boundaries = sorted(p for p in points if 0 < p < MINUTES_PER_DAY)
+            self._segment_boundaries = boundaries
+        return boundaries
+
+    def with_rooms(self, updates: Dict[str, List[Tuple[float, float]]]) -> "AvailabilityIndex":
+        """New index that recompiles only the given rooms and shares every other timeline"""
+        index = AvailabilityIndex({})
+        index.timelines = dict(self.timelines)
+        for room_id, slots in updates.items():
+            if slots:
+                index.timelines[room_id] = RoomTimeline(slots)
+            else:
+                index.timelines.pop(room_id, None)
+        return index
+
+    def segment_at(self, minute: int) -> Tuple[int, int]:
+        """(segment number, first minute of the next segment) for a minute of the day"""
+        boundaries = self.segment_boundaries
+        segment = bisect_right(boundaries, minute)
+        next_minute = boundaries[segment] if segment < len(boundaries) else MINUTES_PER_DAY
+        return segment, next_minute
+
+# ===================== TIMETABLE INGESTION =====================
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+ICS_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+INDEX_CACHE_DAYS = int(os.environ.get('INDEX_CACHE_DAYS', '14'))
+# Dates the API accepts; by default the window fits in the per-date index cache
+AVAILABILITY_DAYS_BACK = int(os.environ.get('AVAILABILITY_DAYS_BACK', '1'))
+AVAILABILITY_DAYS_AHEAD = int(os.environ.get('AVAILABILITY_DAYS_AHEAD', str(INDEX_CACHE_DAYS - 2)))
+IMPORT_ERROR_LIMIT = 20
+
+class RoomSchedule:
+    """One room's compiled timetable: weekly slots with an optional validity window, plus dated slots"""
+    __slots__ = ("weekly", "dated", "fingerprint")
+
+    def __init__(self, weekly: List[List[tuple]], dated: Dict[date, List[Tuple[float, float]]]):
+        self.weekly = weekly  # weekday -> sorted [(start, end, valid_from, valid_until)]
+        self.dated = dated    # date -> sorted [(start, end)]
+        self.fingerprint = hashlib.blake2b(repr((weekly, sorted(dated.items()))).encode("utf-8"), digest_size=12).hexdigest()
+
+    def intervals_for(self, day: date) -> List[Tuple[float, float]]:
+        slots = [
+            (start, end) for start, end, valid_from, valid_until in self.weekly[day.weekday()]
+            if (valid_from is None or valid_from <= day) and (valid_until is None or day <= valid_until)
+        ]
+        slots.extend(self.dated.get(day, ()))
+        return slots
+
+def _slot_order(slot: tuple) -> tuple:
+    # Open-ended validity windows (None) sort before/after any real date
+    window = (slot[2] or date.min, slot[3] or date.max) if len(slot) > 2 else ()
+    return (slot[0], slot[1]) + window
+
+def schedule_every_day(intervals: List[Tuple[float, float]]) -> RoomSchedule:
+    # Hours as floats, like parsed imports, so an identical re-import keeps the same fingerprint
+    slots = sorted(((float(start), float(end), None, None) for start, end in intervals), key=_slot_order)
+    return RoomSchedule([slots] * 7, {})
+
+# room_id -> compiled schedule; seeded during startup with the mock timetable, which applies to every day
+timetable_store: Dict[str, RoomSchedule] = {}
+_indexes_by_date: "OrderedDict[date, AvailabilityIndex]" = OrderedDict()
+catalog_version = 1
+# date -> room_id -> [(start, end, booking id)]; mirrors the room_bookings collection
+booked_slots: Dict[date, Dict[str, List[Tuple[float, float, str]]]] = {}
+
+def room_intervals(room_id: str, day: date) -> List[Tuple[float, float]]:
+    """Occupied intervals for a room on a day: timetable slots plus bookings"""
+    schedule = timetable_store.get(room_id)
+    slots = schedule.intervals_for(day) if schedule else []
+    booked = booked_slots.get(day, {}).get(room_id)
+    if booked:
+        slots = slots + [(start, end) for start, end, _ in booked]
+    return slots
+
+def get_availability_index(day: Optional[date] = None) -> AvailabilityIndex:
+    """Availability index for a calendar day (IST today by default), compiled on first use"""
+    if day is None:
+        day = get_current_ist().date()
+    index = _indexes_by_date.get(day)
+    if index is not None:
+        _indexes_by_date.move_to_end(day)
+        return index
+    room_ids = timetable_store.keys() | booked_slots.get(day, {}).keys()
+    index = AvailabilityIndex({room_id: room_intervals(room_id, day) for room_id in room_ids})
+    _indexes_by_date[day] = index
+    if len(_indexes_by_date) > INDEX_CACHE_DAYS:
+        # Least recently used first, but never today's: recompiling it would give it a new version
+        # and invalidate the classroom snapshot, its ETags and the transition scheduler's heap.
+        today = get_current_ist().date()
+        while len(_indexes_by_date) > INDEX_CACHE_DAYS:
+            oldest = next(iter(_indexes_by_date))
+            if oldest == today:
+                _indexes_by_date.move_to_end(today)
+            else:
+                del _indexes_by_date[oldest]
+    return index
+
+def rebuild_availability_index(schedule: Optional[Dict[str, List[Tuple[float, float]]]] = None) -> AvailabilityIndex:
+    """Recompile every cached index, optionally replacing the timetable with an every-day schedule"""
+    if schedule is not None:
+        replaced = set(timetable_store) | set(schedule)
+        timetable_store.clear()
+        timetable_store.update({room_id: schedule_every_day(slots) for room_id, slots in schedule.items()})
+        mark_shared_snapshot_stale(rooms=replaced)
+    _indexes_by_date.clear()
+    return get_availability_index()
+
+def refresh_availability_indexes(room_ids: Iterable[str], days: Optional[Iterable[date]] = None):
+    """Swap in new cached indexes (for every cached day by default) that recompile only the given rooms"""
+    for day in list(_indexes_by_date) if days is None else days:
+        index = _indexes_by_date.get(day)
+        if index is not None:
+            _indexes_by_date[day] = index.with_rooms({room_id: room_intervals(room_id, day) for room_id in room_ids})
+
+def set_classroom_catalog(rooms: List[dict]):
+    global CLASSROOMS, room_index, catalog_version
+    CLASSROOMS = rooms
+    room_index = RoomAttributeIndex(rooms)
+    catalog_version += 1
+    mark_shared_snapshot_stale(catalog=True)
+
+def parse_hour(value: Any) -> float:
+    """Accepts 9, 9.5, "09:30", "2:30 PM" (times are IST)"""
+    if isinstance(value, (int, float)):
+        hour = float(value)
+    else:
+        match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*([ap]m)?", str(value).strip().lower())
+        if match:
+            hour = int(match.group(1)) + int(match.group(2) or 0) / 60
+            if match.group(3) == "pm" and hour < 12:
+                hour += 12
+            elif match.group(3) == "am" and hour >= 12:
+                hour -= 12
+        else:
+            try:
+                hour = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid time {value!r}")
+    if not 0 <= hour <= 24:
+        raise ValueError(f"time out of range {value!r}")
+    return hour
+
+def parse_day(value: Any) -> Optional[date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"invalid date {value!r}")
+
+def parse_weekdays(value: Any) -> List[int]:
+    if value in (None, "", "*") or str(value).strip().lower() in ("all", "daily", "every day"):
+        return list(range(7))
+    if isinstance(value, int):
+        days = [value]
+    else:
+        days = []
+        for token in re.split(r"[\s,;/|]+", str(value).strip().lower()):
+            if token.isdigit():
+                days.append(int(token))
+            elif token[:3] in WEEKDAYS:
+                days.append(WEEKDAYS.index(token[:3]))
+            elif token:
+                raise ValueError(f"invalid weekday {token!r}")
+    if any(not 0 <= day <= 6 for day in days):
+        raise ValueError(f"invalid weekday {value!r}")
+    return days
+
+def parse_slot(record: dict) -> tuple:
+    """Normalize one timetable record (CSV row, ICS event or Mongo document)"""
+    if record.get("error"):
+        raise ValueError(record["error"])
+    room_id = str(record.get("room_id") or record.get("room") or "").strip()
+    if not room_id:
+        raise ValueError("missing room_id")
+    start = parse_hour(record.get("start_hour", record.get("start")))
+    end = parse_hour(record.get("end_hour", record.get("end")))
+    if end <= start:
+        raise ValueError(f"end {end} is not after start {start}")
+    day = parse_day(record.get("date"))
+    weekdays = [] if day else parse_weekdays(record.get("weekday", record.get("day")))
+    valid_from = parse_day(record.get("valid_from", record.get("from")))
+    valid_until = parse_day(record.get("valid_until", record.get("until")))
+    return room_id, weekdays, day, start, end, valid_from, valid_until
+
+def merge_overlapping(slots: List[tuple]) -> Tuple[List[tuple], int]:
+    """Sort and merge overlapping (start, end, *window) slots that share a validity window"""
+    merged, merges = [], 0
+    for slot in sorted(slots, key=lambda s: _slot_order(s)[2:] + (s[0], s[1])):
+        if merged and merged[-1][2:] == slot[2:] and slot[0] < merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], slot[1])) + slot[2:]
+            merges += 1
+        else:
+            merged.append(slot)
+    return sorted(merged, key=_slot_order), merges
+
+class TimetableCompiler:
+    """Consumes timetable records one at a time and compiles them into per-room schedules.
+
+    Memory grows with the number of distinct slots, never with the size of the input file.
+    """
+
+    def __init__(self, known_rooms: Optional[set] = None):
+        self.known_rooms = known_rooms
+        self._weekly: Dict[str, List[set]] = {}
+        self._dated: Dict[str, Dict[date, set]] = {}
+        self.rows = self.accepted = self.rejected = self.duplicates = self.overlaps_merged = 0
+        self.errors: List[str] = []
+
+    def _reject(self, message: str):
+        self.rejected += 1
+        if len(self.errors) < IMPORT_ERROR_LIMIT:
+            self.errors.append(f"record {self.rows}: {message}")
+
+    def add(self, record: dict):
+        self.rows += 1
+        try:
+            room_id, weekdays, day, start, end, valid_from, valid_until = parse_slot(record)
+        except ValueError as e:
+            self._reject(str(e))
+            return
+        if self.known_rooms is not None and room_id not in self.known_rooms:
+            self._reject(f"unknown room {room_id!r}")
+            return
+        self.accepted += 1
+        if day is not None:
+            buckets = [self._dated.setdefault(room_id, {}).setdefault(day, set())]
+            slot = (start, end)
+        else:
+            weekly = self._weekly.setdefault(room_id, [set() for _ in range(7)])
+            buckets = [weekly[weekday] for weekday in weekdays]
+            slot = (start, end, valid_from, valid_until)
+        for bucket in buckets:
+            if slot in bucket:
+                self.duplicates += 1
+            bucket.add(slot)
+
+    def finish(self) -> Dict[str, RoomSchedule]:
+        schedules = {}
+        for room_id in self._weekly.keys() | self._dated.keys():
+            weekly = []
+            for bucket in self._weekly.get(room_id, [set()] * 7):
+                slots, merges = merge_overlapping(list(bucket))
+                weekly.append(slots)
+                self.overlaps_merged += merges
+            dated = {}
+            for day, bucket in self._dated.get(room_id, {}).items():
+                dated[day], merges = merge_overlapping(list(bucket))
+                self.overlaps_merged += merges
+            schedules[room_id] = RoomSchedule(weekly, dated)
+        return schedules
+
+def read_csv_records(lines: Iterable[str]) -> Iterator[dict]:
+    """Columns: room_id, day (mon..sun, list or *) or date (YYYY-MM-DD), start, end[, valid_from, valid_until]"""
+    for row in csv.DictReader(lines):
+        yield {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+
+def _unfold_ics(lines: Iterable[str]) -> Iterator[str]:
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+def _parse_ics_datetime(params: str, value: str) -> Optional[datetime]:
+    if "VALUE=DATE" in params.upper() and "VALUE=DATE-TIME" not in params.upper():
+        return None
+    moment = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        moment += timedelta(hours=5, minutes=30)
+    return moment
+
+def _ics_event_record(event: Dict[str, Tuple[str, str]]) -> dict:
+    room_id = event.get("LOCATION", ("", ""))[1].replace("\\,", ",").strip()
+    try:
+        start = _parse_ics_datetime(*event["DTSTART"])
+        end = _parse_ics_datetime(*event["DTEND"]) if "DTEND" in event else None
+    except (KeyError, ValueError):
+        return {"room_id": room_id, "error": "missing or invalid DTSTART/DTEND"}
+    if start is None or end is None:
+        return {"room_id": room_id, "error": "all-day events are not supported"}
+    record = {"room_id": room_id, "start": start.hour + start.minute / 60, "end": end.hour + end.minute / 60}
+    if end.date() != start.date():
+        return {"room_id": room_id, "error": "events spanning midnight are not supported"}
+    rule = dict(part.split("=", 1) for part in event.get("RRULE", ("", ""))[1].split(";") if "=" in part)
+    if not rule:
+        record["date"] = start.date()
+        return record
+    if rule.get("FREQ") not in ("WEEKLY", "DAILY"):
+        return {"room_id": room_id, "error": f"unsupported RRULE frequency {rule.get('FREQ')!r}"}
+    days = [ICS_WEEKDAYS[d[-2:]] for d in rule.get("BYDAY", "").split(",") if d[-2:] in ICS_WEEKDAYS]
+    if rule["FREQ"] == "DAILY":
+        days = list(range(7))
+    record["day"] = ",".join(WEEKDAYS[d] for d in days or [start.weekday()])
+    record["valid_from"] = start.date()
+    if "UNTIL" in rule:
+        record["valid_until"] = datetime.strptime(rule["UNTIL"][:8], "%Y%m%d").date()
+    elif "COUNT" in rule:
+        weeks = math.ceil(int(rule["COUNT"]) / max(len(days), 1)) if rule["FREQ"] == "WEEKLY" else 0
+        record["valid_until"] = start.date() + (timedelta(weeks=weeks) if weeks else timedelta(days=int(rule["COUNT"]))) - timedelta(days=1)
+    return record
+
+def read_ics_records(lines: Iterable[str]) -> Iterator[dict]:
+    """VEVENTs with LOCATION as the room id; weekly/daily RRULEs become recurring slots"""
+    event = None
+    for line in _unfold_ics(lines):
+        if line == "BEGIN:VEVENT":
+            event = {}
+        elif line == "END:VEVENT":
+            if event is not None:
+                yield _ics_event_record(event)
+            event = None
+        elif event is not None and ":" in line:
+            name_params, value = line.split(":", 1)
+            name, _, params = name_params.partition(";")
+            event[name.upper()] = (params, value)
+
+def compile_timetable_lines(lines: Iterable[str], fmt: str, known_rooms: Optional[set]) -> TimetableCompiler:
+    compiler = TimetableCompiler(known_rooms)
+    records = read_ics_records(lines) if fmt == "ics" else read_csv_records(lines)
+    for record in records:
+        compiler.add(record)
+    return compiler
+
+def apply_timetable(schedules: Dict[str, RoomSchedule], replace_all: bool = False) -> List[str]:
+    """Store compiled schedules, recompiling indexes only for rooms whose timetable changed"""
+    changed = [
+        room_id for room_id, schedule in schedules.items()
+        if room_id not in timetable_store or timetable_store[room_id].fingerprint != schedule.fingerprint
+    ]
+    removed = [room_id for room_id in timetable_store if room_id not in schedules] if replace_all else []
+    for room_id in changed:
+        timetable_store[room_id] = schedules[room_id]
+    for room_id in removed:
+        del timetable_store[room_id]
+    if changed or removed:
+        refresh_availability_indexes(changed + removed)
+        mark_shared_snapshot_stale(rooms=changed + removed)
+    return sorted(changed + removed)
+
+def import_report(compiler: TimetableCompiler, schedules: Dict[str, RoomSchedule], changed: List[str], started: float) -> "ImportReport":
+    return ImportReport(
+        rows=compiler.rows,
+        accepted=compiler.accepted,
+        rejected=compiler.rejected,
+        duplicates=compiler.duplicates,
+        overlaps_merged=compiler.overlaps_merged,
+        rooms=len(schedules),
+        changed_rooms=changed,
+        errors=compiler.errors,
+        seconds=round(time.perf_counter() - started, 3),
+    )
+
+async def import_timetable_file(stream, fmt: str, replace_all: bool = False) -> "ImportReport":
+    """Stream a CSV/ICS timetable from a binary file object and apply it"""
+    started = time.perf_counter()
+    known_rooms = room_index.by_id.keys()
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    # Parsing is CPU-bound; keep it off the event loop and apply the result on it.
+    compiler = await asyncio.to_thread(compile_timetable_lines, lines, fmt, known_rooms)
+    schedules = compiler.finish()
+    changed = apply_timetable(schedules, replace_all)
+    return import_report(compiler, schedules, changed, started)
+
+async def import_timetable_mongo(collection, replace_all: bool = False) -> "ImportReport":
+    """Stream timetable documents (same fields as the CSV columns) from a Mongo collection"""
+    started = time.perf_counter()
+    compiler = TimetableCompiler(room_index.by_id.keys())
+    async for document in collection.find({}, {"_id": 0}):
+        compiler.add(document)
+    schedules = compiler.finish()
+    changed = apply_timetable(schedules, replace_all)
+    return import_report(compiler, schedules, changed, started)
+
+def load_classroom_catalog(records: Iterable[dict]) -> Tuple[List[dict], List[str]]:
+    """Validate catalog rows (facilities may be a list or a ;-separated string)"""
+    rooms, errors, seen = [], [], set()
+    for number, record in enumerate(records, 1):
+        record = dict(record)
+        if isinstance(record.get("facilities"), str):
+            record["facilities"] = [f.strip() for f in re.split(r"[;|]", record["facilities"]) if f.strip()]
+        try:
+            room = Classroom.model_validate(record).model_dump()
+        except ValidationError as e:
+            if len(errors) < IMPORT_ERROR_LIMIT:
+                error = e.errors()[0]
+                errors.append(f"record {number}: {'.'.join(map(str, error['loc']))}: {error['msg']}")
+            continue
+        if room["room_id"] in seen:
+            if len(errors) < IMPORT_ERROR_LIMIT:
+                errors.append(f"record {number}: duplicate room {room['room_id']!r}")
+            continue
+        seen.add(room["room_id"])
+        rooms.append(room)
+    return rooms, errors
+
+# ===================== TRACING =====================
+# Every request gets a Trace and a trace id (echoed as X-Trace-Id), so any request that crosses
+# SLOW_REQUEST_SECONDS is logged with its duration and attributes. Only sampled traces collect
+# spans, so span() and stage timers cost a lookup and a flag check otherwise.
+
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.1'))
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', '2'))
+SLOW_REQUEST_LOG_SIZE = int(os.environ.get('SLOW_REQUEST_LOG_SIZE', '100'))
+_TRACE_ID_RE = re.compile(r"[0-9A-Za-z_\-]{8,64}")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s-]{8,}\d")
+
+class Trace:
+    __slots__ = ("trace_id", "sampled", "started", "spans", "attributes")
+
+    def __init__(self, trace_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float, float]] = []  # (name, offset from request start, duration)
+        self.attributes: Dict[str, Any] = {}
+
+    def record(self, name: str, started: float, finished: float):
+        if self.sampled:
+            self.spans.append((name, started - self.started, finished - started))
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+class Span:
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str, trace: Trace):
+        self.name, self.trace = name, trace
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.record(self.name, self.started, time.perf_counter())
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+_NO_SPAN = _NoSpan()
+
+def span(name: str):
+    """Time a block as a span of the current request's trace; a no-op when it is not sampled"""
+    trace = current_trace.get()
+    return Span(name, trace) if trace is not None and trace.sampled else _NO_SPAN
+
+def annotate_trace(key: str, value: Any):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.attributes[key] = value
+
+def redact_query(text: str) -> str:
+    """Search text for the slow-request log, without email addresses or phone numbers"""
+    return _PHONE_RE.sub("<number>", _EMAIL_RE.sub("<email>", text))[:200]
+
+slow_requests: deque = deque(maxlen=SLOW_REQUEST_LOG_SIZE)
+slow_request_logger = logging.getLogger("slow_requests")
+
+def record_slow_request(trace: Trace, scope: dict, status_code: int):
+    duration = time.perf_counter() - trace.started
+    if duration < SLOW_REQUEST_SECONDS:
+        return
+    entry = {
+        "trace_id": trace.trace_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status_code,
+        "duration_ms": round(duration * 1000, 1),
+        "sampled": trace.sampled,
+        "spans": [
+            {"name": name, "start_ms": round(offset * 1000, 2), "duration_ms": round(elapsed * 1000, 2)}
+            for name, offset, elapsed in trace.spans
+        ],
+        "attributes": trace.attributes,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+    slow_requests.append(entry)
+    slow_request_logger.warning(json.dumps(entry))
+
+def incoming_trace_id(headers: List[Tuple[bytes, bytes]]) -> Optional[str]:
+    for name, value in headers:
+        if name == b"x-trace-id":
+            value = value.decode("latin-1")
+            return value if _TRACE_ID_RE.fullmatch(value) else None
+    return None
+
+class TracingMiddleware:
+    """Pure ASGI middleware assigning trace ids and logging requests that cross SLOW_REQUEST_SECONDS"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace_id = incoming_trace_id(scope["headers"]) or os.urandom(8).hex()
+        trace_header = (b"x-trace-id", trace_id.encode("latin-1"))
+        trace = Trace(trace_id, sampled=TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE)
+        status_code, streaming = 500, False
+
+        async def send_with_trace_id(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                streaming = any(name == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers)
+                message["headers"] = headers + [trace_header]
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            current_trace.reset(token)
+            # Event streams stay open by design, so their duration says nothing about slowness.
+            if not streaming:
+                record_slow_request(trace, scope, status_code)
+
+# ===================== METRICS =====================
+# Everything is observed on the event loop thread (thread-pool work is timed around its
+# await), so the counters are plain ints and lists with no locks. Derived values such as
+# cache hit ratios are read from the owning objects only when /api/metrics is scraped.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names, self.buckets = name, help_text, label_names, buckets
+        self.series: Dict[tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1  # le buckets are inclusive
+        series[1] += value
+
+    def time(self, *labels: str) -> "StageTimer":
+        return StageTimer(self, labels)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == math.inf else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_label_text(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_label_text(self.label_names, labels)} {cumulative}"
+
+class StageTimer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        finished = time.perf_counter()
+        self.histogram.observe(finished - self.started, *self.labels)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.record(self.labels[0] if self.labels else self.histogram.name, self.started, finished)
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help_text, label_names
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_label_text(self.label_names, labels)} {value}"
+
+class CallbackMetric:
+    """Counter or gauge whose samples are computed at scrape time"""
+
+    def __init__(self, name: str, help_text: str, kind: str, label_names: Tuple[str, ...], collect):
+        self.name, self.help, self.kind, self.label_names, self.collect = name, help_text, kind, label_names, collect
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self.collect():
+            yield f"{self.name}{_label_text(self.label_names, labels)} {value}"
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_seconds = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+stage_seconds = Histogram("stage_duration_seconds", "Latency of individual request stages", ("stage",))
+search_interpretations = Counter("search_interpretations_total", "How search queries were interpreted", ("source",))
+metrics_registry: List[Any] = [http_requests, http_request_seconds, stage_seconds, search_interpretations]
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in metrics_registry for line in metric.render()) + "\n"
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request counts and latency"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route template (not the raw path) keeps label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_seconds.observe(time.perf_counter() - started, scope["method"], path)
+            http_requests.inc(scope["method"], path, str(status_code))
+
+# ===================== ROOM BOOKINGS =====================
+
+BOOKING_MAX_HOURS = float(os.environ.get('BOOKING_MAX_HOURS', '3'))
+BOOKING_MAX_DAYS_AHEAD = int(os.environ.get('BOOKING_MAX_DAYS_AHEAD', '7'))
+BOOKING_SYNC_SECONDS = float(os.environ.get('BOOKING_SYNC_SECONDS', '10'))
+
+async def commit_booking(room_id: str, day: date, booking: dict) -> bool:
+    """Append a booking to the room's day document unless it overlaps one already stored.
+
+    The overlap check and the push are one conditional update, so concurrent bookers for
+    the same slot cannot both succeed and no lock is needed. The day document is unique
+    per (room_id, date): an upsert that collides with an existing document means either a
+    conflicting booking or a concurrent first booking, and the plain update settles which.
+    """
+    overlapping = {"$elemMatch": {"start_hour": {"$lt": booking["end_hour"]}, "end_hour": {"$gt": booking["start_hour"]}}}
+    query = {"room_id": room_id, "date": day.isoformat(), "bookings": {"$not": overlapping}}
+    update = {"$push": {"bookings": booking}}
+    try:
+        await db.room_bookings.update_one(query, update, upsert=True)
+        return True
+    except DuplicateKeyError:
+        result = await db.room_bookings.update_one(query, update)
+        return result.modified_count == 1
+
+def set_room_bookings(day: date, room_id: str, slots: List[Tuple[float, float, str]]):
+    """Replace one room's bookings for a day in the local mirror and recompile just that room"""
+    rooms = booked_slots.setdefault(day, {})
+    if slots:
+        rooms[room_id] = sorted(slots)
+    else:
+        rooms.pop(room_id, None)
+    # Not a shared snapshot change: every worker mirrors bookings from Mongo itself (sync_bookings)
+    refresh_availability_indexes([room_id], [day])
+
+def publish_booking_change(day: date):
+    if day == get_current_ist().date():
+        get_classroom_snapshot()  # rebuilds (and pushes to stream subscribers) since the index version moved
+        transition_scheduler.wake.set()
+
+def record_booking(room_id: str, day: date, booking: dict):
+    slots = booked_slots.get(day, {}).get(room_id, [])
+    set_room_bookings(day, room_id, slots + [(booking["start_hour"], booking["end_hour"], booking["id"])])
+    publish_booking_change(day)
+
+def forget_booking(room_id: str, day: date, booking_id: str):
+    slots = booked_slots.get(day, {}).get(room_id, [])
+    set_room_bookings(day, room_id, [slot for slot in slots if slot[2] != booking_id])
+    publish_booking_change(day)
+
+async def sync_bookings() -> int:
+    """Reload upcoming bookings from Mongo (other workers commit there too); returns rooms changed"""
+    today = get_current_ist().date()
+    stored: Dict[Tuple[date, str], List[Tuple[float, float, str]]] = {}
+    async for document in db.room_bookings.find({"date": {"$gte": today.isoformat()}}, {"_id": 0}):
+        slots = [(b["start_hour"], b["end_hour"], b["id"]) for b in document.get("bookings", [])]
+        if slots:
+            stored[(date.fromisoformat(document["date"]), document["room_id"])] = sorted(slots)
+    for day in [day for day in booked_slots if day < today]:
+        del booked_slots[day]
+    current = {(day, room_id): slots for day, rooms in booked_slots.items() for room_id, slots in rooms.items()}
+    changed = [key for key in stored.keys() | current.keys() if stored.get(key) != current.get(key)]
+    for day, room_id in changed:
+        set_room_bookings(day, room_id, stored.get((day, room_id), []))
+    if any(day == today for day, _ in changed):
+        publish_booking_change(today)
+    return len(changed)
+
+async def sync_bookings_periodically():
+    while True:
+        await asyncio.sleep(BOOKING_SYNC_SECONDS)
+        try:
+            await sync_bookings()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Booking sync error: {e}")
+
+# ===================== USER CACHE & REVOCATION =====================
+
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '300'))
+
+class UserCache:
+    """Short-lived in-process copy of user documents (without password hashes)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        user = self._entries.get(user_id)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def put(self, user: dict):
+        self._entries[user["id"]] = {k: v for k, v in user.items() if k not in ("password", "_id")}
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+REVOCATION_SYNC_SECONDS = float(os.environ.get('REVOCATION_SYNC_SECONDS', '5'))
+
+class TokenRevocations:
+    """In-process mirror of the revoked_tokens collection: token ids until they would have expired anyway"""
+
+    def __init__(self):
+        self._tokens: Dict[str, float] = {}
+        self.synced_at: Optional[datetime] = None
+
+    def add(self, jti: str, expires_at: float):
+        self._tokens[jti] = expires_at
+
+    def prune(self):
+        """Drop token ids that have expired anyway (once per sync, not per add)"""
+        now = time.time()
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+
+    def is_revoked(self, payload: dict) -> bool:
+        return payload.get("jti") in self._tokens
+
+token_revocations = TokenRevocations()
+
+async def revoke_token(jti: str, expires_at: float):
+    """Reject the token here at once and on every other worker from its next revocation sync"""
+    token_revocations.add(jti, expires_at)
+    await db.revoked_tokens.update_one(
+        {"jti": jti},
+        {"$set": {
+            "expires_at": datetime.fromtimestamp(expires_at, tz=timezone.utc),  # TTL index removes it after expiry
+            "revoked_at": datetime.now(timezone.utc),
+        }},
+        upsert=True,
+    )
+
+async def sync_revocations() -> int:
+    """Mirror revocations made by other workers; the first call loads every unexpired one"""
+    started = datetime.now(timezone.utc)
+    since = token_revocations.synced_at
+    # Overlap the window so a revocation committed while the previous query ran is not missed
+    query = {"expires_at": {"$gt": started}} if since is None else {"revoked_at": {"$gt": since - timedelta(seconds=REVOCATION_SYNC_SECONDS)}}
+    count = 0
+    async for revocation in db.revoked_tokens.find(query, {"_id": 0, "jti": 1, "expires_at": 1}):
+        # Motor returns naive UTC datetimes
+        token_revocations.add(revocation["jti"], revocation["expires_at"].replace(tzinfo=timezone.utc).timestamp())
+        count += 1
+    token_revocations.prune()
+    token_revocations.synced_at = started
+    return count
+
+async def sync_revocations_periodically():
+    while True:
+        await asyncio.sleep(REVOCATION_SYNC_SECONDS)
+        try:
+            await sync_revocations()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Revocation sync error: {e}")
+
+async def get_user_profile(user_id: str) -> Optional[dict]:
+    """Full user document (minus password), served from the user cache when possible"""
+    user = user_cache.get(user_id)
+    if user is None:
+        with stage_seconds.time("user_lookup"):
+            user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if user:
+            user_cache.put(user)
+    return user
+
+def invalidate_user(user_id: str):
+    """Drop cached user data after a profile change"""
+    user_cache.invalidate(user_id)
+
 # ===================== HELPER FUNCTIONS =====================
 
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_QUEUE = int(os.environ.get('BCRYPT_MAX_QUEUE', '64'))
+bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_pending = 0
+
+async def run_bcrypt(func, *args):
+    """Run a bcrypt call on the bounded worker pool so it never blocks the event loop"""
+    global _bcrypt_pending
+    if _bcrypt_pending >= BCRYPT_WORKERS + BCRYPT_MAX_QUEUE:
+        raise HTTPException(status_code=503, detail="Server busy, please try again", headers={"Retry-After": "1"})
+    _bcrypt_pending += 1
+    try:
+        with stage_seconds.time("bcrypt"):
+            return await asyncio.get_running_loop().run_in_executor(bcrypt_pool, func, *args)
+    finally:
+        _bcrypt_pending -= 1
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
-def create_token(user_id: str) -> str:
+def create_token(user: dict) -> str:
+    now = datetime.now(timezone.utc)
     payload = {
-        "user_id": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+        "user_id": user["id"],
+        "name": user["name"],
+        "role": user["role"],
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def decode_token(token: str) -> dict:
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        with stage_seconds.time("jwt_decode"):
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if token_revocations.is_revoked(payload):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return payload
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    with span("get_current_user"):
+        payload = decode_token(credentials.credentials)
+        user_id = payload.get("user_id")
+        if "name" in payload and "role" in payload:
+            # Everything the read paths need is in the signed token; no database round trip.
+            return {"id": user_id, "name": payload["name"], "role": payload["role"], "token": payload}
+        # Tokens issued before claims were embedded
+        user = await get_user_profile(user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        return {**user, "token": payload}
+
+async def require_admin(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
 
-def is_room_available(room_id: str, start_hour: float, end_hour: float) -> bool:
+def is_room_available(room_id: str, start_hour: float, end_hour: float, day: Optional[date] = None) -> bool:
     """Check if room is available for the entire duration"""
-    schedule = MOCK_SCHEDULE.get(room_id, [])
-    for occupied_start, occupied_end in schedule:
-        if not (end_hour <= occupied_start or start_hour >= occupied_end):
-            return False
-    return True
+    return get_availability_index(day).timeline(room_id).is_free(start_hour, end_hour)
 
-def get_room_status(room_id: str, current_hour: float) -> str:
+def get_room_status(room_id: str, current_hour: float, day: Optional[date] = None) -> str:
     """Get current room status"""
-    schedule = MOCK_SCHEDULE.get(room_id, [])
-    for start, end in schedule:
-        if start <= current_hour < end:
-            return "Occupied"
+    if get_availability_index(day).timeline(room_id).is_occupied_at(current_hour):
+        return "Occupied"
     return "Available"
 
-def get_predicted_availability(room_id: str, current_hour: float) -> Dict[str, str]:
+def get_predicted_availability(room_id: str, current_hour: float, day: Optional[date] = None) -> Dict[str, str]:
     """Get predicted availability for next 30/60/90 minutes"""
+    index = get_availability_index(day)
+    grid = index.grid
+    start_minute = grid.minute_of(current_hour)
     predictions = {}
-    for mins, label in [(30, "next30"), (60, "next60"), (90, "next90")]:
+    for mins, label in PREDICTION_WINDOWS:
         future_hour = current_hour + mins / 60
-        if future_hour > 18.5:
+        if future_hour > CAMPUS_CLOSE_HOUR:
             predictions[label] = "After Hours"
-        elif is_room_available(room_id, current_hour, min(future_hour, 18.5)):
-            predictions[label] = "Available"
+            continue
+        if start_minute is not None:
+            free = grid.is_free(room_id, start_minute, start_minute + mins)
         else:
-            predictions[label] = "May be occupied"
+            free = index.timeline(room_id).is_free(current_hour, future_hour)
+        predictions[label] = "Available" if free else "May be occupied"
     return predictions
 
+def get_current_ist() -> datetime:
+    """Get current wall-clock time in IST (UTC+5:30)"""
+    return datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+
 def get_current_hour() -> float:
     """Get current hour in IST (UTC+5:30)"""
-    now = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+    now = get_current_ist()
     return now.hour + now.minute / 60
 
+def dump_json(content: Any) -> bytes:
+    """Encode exactly like FastAPI's default JSONResponse"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+# ===================== ROOM SERIALIZATION =====================
+
+# RoomAvailability JSON is spliced from a per-room static prefix (room_id .. map_link) and a
+# status/prediction suffix. Both are encoded once: prefixes per catalog entry, suffixes per
+# distinct combination (there are only a handful), so per-request work is a byte join.
+_static_fragments: Dict[str, Tuple[dict, bytes]] = {}
+_dynamic_fragments: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], bytes] = {}
+
+def room_static_fragment(room: dict) -> bytes:
+    cached = _static_fragments.get(room["room_id"])
+    if cached is None or cached[0] is not room:
+        fragment = dump_json({key: room[key] for key in ("room_id", "floor", "capacity", "facilities", "map_link")})[:-1]
+        cached = _static_fragments[room["room_id"]] = (room, fragment)
+    return cached[1]
+
+def room_dynamic_fragment(status: str, predictions: Dict[str, str]) -> bytes:
+    key = (status, tuple(predictions.items()))
+    fragment = _dynamic_fragments.get(key)
+    if fragment is None:
+        fragment = _dynamic_fragments[key] = dump_json({"status": status, "predicted_availability": predictions})[1:]
+    return fragment
+
+def encode_room(room: dict, status: str, predictions: Dict[str, str]) -> bytes:
+    """Serialized RoomAvailability, byte-identical to the pydantic model's JSON"""
+    return room_static_fragment(room) + b"," + room_dynamic_fragment(status, predictions)
+
+def encode_room_at(room: dict, check_hour: float, view: Optional["RoomView"] = None) -> bytes:
+    room_id = room["room_id"]
+    return encode_room_view(room, get_room_status(room_id, check_hour), get_predicted_availability(room_id, check_hour), view)
+
+def json_array(items: List[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+# A room view is (fields, compact): which RoomAvailability fields to send, and whether to send
+# facilities as a bitmask over the room catalog's facility list, map_link as the room's position
+# in the catalog and predicted_availability as a list in the catalog's prediction_windows order.
+ROOM_FIELDS = tuple(RoomAvailability.model_fields)
+RoomView = Tuple[Tuple[str, ...], bool]
+FULL_VIEW: RoomView = (ROOM_FIELDS, False)
+
+def parse_room_view(fields: Optional[str], compact: bool) -> RoomView:
+    """View for the `fields` (comma-separated) and `compact` query parameters; room_id is always sent"""
+    if not fields:
+        return ROOM_FIELDS, compact
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(ROOM_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))} (choose from {', '.join(ROOM_FIELDS)})")
+    requested.add("room_id")
+    return tuple(field for field in ROOM_FIELDS if field in requested), compact
+
+def encode_room_view(room: dict, status: str, predictions: Dict[str, str], view: Optional[RoomView] = None) -> bytes:
+    if view is None or view == FULL_VIEW:
+        return encode_room(room, status, predictions)
+    fields, compact = view
+    encoded = {}
+    for field in fields:
+        if field == "status":
+            encoded[field] = status
+        elif field == "predicted_availability":
+            encoded[field] = list(predictions.values()) if compact else predictions
+        elif compact and field == "facilities":
+            encoded[field] = room_index.facility_masks[room_index.positions[room["room_id"]]]
+        elif compact and field == "map_link":
+            encoded[field] = room_index.positions[room["room_id"]]
+        else:
+            encoded[field] = room[field]
+    return dump_json(encoded)
+
+# ===================== FREE WINDOW FINDER =====================
+
+FREE_WINDOW_SEARCH_DAYS = int(os.environ.get('FREE_WINDOW_SEARCH_DAYS', '7'))
+FREE_WINDOW_RESULTS = int(os.environ.get('FREE_WINDOW_RESULTS', '5'))
+
+def room_free_windows(room_id: str, duration: float, first_day: date, first_hour: float, days: int) -> Iterator[Tuple[int, float, float]]:
+    """(day offset, start, end) of each campus-hours gap in one room at least `duration` hours long"""
+    for offset in range(days):
+        open_hour = max(CAMPUS_OPEN_HOUR, first_hour) if offset == 0 else CAMPUS_OPEN_HOUR
+        timeline = get_availability_index(first_day + timedelta(days=offset)).timeline(room_id)
+        for start, end in timeline.gaps(open_hour, CAMPUS_CLOSE_HOUR):
+            if end - start >= duration - 1e-9:
+                yield offset, start, end
+
+def find_free_windows(rooms: List[dict], duration: float, first_day: date, first_hour: float, limit: int,
+                      days: int = FREE_WINDOW_SEARCH_DAYS) -> List[Tuple[dict, date, float, float]]:
+    """Earliest `limit` free windows across rooms: a k-way heap merge of each room's gap stream"""
+    heap = []
+    for position, room in enumerate(rooms):
+        windows = room_free_windows(room["room_id"], duration, first_day, first_hour, days)
+        window = next(windows, None)
+        if window is not None:
+            # Ties on start time keep catalog order
+            heap.append((window[0], window[1], position, window[2], windows))
+    heapq.heapify(heap)
+    found = []
+    while heap and len(found) < limit:
+        offset, start, position, end, windows = heap[0]
+        found.append((rooms[position], first_day + timedelta(days=offset), start, end))
+        window = next(windows, None)
+        if window is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (window[0], window[1], position, window[2], windows))
+    return found
+
+# ===================== BATCH AVAILABILITY =====================
+
+BATCH_MAX_CELLS = int(os.environ.get('BATCH_MAX_CELLS', '100000'))
+
+def valid_campus_range(start_hour: float, end_hour: float) -> bool:
+    return CAMPUS_OPEN_HOUR <= start_hour < end_hour <= CAMPUS_CLOSE_HOUR
+
+def availability_checks(index: AvailabilityIndex, checks: List[AvailabilityCheck]) -> str:
+    known = room_index.by_id
+    return "".join(
+        "-" if check.room_id not in known
+        else "1" if index.timeline(check.room_id).is_free(check.start_hour, check.end_hour)
+        else "0"
+        for check in checks
+    )
+
+def availability_matrix(index: AvailabilityIndex, rooms: List[dict], ranges: List[Tuple[float, float]]) -> List[str]:
+    """Row per room, column per range; each row is one sweep over the room's sorted intervals"""
+    order = sorted(range(len(ranges)), key=lambda i: ranges[i])
+    sorted_ranges = [ranges[i] for i in order]
+    rows = []
+    for room in rooms:
+        cells = [""] * len(ranges)
+        for i, free in zip(order, index.timeline(room["room_id"]).free_flags(sorted_ranges)):
+            cells[i] = "1" if free else "0"
+        rows.append("".join(cells))
+    return rows
+
+def format_hour(hour: float) -> str:
+    minutes = round(hour * 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{(hours - 1) % 12 + 1}:{minutes:02d} {'AM' if hours < 12 else 'PM'}"
+
+# ===================== CLASSROOM SNAPSHOT CACHE =====================
+
+def make_etag(segment: int, body: bytes) -> str:
+    return f'"{segment}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+
+class Payload:
+    """Encoded JSON body with its ETag; the gzip copy is made on first use and then reused"""
+    __slots__ = ("body", "etag", "_gzipped")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.body) >= GZIP_MIN_BYTES
+
+    @property
+    def gzip_etag(self) -> str:
+        return self.etag[:-1] + '-gzip"'
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            with stage_seconds.time("gzip"):
+                self._gzipped = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+        return self._gzipped
+
+class ClassroomSnapshot:
+    """Immutable /api/classrooms result for one schedule segment"""
+    __slots__ = ("key", "segment", "states", "rooms", "room_bodies", "body", "etag", "_room_etags", "_payloads", "expires_minute")
+
+    def __init__(self, key: Tuple[int, int, int], rooms: List[Tuple[dict, str, Dict[str, str]]], room_bodies: Dict[str, bytes], expires_minute: int):
+        self.key = key  # (catalog version, index version, segment)
+        self.segment = key[2]
+        self.rooms = rooms  # (room, status, predictions) in catalog order
+        self.states = {room["room_id"]: (status, tuple(predictions.values())) for room, status, predictions in rooms}
+        self.room_bodies = room_bodies
+        self.body = json_array(list(room_bodies.values()))
+        # Content-derived, so every worker agrees on it and it changes exactly when the payload does.
+        self.etag = make_etag(self.segment, self.body)
+        self._room_etags: Dict[str, str] = {}
+        self._payloads: Dict[RoomView, Payload] = {FULL_VIEW: Payload(self.body, self.etag)}
+        self.expires_minute = expires_minute
+
+    def payload(self, view: RoomView = FULL_VIEW) -> Payload:
+        """The room list in a view, encoded (and later compressed) once per snapshot"""
+        payload = self._payloads.get(view)
+        if payload is None:
+            body = json_array([encode_room_view(room, status, predictions, view) for room, status, predictions in self.rooms])
+            payload = self._payloads[view] = Payload(body, make_etag(self.segment, body))
+        return payload
+
+    def room_etag(self, room_id: str) -> str:
+        etag = self._room_etags.get(room_id)
+        if etag is None:
+            etag = self._room_etags[room_id] = make_etag(self.segment, self.room_bodies[room_id])
+        return etag
+
+    def seconds_until_expiry(self, now: datetime) -> int:
+        seconds_into_day = now.hour * 3600 + now.minute * 60 + now.second
+        return max(self.expires_minute * 60 - seconds_into_day, 0)
+
+_classroom_snapshot: Optional[ClassroomSnapshot] = None
+
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', '15'))
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', '16'))
+
+def format_sse(event: str, data: bytes, event_id: Optional[str] = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\n".encode("utf-8") + b"data: " + data + b"\n\n"
+
+class RoomStatusBroadcaster:
+    """Fans snapshot changes out to every stream subscriber; encoded once per boundary"""
+
+    def __init__(self):
+        self.subscribers: set = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, previous: Optional[ClassroomSnapshot], current: ClassroomSnapshot):
+        if not self.subscribers or previous is None or previous.key == current.key:
+            return
+        event_id = "-".join(map(str, current.key))
+        if previous.states.keys() != current.states.keys():
+            message = format_sse("snapshot", current.body, event_id)
+        else:
+            changed = [
+                current.room_bodies[room_id] for room_id, state in current.states.items()
+                if previous.states[room_id] != state
+            ]
+            if not changed:
+                return
+            message = format_sse("update", json_array(changed), event_id)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind: end its stream so the client reconnects and resyncs from a snapshot.
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+room_status_stream = RoomStatusBroadcaster()
+
+def set_classroom_snapshot(snapshot: ClassroomSnapshot):
+    global _classroom_snapshot
+    previous, _classroom_snapshot = _classroom_snapshot, snapshot
+    room_status_stream.publish(previous, snapshot)
+
+def build_classroom_snapshot(day: date, minute: int) -> ClassroomSnapshot:
+    index = get_availability_index(day)
+    segment, next_minute = index.segment_at(minute)
+    # Every minute inside a segment yields the same statuses, so any of them is representative.
+    hour = minute / 60
+    rooms, room_bodies = [], {}
+    for room in CLASSROOMS:
+        room_id = room["room_id"]
+        status = get_room_status(room_id, hour, day)
+        predictions = get_predicted_availability(room_id, hour, day)
+        rooms.append((room, status, predictions))
+        room_bodies[room_id] = encode_room(room, status, predictions)
+    return ClassroomSnapshot((catalog_version, index.version, segment), rooms, room_bodies, next_minute)
+
+def get_classroom_snapshot(now: Optional[datetime] = None) -> ClassroomSnapshot:
+    """Serve the cached snapshot for the current segment, rebuilding it on a miss"""
+    if now is None:
+        now = get_current_ist()
+    day, minute = now.date(), now.hour * 60 + now.minute
+    index = get_availability_index(day)
+    snapshot = _classroom_snapshot
+    if snapshot is None or snapshot.key != (catalog_version, index.version, index.segment_at(minute)[0]):
+        snapshot = build_classroom_snapshot(day, minute)
+        set_classroom_snapshot(snapshot)
+    return snapshot
+
+async def refresh_classroom_snapshots():
+    """Precompute the next segment's snapshot and swap it in as the boundary passes"""
+    while True:
+        try:
+            now = get_current_ist()
+            current = get_classroom_snapshot(now)
+            next_day = now.date() + timedelta(days=current.expires_minute // MINUTES_PER_DAY)
+            upcoming = build_classroom_snapshot(next_day, current.expires_minute % MINUTES_PER_DAY)
+            if upcoming.payload().compressible:
+                upcoming.payload().gzipped()
+            seconds_into_day = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+            await asyncio.sleep(max(current.expires_minute * 60 - seconds_into_day, 0) + 0.05)
+            # Skip the swap if an import or catalog change superseded the precomputed snapshot.
+            if upcoming.key[:2] == (catalog_version, get_availability_index(next_day).version):
+                set_classroom_snapshot(upcoming)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Snapshot refresh error: {e}")
+            await asyncio.sleep(60)
+
+# ===================== SHARED SNAPSHOT =====================
+# With several uvicorn workers, SHARED_SNAPSHOT_PATH (ideally on /dev/shm) holds one copy of
+# the catalog, the compiled timetable, the bookings known when it was published and, for SHARED_SNAPSHOT_DAYS days,
+# every room's occupied intervals, day-grid prefix sums and segment boundaries. Workers map it
+# read-only and use the arrays in place, so the grids exist once however many workers run.
+# A worker whose data changed (timetable import, catalog) publishes a new generation by writing
+# a temporary file and renaming it over the old one; every worker maps it within a poll
+# interval and switches at the generation's effective_at time, so they change together.
+# Publishing is a compare-and-swap on the generation number: a worker that finds a newer
+# generation than the one it built on merges it first, keeping only the rooms and catalog it
+# changed itself, so concurrent edits from different workers are never lost. Bookings are not
+# published: each worker mirrors them from Mongo and overlays them on the mapped grids.
+
+SHARED_SNAPSHOT_PATH = os.environ.get('SHARED_SNAPSHOT_PATH', '')
+SHARED_SNAPSHOT_DAYS = int(os.environ.get('SHARED_SNAPSHOT_DAYS', '7'))
+SHARED_SNAPSHOT_POLL_SECONDS = float(os.environ.get('SHARED_SNAPSHOT_POLL_SECONDS', '0.5'))
+SHARED_SNAPSHOT_MAGIC = b"IIPSSNP1"
+_SHARED_HEADER = struct.Struct("<8sQdQ")  # magic, generation, effective_at (epoch seconds), metadata length
+_SHARED_ALIGNMENT = 64
+
+class SharedChanges:
+    """What this worker changed since the generation its state is based on"""
+
+    def __init__(self):
+        self.catalog = False
+        self.rooms: set = set()  # room ids whose timetable changed
+
+    def __bool__(self) -> bool:
+        return self.catalog or bool(self.rooms)
+
+    def absorb(self, other: "SharedChanges"):
+        self.catalog = self.catalog or other.catalog
+        self.rooms |= other.rooms
+
+_shared_changes = SharedChanges()
+_shared_base_generation = 0  # generation the local state was adopted or published from
+
+def mark_shared_snapshot_stale(rooms: Iterable[str] = (), catalog: bool = False):
+    _shared_changes.rooms.update(rooms)
+    _shared_changes.catalog = _shared_changes.catalog or catalog
+
+def forget_shared_changes():
+    """Treat the current state as a baseline rather than local edits (startup defaults)"""
+    global _shared_changes
+    _shared_changes = SharedChanges()
+
+def _padding(length: int) -> bytes:
+    return b"\0" * (-length % _SHARED_ALIGNMENT)
+
+def schedule_to_json(schedule: RoomSchedule) -> dict:
+    as_text = lambda day: day.isoformat() if day else None
+    return {
+        "weekly": [[[start, end, as_text(valid_from), as_text(valid_until)] for start, end, valid_from, valid_until in slots]
+                   for slots in schedule.weekly],
+        "dated": {day.isoformat(): [list(slot) for slot in slots] for day, slots in schedule.dated.items()},
+        "fingerprint": schedule.fingerprint,
+    }
+
+def schedule_from_json(data: dict) -> RoomSchedule:
+    as_day = lambda text: date.fromisoformat(text) if text else None
+    weekly = [[(start, end, as_day(valid_from), as_day(valid_until)) for start, end, valid_from, valid_until in slots]
+              for slots in data["weekly"]]
+    dated = {date.fromisoformat(day): [tuple(slot) for slot in slots] for day, slots in data["dated"].items()}
+    return RoomSchedule(weekly, dated)
+
+def encode_shared_snapshot() -> Tuple[int, List[bytes]]:
+    """Metadata length and file body (everything after the header) for the current state"""
+    first_day = get_current_ist().date()
+    indexes = [get_availability_index(first_day + timedelta(days=offset)) for offset in range(SHARED_SNAPSHOT_DAYS)]
+    room_ids = sorted(set().union(*(index.grid.room_ids for index in indexes)))
+    positions = {room_id: row for row, room_id in enumerate(room_ids)}
+    width = hour_to_minute(CAMPUS_CLOSE_HOUR) - CAMPUS_OPEN_HOUR * 60
+    offsets = np.zeros((len(indexes), len(room_ids) + 1), dtype=np.int64)
+    prefix = np.zeros((len(indexes), len(room_ids), width + 1), dtype=np.int16)
+    segment_offsets = np.zeros(len(indexes) + 1, dtype=np.int64)
+    bounds: List[Tuple[float, float]] = []
+    segments: List[int] = []
+    for day, index in enumerate(indexes):
+        offsets[day, 0] = len(bounds)
+        for row, room_id in enumerate(room_ids):
+            timeline = index.timeline(room_id)
+            bounds.extend(zip(timeline.starts, timeline.ends))
+            offsets[day, row + 1] = len(bounds)
+        grid = index.grid
+        prefix[day, [positions[room_id] for room_id in grid.room_ids]] = grid.prefix
+        segments.extend(index.segment_boundaries)
+        segment_offsets[day + 1] = len(segments)
+    arrays = {
+        "offsets": offsets,
+        "bounds": np.array(bounds, dtype=np.float64).reshape(-1, 2),
+        "prefix": prefix,
+        "segment_offsets": segment_offsets,
+        "segments": np.array(segments, dtype=np.int32),
+    }
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [position, array.dtype.str, list(array.shape)]
+        position += array.nbytes + len(_padding(array.nbytes))
+    meta = json.dumps({
+        "first_day": first_day.isoformat(),
+        "days": len(indexes),
+        "room_ids": room_ids,
+        "catalog": CLASSROOMS,
+        "timetable": {room_id: schedule_to_json(schedule) for room_id, schedule in timetable_store.items()},
+        "bookings": {day.isoformat(): rooms for day, rooms in booked_slots.items()},
+        "arrays": layout,
+    }).encode("utf-8")
+    chunks = [meta + _padding(_SHARED_HEADER.size + len(meta))]
+    for array in arrays.values():
+        data = array.tobytes()
+        chunks.append(data + _padding(len(data)))
+    return len(meta), chunks
+
+def read_shared_header(path: str) -> Optional[tuple]:
+    try:
+        with open(path, "rb") as f:
+            header = _SHARED_HEADER.unpack(f.read(_SHARED_HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return None
+    return header if header[0] == SHARED_SNAPSHOT_MAGIC else None
+
+def write_shared_snapshot(path: str, meta_length: int, chunks: List[bytes], effective_at: float, expected: int) -> Optional[int]:
+    """Publish the generation after `expected`, or return None if another worker already published one.
+
+    The lock only orders concurrent publishers; readers never take it.
+    """
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        header = read_shared_header(path)
+        if (header[1] if header else 0) != expected:
+            return None
+        generation = expected + 1
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(_SHARED_HEADER.pack(SHARED_SNAPSHOT_MAGIC, generation, effective_at, meta_length))
+            f.writelines(chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    return generation
+
+class SharedSnapshot:
+    """One generation of the snapshot file, mapped read-only; the arrays are views into the mapping"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, self.effective_at, meta_length = _SHARED_HEADER.unpack_from(self.map, 0)
+        if magic != SHARED_SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a shared snapshot file")
+        self.meta = json.loads(self.map[_SHARED_HEADER.size:_SHARED_HEADER.size + meta_length])
+        self.first_day = date.fromisoformat(self.meta["first_day"])
+        self.days = self.meta["days"]
+        self.room_ids = self.meta["room_ids"]
+        self.rows = {room_id: row for row, room_id in enumerate(self.room_ids)}
+        base = _SHARED_HEADER.size + meta_length + len(_padding(_SHARED_HEADER.size + meta_length))
+        arrays = {
+            name: np.frombuffer(self.map, dtype=dtype, count=math.prod(shape), offset=base + offset).reshape(shape)
+            for name, (offset, dtype, shape) in self.meta["arrays"].items()
+        }
+        self.offsets, self.bounds, self.prefix = arrays["offsets"], arrays["bounds"], arrays["prefix"]
+        self.segment_offsets, self.segments = arrays["segment_offsets"], arrays["segments"]
+
+    def timeline(self, day: int, room_id: str) -> RoomTimeline:
+        row = self.rows.get(room_id)
+        if row is None:
+            return EMPTY_TIMELINE
+        lo, hi = self.offsets.item(day, row), self.offsets.item(day, row + 1)
+        return RoomTimeline(self.bounds[lo:hi].tolist()) if hi > lo else EMPTY_TIMELINE
+
+    def segment_boundaries(self, day: int) -> List[int]:
+        return self.segments[self.segment_offsets.item(day):self.segment_offsets.item(day + 1)].tolist()
+
+class SharedDayIndex(AvailabilityIndex):
+    """Availability index for one day of a shared snapshot; timelines are materialised per room on first use"""
+
+    def __init__(self, shared: SharedSnapshot, day: int):
+        super().__init__({})
+        self.shared, self.day = shared, day
+        self._grid = DayGrid.from_prefix(shared.room_ids, shared.rows, shared.prefix[day])
+        self._segment_boundaries = shared.segment_boundaries(day)
+
+    def timeline(self, room_id: str) -> RoomTimeline:
+        timeline = self.timelines.get(room_id)
+        if timeline is None:
+            timeline = self.timelines[room_id] = self.shared.timeline(self.day, room_id)
+        return timeline
+
+    def with_rooms(self, updates: Dict[str, List[Tuple[float, float]]]) -> AvailabilityIndex:
+        for room_id in self.shared.room_ids:
+            self.timeline(room_id)
+        return super().with_rooms(updates)
+
+shared_snapshot: Optional[SharedSnapshot] = None
+
+def adopt_shared_snapshot(shared: SharedSnapshot):
+    """Make a mapped generation this worker's catalog, timetable and indexes.
+
+    Anything this worker changed and has not published yet (_shared_changes) is kept and
+    overlaid on the generation, so the next publish carries both.
+    """
+    global CLASSROOMS, room_index, catalog_version, shared_snapshot, _shared_base_generation
+    meta, keep = shared.meta, _shared_changes
+    if not keep.catalog and meta["catalog"] != CLASSROOMS:
+        CLASSROOMS = meta["catalog"]
+        room_index = RoomAttributeIndex(CLASSROOMS)
+        catalog_version += 1
+    timetable = meta["timetable"]
+    for room_id in [room_id for room_id in timetable_store if room_id not in timetable and room_id not in keep.rooms]:
+        del timetable_store[room_id]
+    for room_id, data in timetable.items():
+        if room_id in keep.rooms:
+            continue
+        if room_id not in timetable_store or timetable_store[room_id].fingerprint != data["fingerprint"]:
+            timetable_store[room_id] = schedule_from_json(data)
+    # The booking mirror stays this worker's own (synced from Mongo); rooms whose bookings moved on
+    # since the generation was encoded are recompiled over its grids.
+    encoded = {
+        (date.fromisoformat(day), room_id): [tuple(slot) for slot in slots]
+        for day, rooms in meta["bookings"].items() for room_id, slots in rooms.items()
+    }
+    mirrored = {(day, room_id): slots for day, rooms in booked_slots.items() for room_id, slots in rooms.items()}
+    moved: Dict[date, set] = {}
+    for day, room_id in encoded.keys() | mirrored.keys():
+        if encoded.get((day, room_id)) != mirrored.get((day, room_id)):
+            moved.setdefault(day, set()).add(room_id)
+    _indexes_by_date.clear()
+    for day in range(shared.days):
+        _indexes_by_date[shared.first_day + timedelta(days=day)] = SharedDayIndex(shared, day)
+    if keep.rooms:
+        refresh_availability_indexes(keep.rooms)
+    for day, room_ids in moved.items():
+        refresh_availability_indexes(room_ids, [day])
+    shared_snapshot = shared
+    _shared_base_generation = shared.generation
+    get_classroom_snapshot()
+    transition_scheduler.wake.set()
+    logger.info(f"Adopted shared snapshot generation {shared.generation}" + (" with unpublished local changes" if keep else ""))
+
+def map_shared_snapshot(current: Optional[SharedSnapshot]) -> Optional[SharedSnapshot]:
+    """The file's generation if it was replaced since `current` was mapped, else None"""
+    try:
+        if current is not None and os.stat(SHARED_SNAPSHOT_PATH).st_ino == current.inode:
+            return None
+        return SharedSnapshot(SHARED_SNAPSHOT_PATH)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
+
+async def publish_shared_snapshot() -> Optional[SharedSnapshot]:
+    """Publish the local state on top of _shared_base_generation; None if a newer generation won the race"""
+    global _shared_changes, _shared_base_generation
+    # Changes made from here on belong to the next generation.
+    published, _shared_changes = _shared_changes, SharedChanges()
+    # Encoding reads live state, so it stays on the event loop; only the file write is offloaded.
+    meta_length, chunks = encode_shared_snapshot()
+    effective_at = time.time() + 2 * SHARED_SNAPSHOT_POLL_SECONDS
+    generation = await asyncio.to_thread(write_shared_snapshot, SHARED_SNAPSHOT_PATH, meta_length, chunks,
+                                         effective_at, _shared_base_generation)
+    if generation is None:
+        published.absorb(_shared_changes)
+        _shared_changes = published
+        logger.info(f"Shared snapshot moved past generation {_shared_base_generation}; merging before publishing")
+        return None
+    _shared_base_generation = generation
+    logger.info(f"Published shared snapshot generation {generation}")
+    return SharedSnapshot(SHARED_SNAPSHOT_PATH)
+
+async def sync_shared_snapshot():
+    """Publish local changes, map other workers' generations and switch to each at its effective_at"""
+    pending: Optional[SharedSnapshot] = None
+    while True:
+        try:
+            mapped = map_shared_snapshot(pending or shared_snapshot)
+            if mapped is not None:
+                pending = mapped
+            # With local changes waiting, a newer generation is merged right away so the publish builds on it.
+            if pending is not None and (_shared_changes or time.time() >= pending.effective_at):
+                if pending.generation != _shared_base_generation or not _shared_changes:
+                    adopt_shared_snapshot(pending)
+                pending = None
+            latest = pending or shared_snapshot
+            if _shared_changes or latest is None or latest.first_day < get_current_ist().date():
+                # None means another worker published first; its generation is merged on the next pass.
+                pending = await publish_shared_snapshot()
+            delay = SHARED_SNAPSHOT_POLL_SECONDS
+            if pending is not None:
+                delay = min(delay, max(pending.effective_at - time.time(), 0))
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Shared snapshot sync error: {e}")
+            await asyncio.sleep(SHARED_SNAPSHOT_POLL_SECONDS)
+
+# ===================== FAVORITES & NOTIFICATIONS =====================
+
+NOTIFICATIONS_ENABLED = os.environ.get('NOTIFICATIONS_ENABLED', '1') == '1'
+# Workers on one host elect a single scheduler by holding an exclusive flock on this file; the
+# kernel releases it when the holder exits and a standby worker takes over within a recheck.
+# Empty disables the election (every worker runs a scheduler); with several hosts, enable
+# notifications on one host only.
+SCHEDULER_LOCK_PATH = os.environ.get('SCHEDULER_LOCK_PATH', '/tmp/classroom-finder-scheduler.lock')
+NOTIFICATION_WEBHOOK_URL = os.environ.get('NOTIFICATION_WEBHOOK_URL', '')
+NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS', '5'))
+NOTIFICATION_INBOX_SIZE = int(os.environ.get('NOTIFICATION_INBOX_SIZE', '50'))
+NOTIFICATION_RETENTION_HOURS = float(os.environ.get('NOTIFICATION_RETENTION_HOURS', '48'))
+TRANSITION_RECHECK_SECONDS = float(os.environ.get('TRANSITION_RECHECK_SECONDS', '30'))
+FAVORITES_SYNC_SECONDS = float(os.environ.get('FAVORITES_SYNC_SECONDS', '10'))
+
+class MongoSink:
+    """Stores each transition once in the notifications collection, so any worker can serve a user's inbox"""
+
+    def __init__(self, inbox_size: int, retention_hours: float):
+        self.inbox_size = inbox_size
+        self.retention = timedelta(hours=retention_hours)
+
+    async def deliver(self, event: dict, user_ids: List[str]):
+        # expires_at drives the TTL index created in prepare_database
+        await db.notifications.insert_one({**event, "user_ids": user_ids, "expires_at": datetime.now(timezone.utc) + self.retention})
+
+    async def recent(self, user_id: str, after: int = 0) -> List[dict]:
+        cursor = db.notifications.find(
+            {"user_ids": user_id, "id": {"$gt": after}}, {"_id": 0, "user_ids": 0, "expires_at": 0},
+        ).sort("id", -1).limit(self.inbox_size)
+        return list(reversed(await cursor.to_list(None)))
+
+    async def close(self):
+        pass
+
+class WebhookSink:
+    """POSTs one payload per transition, listing every subscribed user"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def deliver(self, event: dict, user_ids: List[str]):
+        try:
+            response = await self.client.post(self.url, json={**event, "user_ids": user_ids})
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error(f"Notification webhook failed for {event['room_id']}: {e}")
+
+    async def close(self):
+        await self.client.aclose()
+
+class TransitionScheduler:
+    """Fans room status changes out to the users who favourited the room.
+
+    Each subscribed room has one heap entry: the minute of its next transition, computed
+    from the day's availability index. Work is proportional to transitions, not to
+    users x rooms x poll interval; the heap is rebuilt only when the index changes
+    (timetable import, booking) or the day rolls over.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.subscribers: Dict[str, set] = {}
+        self.heap: List[Tuple[int, str]] = []
+        self.due: Dict[str, int] = {}  # room_id -> minute of its live heap entry
+        self.statuses: Dict[str, str] = {}
+        self.key: Optional[Tuple[date, int]] = None
+        self.added: set = set()
+        self.favorites: Dict[str, set] = {}  # user_id -> room_ids, as last loaded
+        self.wake = asyncio.Event()
+        self._last_event_id = 0
+
+    def next_event_id(self) -> int:
+        # Millisecond timestamps keep ids increasing across restarts, so clients' `after` cursors stay valid
+        self._last_event_id = max(self._last_event_id + 1, int(time.time() * 1000))
+        return self._last_event_id
+
+    def set_favorites(self, user_id: str, room_ids: Iterable[str]):
+        """Replace one user's subscriptions with their current favourites"""
+        room_ids = set(room_ids)
+        previous = self.favorites.get(user_id, set())
+        for room_id in previous - room_ids:
+            self.unsubscribe(user_id, room_id)
+        for room_id in room_ids - previous:
+            self.subscribe(user_id, room_id)
+        if room_ids:
+            self.favorites[user_id] = room_ids
+        else:
+            self.favorites.pop(user_id, None)
+
+    def subscribe(self, user_id: str, room_id: str):
+        users = self.subscribers.setdefault(room_id, set())
+        if not users:
+            self.added.add(room_id)
+            self.wake.set()
+        users.add(user_id)
+
+    def unsubscribe(self, user_id: str, room_id: str):
+        users = self.subscribers.get(room_id)
+        if users:
+            users.discard(user_id)
+            if not users:
+                del self.subscribers[room_id]
+
+    def _schedule(self, index: AvailabilityIndex, room_id: str, minute: int):
+        next_minute = index.timeline(room_id).next_change(minute)
+        if next_minute is not None and next_minute < MINUTES_PER_DAY:
+            self.due[room_id] = next_minute
+            heapq.heappush(self.heap, (next_minute, room_id))
+        else:
+            self.due.pop(room_id, None)
+
+    async def _notify(self, index: AvailabilityIndex, room_id: str, minute: int, now: datetime):
+        status = "Occupied" if index.timeline(room_id).is_occupied_at(minute / 60) else "Available"
+        previous, self.statuses[room_id] = self.statuses.get(room_id), status
+        users = self.subscribers.get(room_id)
+        if previous is None or previous == status or not users:
+            return
+        if not CAMPUS_OPEN_HOUR * 60 <= minute < hour_to_minute(CAMPUS_CLOSE_HOUR):
+            return
+        event = {"id": self.next_event_id(), "room_id": room_id, "status": status, "at": now.isoformat()}
+        await self.sink.deliver(event, sorted(users))
+
+    async def step(self, now: datetime) -> float:
+        """Fire due transitions; returns seconds until the next one is due"""
+        day, minute = now.date(), now.hour * 60 + now.minute
+        index = get_availability_index(day)
+        if self.key != (day, index.version):
+            # Index changed: statuses may have flipped right now, and every next transition moved.
+            self.key, self.heap, self.due, self.added = (day, index.version), [], {}, set()
+            for room_id in list(self.subscribers):
+                await self._notify(index, room_id, minute, now)
+                self._schedule(index, room_id, minute)
+        for room_id in self.added:
+            self.statuses[room_id] = "Occupied" if index.timeline(room_id).is_occupied_at(minute / 60) else "Available"
+            self._schedule(index, room_id, minute)
+        self.added = set()
+        due_rooms = set()
+        while self.heap and self.heap[0][0] <= minute:
+            due_minute, room_id = heapq.heappop(self.heap)
+            # Entries superseded by a later reschedule, or for rooms nobody follows any more, are dropped
+            if self.due.get(room_id) == due_minute and room_id in self.subscribers:
+                due_rooms.add(room_id)
+        # After a stall a room may have several overdue transitions; only its status now is reported.
+        for room_id in sorted(due_rooms):
+            await self._notify(index, room_id, minute, now)
+            self._schedule(index, room_id, minute)
+        seconds_into_day = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        due = self.heap[0][0] * 60 if self.heap else MINUTES_PER_DAY * 60
+        return max(due - seconds_into_day, 0)
+
+    async def run(self):
+        while True:
+            try:
+                delay = await self.step(get_current_ist())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transition scheduler error: {e}")
+                delay = TRANSITION_RECHECK_SECONDS
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), min(delay + 0.05, TRANSITION_RECHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+notification_sink = (
+    WebhookSink(NOTIFICATION_WEBHOOK_URL, NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS) if NOTIFICATION_WEBHOOK_URL
+    else MongoSink(NOTIFICATION_INBOX_SIZE, NOTIFICATION_RETENTION_HOURS)
+)
+transition_scheduler = TransitionScheduler(notification_sink)
+
+async def load_favorites(since: Optional[str] = None) -> int:
+    """Apply favourites changed after `since` (all of them when None); returns the users updated"""
+    query = {"favorites": {"$exists": True, "$ne": []}} if since is None else {"favorites_updated_at": {"$gt": since}}
+    count = 0
+    async for user in db.users.find(query, {"_id": 0, "id": 1, "favorites": 1}):
+        transition_scheduler.set_favorites(user["id"], user.get("favorites", []))
+        count += 1
+    return count
+
+async def sync_favorites_periodically():
+    """Pick up favourites changed through other workers; only the worker running the scheduler needs them"""
+    synced_at = datetime.now(timezone.utc)
+    while True:
+        await asyncio.sleep(FAVORITES_SYNC_SECONDS)
+        try:
+            started = datetime.now(timezone.utc)
+            # Overlap the window so a write committed while the previous query ran is not missed
+            await load_favorites((synced_at - timedelta(seconds=FAVORITES_SYNC_SECONDS)).isoformat())
+            synced_at = started
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Favourites sync error: {e}")
+
+def try_scheduler_lock(path: str) -> Optional[int]:
+    """File descriptor holding the scheduler lock, or None while another worker holds it"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+async def run_transition_scheduler():
+    """Run the scheduler and its favourites sync on the elected worker only, so each transition is delivered once"""
+    lock = None
+    if SCHEDULER_LOCK_PATH:
+        while (lock := try_scheduler_lock(SCHEDULER_LOCK_PATH)) is None:
+            await asyncio.sleep(TRANSITION_RECHECK_SECONDS)
+        logger.info(f"This worker (pid {os.getpid()}) runs the transition scheduler")
+    favorites_sync = None
+    try:
+        try:
+            logger.info(f"Loaded {await load_favorites()} favourite room subscriptions")
+        except Exception as e:
+            logger.error(f"Loading favourites failed: {e}")
+        favorites_sync = asyncio.create_task(sync_favorites_periodically())
+        await transition_scheduler.run()
+    finally:
+        if favorites_sync is not None:
+            favorites_sync.cancel()
+        if lock is not None:
+            os.close(lock)
+
 # ===================== AUTH ENDPOINTS =====================
 
 @api_router.post("/auth/register", response_model=TokenResponse)
@@ -229,13 +2316,17 @@ async def register(user_data: UserCreate):
         "id": user_id,
         "name": user_data.name,
         "email": user_data.email,
-        "password": hash_password(user_data.password),
+        "password": await run_bcrypt(hash_password, user_data.password),
         "role": user_data.role,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    user_cache.put(user_doc)
     
-    token = create_token(user_id)
+    token = create_token(user_doc)
     user_response = UserResponse(
         id=user_id,
         name=user_data.name,
@@ -247,11 +2338,13 @@ async def register(user_data: UserCreate):
 
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
-    user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password"]):
+    with stage_seconds.time("user_lookup"):
+        user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
+    if not user or not await run_bcrypt(verify_password, credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    user_cache.put(user)
     
-    token = create_token(user["id"])
+    token = create_token(user)
     user_response = UserResponse(
         id=user["id"],
         name=user["name"],
@@ -261,54 +2354,712 @@ async def login(credentials: UserLogin):
     )
     return TokenResponse(token=token, user=user_response)
 
+@api_router.post("/auth/logout")
+async def logout(current_user: dict = Depends(get_current_user)):
+    token = current_user["token"]
+    if token.get("jti"):
+        await revoke_token(token["jti"], token["exp"])
+    return {"message": "Logged out"}
+
 @api_router.get("/auth/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
+    user = await get_user_profile(current_user["id"])
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
     return UserResponse(
-        id=current_user["id"],
-        name=current_user["name"],
-        email=current_user["email"],
-        role=current_user["role"],
-        created_at=current_user["created_at"]
+        id=user["id"],
+        name=user["name"],
+        email=user["email"],
+        role=user["role"],
+        created_at=user["created_at"]
     )
 
 # ===================== CLASSROOM ENDPOINTS =====================
 
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def conditional_response(request: Request, body: bytes, etag: str, max_age: int) -> Response:
+    """Answer 304 when the client already holds this payload; cache only until the next boundary"""
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def payload_response(request: Request, payload: Payload, max_age: int, headers: Optional[Dict[str, str]] = None) -> Response:
+    """conditional_response for a cached payload, sending its gzip copy when the client accepts it"""
+    gzipped = payload.compressible and accepts_gzip(request)
+    headers = {
+        "ETag": payload.gzip_etag if gzipped else payload.etag,
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+        **(headers or {}),
+    }
+    if etag_matches(request, payload.etag) or etag_matches(request, payload.gzip_etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        return Response(content=payload.gzipped(), media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+def compress_response(request: Request, response: Response, headers: Optional[Dict[str, str]] = None) -> Response:
+    """gzip a one-off JSON response over GZIP_MIN_BYTES (cached payloads are compressed once instead)"""
+    headers = {"Vary": "Accept-Encoding", **(headers or {})}
+    if len(response.body) < GZIP_MIN_BYTES or not accepts_gzip(request):
+        response.headers.update(headers)
+        return response
+    with stage_seconds.time("gzip"):
+        body = gzip.compress(response.body, GZIP_LEVEL)
+    return Response(content=body, status_code=response.status_code, media_type=response.media_type,
+                    headers={**headers, "Content-Encoding": "gzip"})
+
+CATALOG_MAX_AGE_SECONDS = int(os.environ.get('CATALOG_MAX_AGE_SECONDS', '3600'))
+_room_catalog: Optional[Tuple[int, Payload]] = None
+
+def get_room_catalog() -> Payload:
+    """Static room attributes that compact room lists refer to, encoded once per catalog version"""
+    global _room_catalog
+    if _room_catalog is None or _room_catalog[0] != catalog_version:
+        index = room_index
+        body = dump_json({
+            "facilities": list(index.facility_bits),
+            "prediction_windows": [label for _, label in PREDICTION_WINDOWS],
+            "rooms": [{key: room[key] for key in ("room_id", "floor", "capacity", "facilities", "map_link")} for room in index.rooms],
+        })
+        _room_catalog = (catalog_version, Payload(body, make_etag(len(index.rooms), body)))
+    return _room_catalog[1]
+
+def room_view_headers(view: RoomView) -> Dict[str, str]:
+    """Compact rooms only make sense against the catalog they were encoded for, so name it"""
+    return {"X-Room-Catalog": get_room_catalog().etag} if view[1] else {}
+
 @api_router.get("/classrooms", response_model=List[RoomAvailability])
-async def get_classrooms(current_user: dict = Depends(get_current_user)):
-    current_hour = get_current_hour()
-    rooms = []
-    for room in CLASSROOMS:
-        status = get_room_status(room["room_id"], current_hour)
-        predictions = get_predicted_availability(room["room_id"], current_hour)
-        rooms.append(RoomAvailability(
-            room_id=room["room_id"],
-            floor=room["floor"],
-            capacity=room["capacity"],
-            facilities=room["facilities"],
-            map_link=room["map_link"],
-            status=status,
-            predicted_availability=predictions
+async def get_classrooms(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated RoomAvailability fields to include"),
+    compact: bool = Query(False, description="Facilities as a bitmask and map links as catalog positions"),
+    current_user: dict = Depends(get_current_user),
+):
+    view = parse_room_view(fields, compact)
+    now = get_current_ist()
+    snapshot = get_classroom_snapshot(now)
+    return payload_response(request, snapshot.payload(view), snapshot.seconds_until_expiry(now), room_view_headers(view))
+
+@api_router.get("/classrooms/catalog")
+async def get_classroom_catalog(request: Request, current_user: dict = Depends(get_current_user)):
+    """Room attributes for decoding compact room lists; changes only when the catalog does"""
+    return payload_response(request, get_room_catalog(), CATALOG_MAX_AGE_SECONDS)
+
+@api_router.get("/classrooms/stream")
+async def stream_classrooms(current_user: dict = Depends(get_current_user)):
+    """Server-sent events: the full snapshot first, then only rooms that change at each boundary"""
+    queue = room_status_stream.subscribe()
+    snapshot = get_classroom_snapshot()
+
+    async def events():
+        try:
+            yield format_sse("snapshot", snapshot.body, "-".join(map(str, snapshot.key)))
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            room_status_stream.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api_router.get("/classrooms/free-windows", response_model=List[FreeWindow])
+async def get_free_windows(
+    duration_minutes: int = Query(60, ge=1, le=int((CAMPUS_CLOSE_HOUR - CAMPUS_OPEN_HOUR) * 60)),
+    floor: Optional[str] = None,
+    min_capacity: Optional[int] = None,
+    facilities: Optional[List[str]] = Query(None),
+    room_ids: Optional[List[str]] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    days: int = Query(FREE_WINDOW_SEARCH_DAYS, ge=1, le=INDEX_CACHE_DAYS),
+    current_user: dict = Depends(get_current_user),
+):
+    """Earliest gaps of at least duration_minutes across the matching rooms, from now onwards"""
+    now = get_current_ist()
+    rooms = room_index.select(room_index.match(floor=floor, room_ids=room_ids, min_capacity=min_capacity, facilities=facilities))
+    windows = find_free_windows(rooms, duration_minutes / 60, now.date(), now.hour + now.minute / 60, limit, days)
+    return [
+        FreeWindow(**room, date=day.isoformat(), start_hour=start, end_hour=end)
+        for room, day, start, end in windows
+    ]
+
+def check_availability_day(day: Optional[date]) -> date:
+    """The requested day (today by default), if it lies in the window the API serves"""
+    today = get_current_ist().date()
+    if day is None:
+        return today
+    first, last = today - timedelta(days=AVAILABILITY_DAYS_BACK), today + timedelta(days=AVAILABILITY_DAYS_AHEAD)
+    if not first <= day <= last:
+        raise HTTPException(status_code=400, detail=f"Date must be between {first.isoformat()} and {last.isoformat()}")
+    return day
+
+@api_router.post("/classrooms/availability", response_model=BatchAvailabilityResponse)
+async def batch_availability(batch: BatchAvailabilityRequest, current_user: dict = Depends(get_current_user)):
+    """Evaluate many (room, range) checks, or a filter x ranges matrix, for one day in a single call"""
+    day = check_availability_day(batch.day)
+    rooms = None
+    if batch.ranges is not None:
+        rooms = room_index.select(room_index.match(
+            floor=batch.floor, room_ids=batch.room_ids, min_capacity=batch.min_capacity, facilities=batch.facilities,
         ))
-    return rooms
+    cells = len(batch.checks or ()) + len(rooms or ()) * len(batch.ranges or ())
+    if cells > BATCH_MAX_CELLS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {cells} checks (limit {BATCH_MAX_CELLS})")
+    spans = [(check.start_hour, check.end_hour) for check in batch.checks or ()] + list(batch.ranges or ())
+    if not all(valid_campus_range(start, end) for start, end in spans):
+        raise HTTPException(status_code=400, detail=CAMPUS_HOURS_MESSAGE)
+
+    index = get_availability_index(day)
+    response = BatchAvailabilityResponse(date=day.isoformat())
+    if batch.checks is not None:
+        response.results = availability_checks(index, batch.checks)
+    if rooms is not None:
+        response.rooms = [room["room_id"] for room in rooms]
+        response.ranges = batch.ranges
+        response.matrix = availability_matrix(index, rooms, batch.ranges)
+    return response
+
+DAY_GRID_MAX_AGE_SECONDS = int(os.environ.get('DAY_GRID_MAX_AGE_SECONDS', '60'))
+
+@api_router.get("/classrooms/day-grid", response_model=DayGridResponse)
+async def get_day_grid(
+    request: Request,
+    day: Optional[date] = Query(None, alias="date"),
+    slot_minutes: int = Query(15, ge=5, le=120),
+    floor: Optional[str] = None,
+    min_capacity: Optional[int] = None,
+    facilities: Optional[List[str]] = Query(None),
+    room_ids: Optional[List[str]] = Query(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Rooms x slots free/occupied matrix for a whole day within campus hours"""
+    day = check_availability_day(day)
+    grid = get_availability_index(day).grid
+    rows = grid.slot_rows(slot_minutes)
+    rooms = room_index.select(room_index.match(floor=floor, room_ids=room_ids, min_capacity=min_capacity, facilities=facilities))
+    slots = grid.slot_starts(slot_minutes)
+    always_free = "1" * len(slots)
+    body = dump_json({
+        "date": day.isoformat(),
+        "slot_minutes": slot_minutes,
+        "slots": slots,
+        "rooms": [room["room_id"] for room in rooms],
+        "matrix": [rows.get(room["room_id"], always_free) for room in rooms],
+    })
+    return conditional_response(request, body, make_etag(catalog_version, body), DAY_GRID_MAX_AGE_SECONDS)
 
 @api_router.get("/classrooms/{room_id}", response_model=RoomAvailability)
-async def get_classroom(room_id: str, current_user: dict = Depends(get_current_user)):
-    current_hour = get_current_hour()
-    room = next((r for r in CLASSROOMS if r["room_id"] == room_id), None)
-    if not room:
+async def get_classroom(room_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    now = get_current_ist()
+    snapshot = get_classroom_snapshot(now)
+    body = snapshot.room_bodies.get(room_id)
+    if body is None:
         raise HTTPException(status_code=404, detail="Room not found")
     
-    status = get_room_status(room["room_id"], current_hour)
-    predictions = get_predicted_availability(room["room_id"], current_hour)
-    return RoomAvailability(
-        room_id=room["room_id"],
-        floor=room["floor"],
-        capacity=room["capacity"],
-        facilities=room["facilities"],
-        map_link=room["map_link"],
-        status=status,
-        predicted_availability=predictions
+    return conditional_response(request, body, snapshot.room_etag(room_id), snapshot.seconds_until_expiry(now))
+
+# ===================== BOOKING ENDPOINTS =====================
+
+def booking_response(room_id: str, day: str, booking: dict) -> Booking:
+    return Booking(room_id=room_id, date=day, **booking)
+
+@api_router.post("/bookings", response_model=Booking, status_code=201)
+async def create_booking(booking_data: BookingCreate, current_user: dict = Depends(get_current_user)):
+    now = get_current_ist()
+    day = booking_data.day or now.date()
+    room_id = booking_data.room_id
+    if room_id not in room_index.by_id:
+        raise HTTPException(status_code=404, detail="Room not found")
+    start_hour, end_hour = round(booking_data.start_hour * 60) / 60, round(booking_data.end_hour * 60) / 60
+    if not valid_campus_range(start_hour, end_hour):
+        raise HTTPException(status_code=400, detail=CAMPUS_HOURS_MESSAGE)
+    if end_hour - start_hour > BOOKING_MAX_HOURS:
+        raise HTTPException(status_code=400, detail=f"Bookings can be at most {BOOKING_MAX_HOURS:g} hours long")
+    if not now.date() <= day <= now.date() + timedelta(days=BOOKING_MAX_DAYS_AHEAD):
+        raise HTTPException(status_code=400, detail=f"Bookings can be made up to {BOOKING_MAX_DAYS_AHEAD} days ahead")
+    if day == now.date() and start_hour < now.hour + now.minute / 60:
+        raise HTTPException(status_code=400, detail="Cannot book a time that has already started")
+
+    # Cheap rejection against the local index (timetable + known bookings) before the atomic commit
+    if not get_availability_index(day).timeline(room_id).is_free(start_hour, end_hour):
+        raise HTTPException(status_code=409, detail="Room is not available for that time")
+    booking = {
+        "id": str(uuid.uuid4()),
+        "start_hour": start_hour,
+        "end_hour": end_hour,
+        "user_id": current_user["id"],
+        "user_name": current_user["name"],
+        "purpose": booking_data.purpose,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if not await commit_booking(room_id, day, booking):
+        raise HTTPException(status_code=409, detail="Room is not available for that time")
+    record_booking(room_id, day, booking)
+    return booking_response(room_id, day.isoformat(), booking)
+
+@api_router.get("/bookings/me", response_model=List[Booking])
+async def get_my_bookings(current_user: dict = Depends(get_current_user)):
+    today = get_current_ist().date().isoformat()
+    documents = await db.room_bookings.find(
+        {"bookings.user_id": current_user["id"], "date": {"$gte": today}}, {"_id": 0}
+    ).to_list(None)
+    bookings = [
+        booking_response(document["room_id"], document["date"], booking)
+        for document in documents
+        for booking in document["bookings"]
+        if booking["user_id"] == current_user["id"]
+    ]
+    return sorted(bookings, key=lambda booking: (booking.date, booking.start_hour))
+
+@api_router.delete("/bookings/{booking_id}")
+async def cancel_booking(booking_id: str, current_user: dict = Depends(get_current_user)):
+    match = {"id": booking_id} if current_user["role"] == "admin" else {"id": booking_id, "user_id": current_user["id"]}
+    document = await db.room_bookings.find_one_and_update(
+        {"bookings": {"$elemMatch": match}},
+        {"$pull": {"bookings": {"id": booking_id}}},
+        projection={"_id": 0, "room_id": 1, "date": 1},
     )
+    if not document:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    forget_booking(document["room_id"], date.fromisoformat(document["date"]), booking_id)
+    return {"message": "Booking cancelled"}
+
+# ===================== FAVORITE ENDPOINTS =====================
+
+@api_router.get("/favorites", response_model=List[str])
+async def get_favorites(current_user: dict = Depends(get_current_user)):
+    user = await get_user_profile(current_user["id"])
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user.get("favorites", [])
+
+async def update_favorites(user_id: str, update: dict) -> List[str]:
+    update["$set"] = {"favorites_updated_at": datetime.now(timezone.utc).isoformat()}
+    user = await db.users.find_one_and_update(
+        {"id": user_id}, update, projection={"_id": 0, "favorites": 1}, return_document=ReturnDocument.AFTER,
+    )
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    invalidate_user(user_id)
+    return user.get("favorites", [])
+
+@api_router.put("/favorites/{room_id}", response_model=List[str])
+async def add_favorite(room_id: str, current_user: dict = Depends(get_current_user)):
+    if room_id not in room_index.by_id:
+        raise HTTPException(status_code=404, detail="Room not found")
+    favorites = await update_favorites(current_user["id"], {"$addToSet": {"favorites": room_id}})
+    transition_scheduler.set_favorites(current_user["id"], favorites)
+    return favorites
+
+@api_router.delete("/favorites/{room_id}", response_model=List[str])
+async def remove_favorite(room_id: str, current_user: dict = Depends(get_current_user)):
+    favorites = await update_favorites(current_user["id"], {"$pull": {"favorites": room_id}})
+    transition_scheduler.set_favorites(current_user["id"], favorites)
+    return favorites
+
+@api_router.get("/notifications", response_model=List[Notification])
+async def get_notifications(after: int = 0, current_user: dict = Depends(get_current_user)):
+    """Status changes of the user's favourite rooms newer than `after` (not available with the webhook sink)"""
+    if not isinstance(notification_sink, MongoSink):
+        raise HTTPException(status_code=404, detail="Notifications are delivered by webhook")
+    return await notification_sink.recent(current_user["id"], after)
+
+# ===================== ADMIN IMPORT ENDPOINTS =====================
+
+def timetable_format(filename: Optional[str], fmt: Optional[str]) -> str:
+    fmt = (fmt or os.path.splitext(filename or "")[1].lstrip(".")).lower()
+    if fmt not in ("csv", "ics"):
+        raise HTTPException(status_code=400, detail="Timetable format must be csv or ics")
+    return fmt
+
+@api_router.post("/admin/timetable/import", response_model=ImportReport)
+async def import_timetable(
+    file: Optional[UploadFile] = File(None),
+    format: Optional[str] = None,
+    source: Optional[Literal["upload", "mongo"]] = None,
+    replace_all: bool = False,
+    current_user: dict = Depends(require_admin),
+):
+    if source == "mongo":
+        report = await import_timetable_mongo(db.timetable, replace_all)
+    elif file is None:
+        raise HTTPException(status_code=400, detail="Upload a timetable file or use source=mongo")
+    else:
+        report = await import_timetable_file(file.file, timetable_format(file.filename, format), replace_all)
+    logger.info(f"Timetable import by {current_user['id']}: {report.accepted} slots, {len(report.changed_rooms)} rooms changed")
+    return report
+
+@api_router.post("/admin/classrooms/import", response_model=CatalogImportReport)
+async def import_classrooms(
+    file: Optional[UploadFile] = File(None),
+    source: Optional[Literal["upload", "mongo"]] = None,
+    current_user: dict = Depends(require_admin),
+):
+    if source == "mongo":
+        records = await db.classrooms.find({}, {"_id": 0}).to_list(None)
+    elif file is None:
+        raise HTTPException(status_code=400, detail="Upload a classroom CSV or use source=mongo")
+    else:
+        records = await asyncio.to_thread(list, read_csv_records(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")))
+    rooms, errors = load_classroom_catalog(records)
+    if not rooms:
+        raise HTTPException(status_code=400, detail={"message": "No valid classrooms in import", "errors": errors})
+    set_classroom_catalog(rooms)
+    logger.info(f"Classroom catalog import by {current_user['id']}: {len(rooms)} rooms")
+    return CatalogImportReport(rooms=len(rooms), rejected=len(records) - len(rooms), errors=errors)
+
+# ===================== LOCAL QUERY PARSER =====================
+
+LOCAL_PARSER_MIN_CONFIDENCE = float(os.environ.get('LOCAL_PARSER_MIN_CONFIDENCE', '1.0'))
+CAMPUS_HOURS_MESSAGE = "Classrooms are available only between 8:00 AM and 6:30 PM. Please select a valid time range."
+
+_FLOOR_WORDS = {"ground": "Ground", "g": "Ground", "0": "Ground", "first": "First", "1st": "First", "1": "First", "second": "Second", "2nd": "Second", "2": "Second"}
+_FACILITY_WORDS = {"projector": "Projector", "speaker": "Speaker", "whiteboard": "Whiteboard", "blackboard": "Blackboard", "podium": "Podium"}
+_NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "half": 0.5}
+_FILLER_WORDS = {
+    "show", "me", "list", "find", "get", "give", "need", "want", "i", "we", "looking", "can", "please", "any", "all",
+    "a", "an", "the", "some", "is", "are", "there", "which", "what", "where", "room", "rooms", "classroom",
+    "classrooms", "class", "classes", "lecture", "hall", "halls", "free", "available", "empty", "vacant",
+    "unoccupied", "on", "in", "at", "with", "and", "having", "has", "have", "that", "for", "of", "to", "from",
+    "floor", "today", "currently", "right", "now", "moment", "seats", "seat",
+}
+_NEGATION_WORDS = {"not", "no", "without", "except", "excluding", "but", "isn't", "aren't", "dont", "don't"}
+_AVAILABILITY_WORDS = {"free", "available", "empty", "vacant", "unoccupied"}
+
+_NUM = r"(\d+(?:\.\d+)?|an?|one|two|three|four|half)"
+_UNIT = r"(hours?|hrs?|minutes?|mins?)"
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?|noon|midday"
+# Times end on a word boundary, so "20 students" cannot backtrack into a "2" that slips past the lookahead
+_RANGE_RE = re.compile(rf"\b(?:from\s+|between\s+)?(?:{_TIME})\b\s*(?:to|till|until|-|and)\s*(?:{_TIME})\b(?!\s*(?:seats?|seater|people|persons|students))")
+_AT_RE = re.compile(rf"\bat\s+(?:{_TIME})\b")
+_UNTIL_RE = re.compile(rf"\b(?:until|till|upto|up to)\s+(?:{_TIME})\b")
+_NEXT_RE = re.compile(rf"\b(?:for\s+|in\s+)?(?:the\s+)?next\s+(?:{_NUM}\s*)?{_UNIT}")
+_FOR_RE = re.compile(rf"\bfor\s+(?:{_NUM}\s*){_UNIT}")
+_NOW_RE = re.compile(r"\b(?:right\s+now|now|currently|at\s+the\s+moment|at\s+present)\b")
+_WHEN_RE = re.compile(r"\b(?:when(?:\s+(?:is|are|will|can|does|do))?(?:\s+the)?(?:\s+next\s+time)?|earliest(?:\s+time)?|next\s+(?:free|available|empty)\s+(?:slot|window|time))\b")
+_CAPACITY_RE = re.compile(r"\b(?:(at\s+least|minimum(?:\s+of)?|min|more\s+than|over|above)\s+)?(\d+)\s*\+?\s*(?:-\s*)?(?:seats?|seater|people|persons|students)\b|\bcapacity\s+(?:of\s+)?(?:(at\s+least|more\s+than|over|above)\s+)?(\d+)\b")
+_ROOM_CODE_RE = re.compile(r"\b(l[th])\s*-?\s*(\d+)\b|\b(\d{3})\b")
+_FLOOR_RE = re.compile(r"\b(ground|first|second|1st|2nd)[\s-]+floor\b|\bfloor\s+(g|0|1|2)\b")
+_FACILITY_RE = re.compile(r"\b(projector|speaker|white\s*board|black\s*board|podium)s?\b")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+def _room_key(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+def _clock_hour(hour: Optional[str], minute: Optional[str], meridiem: Optional[str], noon: bool = False) -> Optional[float]:
+    """Convert a clock reading to a decimal hour, assuming campus hours when am/pm is missing"""
+    if noon:
+        return 12.0
+    h, m = int(hour), int(minute or 0)
+    if (meridiem and h > 12) or h > 23 or m > 59:
+        return None
+    if meridiem == "pm" and h < 12:
+        h += 12
+    elif meridiem == "am" and h == 12:
+        h = 0
+    elif meridiem is None and 1 <= h <= 7:
+        h += 12
+    return h + m / 60
+
+def _match_clock(groups, offset: int, meridiem: Optional[str] = None) -> Optional[float]:
+    hour, minute, own_meridiem = groups[offset:offset + 3]
+    return _clock_hour(hour, minute, own_meridiem or meridiem, noon=hour is None)
+
+def _duration_hours(amount: Optional[str], unit: str) -> float:
+    value = _NUMBER_WORDS[amount] if amount in _NUMBER_WORDS else float(amount or 1)
+    return value / 60 if unit.startswith("m") else value
+
+def parse_query_locally(text: str, current_hour: float) -> Tuple[Optional[dict], float]:
+    """Rule-based interpretation of common queries into the same JSON shape SYSTEM_PROMPT asks the LLM for.
+
+    Returns the parsed result and a confidence in [0, 1]: the share of query words the
+    rules accounted for. Anything the rules cannot fully explain should go to the LLM.
+    """
+    normalized = text.lower().replace("a.m.", "am").replace("p.m.", "pm")
+    total_words = len(_WORD_RE.findall(normalized))
+    if not total_words or _NEGATION_WORDS & set(_WORD_RE.findall(normalized)):
+        return None, 0.0
+
+    filters: Dict[str, Any] = {"floor": None, "min_capacity": None, "facilities": None, "room_ids": None, "start_hour": None, "end_hour": None}
+    time_context = None
+    rest = normalized
+
+    def consume(pattern):
+        nonlocal rest
+        match = pattern.search(rest)
+        if match:
+            rest = rest[:match.start()] + " " + rest[match.end():]
+        return match
+
+    when_match = consume(_WHEN_RE)
+    duration = None
+    match = consume(_NEXT_RE) or consume(_FOR_RE)
+    if match:
+        duration = _duration_hours(match.group(1), match.group(2))
+    if when_match:
+        # "When is ... free for 2 hours": an earliest-window lookup, not a fixed range
+        if consume(_RANGE_RE) or consume(_AT_RE) or consume(_UNTIL_RE):
+            return None, 0.0
+        filters["duration_hours"] = duration or 1
+        duration = None
+
+    start_hour = end_hour = None
+    range_match = consume(_RANGE_RE)
+    at_match = None if range_match else consume(_AT_RE)
+    until_match = None if range_match or at_match else consume(_UNTIL_RE)
+    if range_match:
+        if duration:
+            return None, 0.0
+        groups = range_match.groups()
+        start_hour, end_hour = _match_clock(groups, 0), _match_clock(groups, 3)
+        if groups[0] is not None and groups[2] is None and groups[5] is not None:
+            # "2 to 4 pm": borrow the second meridiem unless that would put the start after the end.
+            borrowed = _match_clock(groups, 0, groups[5])
+            if borrowed is not None and end_hour is not None and borrowed < end_hour:
+                start_hour = borrowed
+        time_context = "specific"
+    elif at_match:
+        start_hour = _match_clock(at_match.groups(), 0)
+        if start_hour is not None:
+            end_hour = start_hour + duration if duration else min(start_hour + 1, CAMPUS_CLOSE_HOUR)
+        time_context = "specific"
+    elif until_match:
+        start_hour, end_hour = current_hour, _match_clock(until_match.groups(), 0)
+        time_context = "specific"
+    elif duration:
+        start_hour, end_hour = current_hour, current_hour + duration
+        time_context = "now"
+    if time_context and (start_hour is None or end_hour is None):
+        return None, 0.0
+
+    while True:
+        match = consume(_CAPACITY_RE)
+        if not match:
+            break
+        qualifier, amount = (match.group(1), match.group(2)) if match.group(2) else (match.group(3), match.group(4))
+        capacity = int(amount) + (1 if qualifier and qualifier.split()[0] in ("more", "over", "above") else 0)
+        filters["min_capacity"] = max(filters["min_capacity"] or 0, capacity)
+
+    room_ids = []
+    catalog_keys = {_room_key(room["room_id"]): room["room_id"] for room in CLASSROOMS}
+    for match in list(_ROOM_CODE_RE.finditer(rest)):
+        key = match.group(1) + match.group(2) if match.group(1) else match.group(3)
+        if key in catalog_keys:
+            room_ids.append(catalog_keys[key])
+            rest = rest.replace(match.group(0), " ", 1)
+    if room_ids:
+        filters["room_ids"] = room_ids
+
+    while True:
+        match = consume(_FLOOR_RE)
+        if not match:
+            break
+        floor = _FLOOR_WORDS[match.group(1) or match.group(2)]
+        if filters["floor"] and filters["floor"] != floor:
+            return None, 0.0
+        filters["floor"] = floor
+
+    facilities = []
+    while True:
+        match = consume(_FACILITY_RE)
+        if not match:
+            break
+        facility = _FACILITY_WORDS[match.group(1).replace(" ", "")]
+        if facility not in facilities:
+            facilities.append(facility)
+    if facilities:
+        filters["facilities"] = facilities
+
+    if consume(_NOW_RE) and time_context is None:
+        time_context = "now"
+    leftover = [word for word in _WORD_RE.findall(rest) if word not in _FILLER_WORDS]
+    if time_context is None and _AVAILABILITY_WORDS & set(_WORD_RE.findall(normalized)):
+        time_context = "now"
+    confidence = 1 - len(leftover) / total_words
+
+    if when_match:
+        return {"action": "find_window", "filters": filters, "message": "", "time_context": None}, confidence
+    if time_context == "now" and start_hour is None and not (CAMPUS_OPEN_HOUR <= current_hour < CAMPUS_CLOSE_HOUR):
+        return {"action": "error", "filters": filters, "message": CAMPUS_HOURS_MESSAGE, "time_context": "now"}, confidence
+    if start_hour is not None:
+        if start_hour < CAMPUS_OPEN_HOUR or end_hour > CAMPUS_CLOSE_HOUR or end_hour <= start_hour:
+            return {"action": "error", "filters": filters, "message": CAMPUS_HOURS_MESSAGE, "time_context": time_context}, confidence
+        filters["start_hour"], filters["end_hour"] = start_hour, end_hour
+
+    return {"action": "search", "filters": filters, "message": "", "time_context": time_context}, confidence
+
+# ===================== LLM INTERPRETATION CACHE =====================
+
+LLM_CACHE_SIZE = int(os.environ.get('LLM_CACHE_SIZE', '512'))
+LLM_CACHE_TTL_SECONDS = float(os.environ.get('LLM_CACHE_TTL_SECONDS', '3600'))
+LLM_CACHE_BUCKET_MINUTES = int(os.environ.get('LLM_CACHE_BUCKET_MINUTES', '15'))
+
+# Queries whose interpretation depends on the clock (the LLM fills in the current time for these).
+_RELATIVE_TIME_RE = re.compile(r"\b(now|next|current|currently|right|soon|moment|until|till|upto|later|today|free|available|empty|vacant)\b")
+
+class InterpretationCache:
+    """LRU cache with TTL for parsed LLM interpretations, with hit/miss counters"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, Optional[int]]) -> Optional[dict]:
+        parsed = self._entries.get(key)
+        if parsed is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return parsed
+
+    def put(self, key: Tuple[str, Optional[int]], parsed: dict):
+        self._entries[key] = parsed
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+interpretation_cache = InterpretationCache(LLM_CACHE_SIZE, LLM_CACHE_TTL_SECONDS)
+
+def normalize_query(text: str) -> str:
+    return " ".join(re.sub(r"[^\w:\-\s]", " ", text.lower()).split())
+
+def interpretation_cache_key(text: str, current_hour: float) -> Tuple[str, Optional[int]]:
+    """Normalized query text, plus a coarse time bucket when the query is relative to now"""
+    normalized = normalize_query(text)
+    bucket = None
+    if _RELATIVE_TIME_RE.search(normalized):
+        bucket = int(current_hour * 60) // LLM_CACHE_BUCKET_MINUTES
+    return normalized, bucket
+
+# ===================== LLM CALL GUARDS =====================
+
+LLM_TIMEOUT_SECONDS = float(os.environ.get('LLM_TIMEOUT_SECONDS', '8'))
+LLM_SLOW_CALL_SECONDS = float(os.environ.get('LLM_SLOW_CALL_SECONDS', '5'))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_RESET_SECONDS = float(os.environ.get('LLM_BREAKER_RESET_SECONDS', '30'))
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through once the cooldown passes"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+llm_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+_llm_inflight: Dict[Tuple[str, Optional[int]], asyncio.Future] = {}
+
+async def _interpret_guarded(query_text: str, current_hour: float, cache_key: Tuple[str, Optional[int]]) -> Optional[dict]:
+    """One LLM interpretation under the latency budget; None means use the local fallback"""
+    if not llm_breaker.allow():
+        return None
+    try:
+        # A cold SDK import is not provider latency, so it stays outside the budget.
+        await load_llm_client()
+    except Exception as e:
+        # Anything the import raises, not just ImportError: a 500 here would also strand a half-open trial.
+        logger.error(f"LLM SDK unavailable: {e!r}")
+        llm_breaker.record_failure()
+        return None
+    started = time.monotonic()
+    try:
+        parsed = await asyncio.wait_for(interpret_with_llm(query_text, current_hour), LLM_TIMEOUT_SECONDS)
+    except json.JSONDecodeError:
+        # The provider answered, just not with JSON; that is not an availability problem.
+        llm_breaker.record_success()
+        raise
+    except asyncio.TimeoutError:
+        logger.warning(f"LLM call exceeded {LLM_TIMEOUT_SECONDS}s budget")
+        llm_breaker.record_failure()
+        return None
+    except Exception as e:
+        logger.error(f"LLM call failed: {e}")
+        llm_breaker.record_failure()
+        return None
+    if time.monotonic() - started > LLM_SLOW_CALL_SECONDS:
+        llm_breaker.record_failure()
+    else:
+        llm_breaker.record_success()
+    # Errors mostly reflect the clock (outside campus hours), so they are not reused.
+    if parsed.get("action") != "error":
+        interpretation_cache.put(cache_key, parsed)
+    return parsed
+
+async def interpret_coalesced(query_text: str, current_hour: float, cache_key: Tuple[str, Optional[int]]) -> Optional[dict]:
+    """Share a single in-flight LLM call between concurrent identical queries"""
+    task = _llm_inflight.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_interpret_guarded(query_text, current_hour, cache_key))
+        _llm_inflight[cache_key] = task
+
+        def release(done: asyncio.Future):
+            _llm_inflight.pop(cache_key, None)
+            if not done.cancelled():
+                done.exception()  # marks the exception retrieved even if every waiter went away
+
+        task.add_done_callback(release)
+    # Shielded so one client disconnecting does not cancel the call for everyone else.
+    return await asyncio.shield(task)
 
 # ===================== SEARCH ENDPOINT =====================
 
@@ -327,14 +3078,15 @@ CURRENT TIME INFO will be provided in the query.
 
 RESPONSE FORMAT (always return valid JSON):
 {
-  "action": "search" | "error" | "clarify",
+  "action": "search" | "find_window" | "error" | "clarify",
   "filters": {
     "floor": "Ground" | "First" | "Second" | null,
     "min_capacity": number | null,
     "facilities": ["Projector", "Speaker", etc] | null,
     "room_ids": ["LT-1", etc] | null,
     "start_hour": number (8-18.5) | null,
-    "end_hour": number (8-18.5) | null
+    "end_hour": number (8-18.5) | null,
+    "duration_hours": number | null
   },
   "message": "string (for errors or clarifications)",
   "time_context": "now" | "specific" | null
@@ -346,121 +3098,183 @@ RULES:
 3. Parse relative times: "next 2 hours" = 2 hour duration from now.
 4. For specific times like "10:00 AM to 12:30 PM", convert to start_hour=10, end_hour=12.5.
 5. If query is ambiguous, return action="clarify" with a helpful question.
-6. Always respond with valid JSON only, no extra text."""
+6. For "when is the next time ... free for 2 hours" style questions, return action="find_window" with duration_hours=2 (default 1) and no start/end hour.
+7. Always respond with valid JSON only, no extra text."""
 
-@api_router.post("/search", response_model=SearchResponse)
-async def search_classrooms(query: SearchQuery, current_user: dict = Depends(get_current_user)):
-    current_hour = get_current_hour()
+async def load_llm_client():
+    """Import the LLM SDK on first use, in a worker thread so the event loop keeps serving"""
+    global LlmChat, UserMessage
+    if LlmChat is None or UserMessage is None:
+        with stage_seconds.time("llm_import"):
+            module = await asyncio.to_thread(importlib.import_module, "emergentintegrations.llm.chat")
+        LlmChat, UserMessage = module.LlmChat, module.UserMessage
+
+async def interpret_with_llm(query_text: str, current_hour: float) -> dict:
+    """Ask the LLM to turn a query into the SYSTEM_PROMPT JSON structure"""
+    await load_llm_client()
     current_time_str = f"{int(current_hour)}:{int((current_hour % 1) * 60):02d}"
     
     # Prepare context for LLM
-    user_query = f"Current time: {current_time_str} (hour: {current_hour:.2f})\nUser query: {query.query}"
+    user_query = f"Current time: {current_time_str} (hour: {current_hour:.2f})\nUser query: {query_text}"
     
-    try:
+    with stage_seconds.time("llm_client_init"):
         chat = LlmChat(
             api_key=EMERGENT_LLM_KEY,
             session_id=f"search_{uuid.uuid4()}",
             system_message=SYSTEM_PROMPT
         ).with_model("gemini", "gemini-3-flash-preview")
-        
+    
+    with stage_seconds.time("llm_call"):
         response = await chat.send_message(UserMessage(text=user_query))
+    
+    try:
+        with stage_seconds.time("llm_json_parse"):
+            # Parse LLM response
+            response_text = response.strip()
+            if response_text.startswith("```json"):
+                response_text = response_text[7:]
+            if response_text.startswith("```"):
+                response_text = response_text[3:]
+            if response_text.endswith("```"):
+                response_text = response_text[:-3]
+            parsed = json.loads(response_text.strip())
+            # Valid JSON of the wrong shape is as unusable as invalid JSON; callers fall back on both.
+            if not isinstance(parsed, dict) or not isinstance(parsed.get("filters") or {}, dict):
+                raise json.JSONDecodeError("Expected a JSON object with an object of filters", response_text, 0)
+            return parsed
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parse error: {e}, response: {response}")
+        raise
+
+def search_response(message: Optional[str] = None, rooms: Optional[List[bytes]] = None, clarification_needed: Optional[str] = None) -> Response:
+    """SearchResponse JSON with pre-encoded room fragments spliced in"""
+    body = b'{"message":' + dump_json(None if message is None else str(message))
+    body += b',"rooms":' + (b"null" if rooms is None else json_array(rooms))
+    body += b',"clarification_needed":' + dump_json(None if clarification_needed is None else str(clarification_needed)) + b"}"
+    return Response(content=body, media_type="application/json")
+
+def build_search_response(parsed: dict, current_hour: float, view: Optional[RoomView] = None) -> Response:
+    """Apply an interpreted query to the room catalog"""
+    action = parsed.get("action", "search")
+    
+    if action == "error":
+        return search_response(message=parsed.get("message", "Invalid request"))
+    
+    if action == "clarify":
+        return search_response(clarification_needed=parsed.get("message", "Could you please clarify your request?"))
+    
+    # Apply filters
+    filters = parsed.get("filters") or {}
+    index = room_index
+    with stage_seconds.time("room_filter"):
+        filtered_rooms = index.select(index.match(
+            floor=filters.get("floor"),
+            room_ids=filters.get("room_ids"),
+            min_capacity=filters.get("min_capacity"),
+            facilities=filters.get("facilities"),
+        ))
+    
+    if action == "find_window":
+        return free_window_search_response(filtered_rooms, filters.get("duration_hours") or 1, current_hour, view)
+    
+    # Filter by time availability
+    start_hour = filters.get("start_hour")
+    end_hour = filters.get("end_hour")
+    time_context = parsed.get("time_context", "now")
+    
+    if time_context == "now" and not start_hour:
+        start_hour = current_hour
+        end_hour = min(current_hour + 1, CAMPUS_CLOSE_HOUR)
+    
+    if start_hour is not None and end_hour is not None:
+        # Validate time range
+        if start_hour < CAMPUS_OPEN_HOUR or end_hour > CAMPUS_CLOSE_HOUR:
+            return search_response(message=CAMPUS_HOURS_MESSAGE)
         
-        # Parse LLM response
-        import json
-        response_text = response.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        
-        parsed = json.loads(response_text.strip())
-        
-        action = parsed.get("action", "search")
-        
-        if action == "error":
-            return SearchResponse(message=parsed.get("message", "Invalid request"))
-        
-        if action == "clarify":
-            return SearchResponse(clarification_needed=parsed.get("message", "Could you please clarify your request?"))
-        
-        # Apply filters
-        filters = parsed.get("filters", {})
-        filtered_rooms = CLASSROOMS.copy()
-        
-        # Filter by floor
-        if filters.get("floor"):
-            filtered_rooms = [r for r in filtered_rooms if r["floor"] == filters["floor"]]
-        
-        # Filter by room IDs
-        if filters.get("room_ids"):
-            filtered_rooms = [r for r in filtered_rooms if r["room_id"] in filters["room_ids"]]
-        
-        # Filter by capacity
-        if filters.get("min_capacity"):
-            filtered_rooms = [r for r in filtered_rooms if r["capacity"] >= filters["min_capacity"]]
-        
-        # Filter by facilities
-        if filters.get("facilities"):
-            required = set(filters["facilities"])
-            filtered_rooms = [r for r in filtered_rooms if required.issubset(set(r["facilities"]))]
-        
-        # Filter by time availability
-        start_hour = filters.get("start_hour")
-        end_hour = filters.get("end_hour")
-        time_context = parsed.get("time_context", "now")
-        
-        if time_context == "now" and not start_hour:
-            start_hour = current_hour
-            end_hour = min(current_hour + 1, 18.5)
-        
-        if start_hour is not None and end_hour is not None:
-            # Validate time range
-            if start_hour < 8 or end_hour > 18.5:
-                return SearchResponse(message="Classrooms are available only between 8:00 AM and 6:30 PM. Please select a valid time range.")
-            
+        with stage_seconds.time("availability_filter"):
             filtered_rooms = [r for r in filtered_rooms if is_room_available(r["room_id"], start_hour, end_hour)]
-        
-        # Build response with availability info
+    
+    # Build response with availability info
+    with stage_seconds.time("search_response_build"):
         result_rooms = []
         for room in filtered_rooms:
             check_hour = start_hour if start_hour else current_hour
             status = get_room_status(room["room_id"], check_hour)
             predictions = get_predicted_availability(room["room_id"], check_hour)
-            result_rooms.append(RoomAvailability(
-                room_id=room["room_id"],
-                floor=room["floor"],
-                capacity=room["capacity"],
-                facilities=room["facilities"],
-                map_link=room["map_link"],
-                status="Available" if is_room_available(room["room_id"], start_hour or current_hour, end_hour or min(current_hour + 1, 18.5)) else status,
-                predicted_availability=predictions
-            ))
+            if is_room_available(room["room_id"], start_hour or current_hour, end_hour or min(current_hour + 1, CAMPUS_CLOSE_HOUR)):
+                status = "Available"
+            result_rooms.append(encode_room_view(room, status, predictions, view))
         
         if not result_rooms:
-            return SearchResponse(message="No classrooms available matching your criteria.", rooms=[])
+            return search_response(message="No classrooms available matching your criteria.", rooms=[])
         
-        return SearchResponse(rooms=result_rooms)
+        return search_response(rooms=result_rooms)
+
+def free_window_search_response(rooms: List[dict], duration: float, current_hour: float, view: Optional[RoomView] = None) -> Response:
+    """Answer "when is a room free for N hours" with the earliest windows, described in the message"""
+    if not 0 < duration <= CAMPUS_CLOSE_HOUR - CAMPUS_OPEN_HOUR:
+        return search_response(message=CAMPUS_HOURS_MESSAGE)
+    today = get_current_ist().date()
+    windows = find_free_windows(rooms, duration, today, current_hour, FREE_WINDOW_RESULTS)
+    if not windows:
+        return search_response(message=f"No classroom matching your criteria is free for {duration:g} hours in the next {FREE_WINDOW_SEARCH_DAYS} days.", rooms=[])
+    descriptions, result_rooms, seen = [], [], set()
+    for room, day, start, end in windows:
+        when = "today" if day == today else "tomorrow" if day == today + timedelta(days=1) else day.strftime("%a %d %b")
+        descriptions.append(f"{room['room_id']} {when} from {format_hour(start)} to {format_hour(end)}")
+        if room["room_id"] not in seen:
+            seen.add(room["room_id"])
+            result_rooms.append(encode_room_at(room, current_hour, view))
+    return search_response(message=f"Earliest free windows of {duration:g}h: " + "; ".join(descriptions) + ".", rooms=result_rooms)
+
+def fallback_search_response(current_hour: float, view: Optional[RoomView] = None) -> Response:
+    """Return all currently available rooms when a query cannot be interpreted"""
+    result_rooms = [
+        encode_room_at(room, current_hour, view)
+        for room in CLASSROOMS
+        if get_room_status(room["room_id"], current_hour) == "Available"
+    ]
+    return search_response(rooms=result_rooms, message="Here are the currently available classrooms.")
+
+@api_router.post("/search", response_model=SearchResponse)
+async def search_classrooms(
+    query: SearchQuery,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated RoomAvailability fields to include"),
+    compact: bool = Query(False, description="Facilities as a bitmask and map links as catalog positions"),
+    current_user: dict = Depends(get_current_user),
+):
+    view = parse_room_view(fields, compact)
+    headers = room_view_headers(view)
+    current_hour = get_current_hour()
+    annotate_trace("query", redact_query(query.query))
+    
+    try:
+        # Common phrasings are answered by the local parser; only low-confidence queries reach the LLM.
+        parsed, confidence = parse_query_locally(query.query, current_hour)
+        source = "local"
+        if parsed is None or confidence < LOCAL_PARSER_MIN_CONFIDENCE:
+            cache_key = interpretation_cache_key(query.query, current_hour)
+            parsed = interpretation_cache.get(cache_key)
+            source = "cache"
+            if parsed is None:
+                parsed = await interpret_coalesced(query.query, current_hour, cache_key)
+                source = "llm"
+                if parsed is None:
+                    # LLM slow, failing or circuit open
+                    search_interpretations.inc("fallback")
+                    annotate_trace("interpretation", "fallback")
+                    return compress_response(request, fallback_search_response(current_hour, view), headers)
+        search_interpretations.inc(source)
+        annotate_trace("interpretation", source)
         
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parse error: {e}, response: {response}")
+        return compress_response(request, build_search_response(parsed, current_hour, view), headers)
+        
+    except json.JSONDecodeError:
         # Fallback: return all available rooms
-        result_rooms = []
-        for room in CLASSROOMS:
-            status = get_room_status(room["room_id"], current_hour)
-            if status == "Available":
-                predictions = get_predicted_availability(room["room_id"], current_hour)
-                result_rooms.append(RoomAvailability(
-                    room_id=room["room_id"],
-                    floor=room["floor"],
-                    capacity=room["capacity"],
-                    facilities=room["facilities"],
-                    map_link=room["map_link"],
-                    status=status,
-                    predicted_availability=predictions
-                ))
-        return SearchResponse(rooms=result_rooms, message="Here are the currently available classrooms.")
+        search_interpretations.inc("fallback")
+        annotate_trace("interpretation", "fallback")
+        return compress_response(request, fallback_search_response(current_hour, view), headers)
         
     except Exception as e:
         logger.error(f"Search error: {e}")
@@ -472,21 +3286,172 @@ async def search_classrooms(query: SearchQuery, current_user: dict = Depends(get
 async def root():
     return {"message": "Empty Classroom Finder API - IIPS DAVV"}
 
+@api_router.get("/health/live")
+async def liveness():
+    """The process is up and its event loop answers; says nothing about the database"""
+    return {"status": "alive"}
+
 @api_router.get("/health")
+@api_router.get("/health/ready")
 async def health():
+    if not app.state.db_ready:
+        return JSONResponse(status_code=503, content={"status": "starting", "campus_hours": "8:00 AM - 6:30 PM"})
     return {"status": "healthy", "campus_hours": "8:00 AM - 6:30 PM"}
 
+def cache_samples() -> Iterator[Tuple[tuple, float]]:
+    for name, cache in (("user", user_cache), ("llm_interpretation", interpretation_cache)):
+        lookups = cache.hits + cache.misses
+        yield (name,), cache.hits / lookups if lookups else 0.0
+
+metrics_registry.extend([
+    CallbackMetric("cache_hits_total", "Cache hits", "counter", ("cache",),
+                   lambda: [(("user",), user_cache.hits), (("llm_interpretation",), interpretation_cache.hits)]),
+    CallbackMetric("cache_misses_total", "Cache misses", "counter", ("cache",),
+                   lambda: [(("user",), user_cache.misses), (("llm_interpretation",), interpretation_cache.misses)]),
+    CallbackMetric("cache_hit_ratio", "Cache hit ratio since start", "gauge", ("cache",), cache_samples),
+    CallbackMetric("llm_inflight_calls", "Distinct LLM calls currently in flight", "gauge", (),
+                   lambda: [((), len(_llm_inflight))]),
+    CallbackMetric("llm_circuit_open", "1 while the LLM circuit breaker is open", "gauge", (),
+                   lambda: [((), int(llm_breaker.state == "open"))]),
+    CallbackMetric("bcrypt_pending", "bcrypt calls running or queued", "gauge", (),
+                   lambda: [((), _bcrypt_pending)]),
+    CallbackMetric("room_status_subscribers", "Open room status streams", "gauge", (),
+                   lambda: [((), len(room_status_stream.subscribers))]),
+    CallbackMetric("shared_snapshot_generation", "Shared snapshot generation this worker serves (0 when not shared)", "gauge", (),
+                   lambda: [((), shared_snapshot.generation if shared_snapshot else 0)]),
+])
+
+@api_router.get("/metrics")
+async def metrics():
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/admin/slow-requests")
+async def get_slow_requests(current_user: dict = Depends(require_admin)):
+    """Most recent requests slower than SLOW_REQUEST_SECONDS, newest first (spans for sampled ones only)"""
+    return list(reversed(slow_requests))
+
 # Include router and middleware
 app.include_router(api_router)
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "X-Room-Catalog"],
 )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+TIMETABLE_SOURCE = os.environ.get('TIMETABLE_SOURCE', '')
+CLASSROOMS_SOURCE = os.environ.get('CLASSROOMS_SOURCE', '')
+
+async def load_configured_sources():
+    """Load the catalog and timetable named by CLASSROOMS_SOURCE / TIMETABLE_SOURCE (a file path or "mongo")"""
+    if CLASSROOMS_SOURCE:
+        if CLASSROOMS_SOURCE == "mongo":
+            records = await db.classrooms.find({}, {"_id": 0}).to_list(None)
+        else:
+            with open(CLASSROOMS_SOURCE, encoding="utf-8-sig", newline="") as f:
+                records = list(read_csv_records(f))
+        rooms, errors = load_classroom_catalog(records)
+        if rooms:
+            set_classroom_catalog(rooms)
+        logger.info(f"Loaded {len(rooms)} classrooms from {CLASSROOMS_SOURCE} ({len(errors)} errors)")
+    if TIMETABLE_SOURCE:
+        if TIMETABLE_SOURCE == "mongo":
+            report = await import_timetable_mongo(db.timetable, replace_all=True)
+        else:
+            with open(TIMETABLE_SOURCE, "rb") as f:
+                report = await import_timetable_file(f, timetable_format(TIMETABLE_SOURCE, None), replace_all=True)
+        logger.info(f"Loaded timetable from {TIMETABLE_SOURCE}: {report.accepted} slots, {report.rejected} rejected in {report.seconds}s")
+
+async def prepare_database():
+    """Ensure indexes and warm the connection pool, retrying until MongoDB is reachable"""
+    while True:
+        try:
+            await asyncio.gather(
+                db.users.create_index("email", unique=True),
+                db.users.create_index("id", unique=True),
+                db.room_bookings.create_index([("room_id", 1), ("date", 1)], unique=True),
+                db.room_bookings.create_index("bookings.user_id"),
+                db.users.create_index("favorites_updated_at", sparse=True),
+                db.notifications.create_index([("user_ids", 1), ("id", -1)]),
+                db.notifications.create_index("expires_at", expireAfterSeconds=0),
+                db.revoked_tokens.create_index("jti", unique=True),
+                db.revoked_tokens.create_index("revoked_at"),
+                db.revoked_tokens.create_index("expires_at", expireAfterSeconds=0),
+            )
+            await asyncio.gather(*(db.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)))
+            logger.info("Database indexes ensured and connection pool warmed")
+            break
+        except Exception as e:
+            logger.error(f"Database preparation failed, retrying: {e}")
+            await asyncio.sleep(5)
+    try:
+        await load_configured_sources()
+    except Exception as e:
+        logger.error(f"Loading configured timetable/classroom sources failed: {e}")
+    try:
+        logger.info(f"Loaded bookings for {await sync_bookings()} room-days")
+    except Exception as e:
+        logger.error(f"Loading bookings failed: {e}")
+    try:
+        logger.info(f"Loaded {await sync_revocations()} revoked tokens")
+    except Exception as e:
+        logger.error(f"Loading token revocations failed: {e}")
+    app.state.revocation_sync = asyncio.create_task(sync_revocations_periodically())
+    if NOTIFICATIONS_ENABLED:
+        app.state.transition_scheduler = asyncio.create_task(run_transition_scheduler())
+    if BOOKING_SYNC_SECONDS > 0:
+        app.state.booking_sync = asyncio.create_task(sync_bookings_periodically())
+    app.state.db_ready = True
+
+def build_indexes():
+    """Compile the attribute index, today's availability index and the first classroom snapshot"""
+    set_classroom_catalog(CLASSROOMS)
+    if not timetable_store:
+        # The built-in timetable, until TIMETABLE_SOURCE replaces it
+        timetable_store.update({room_id: schedule_every_day(slots) for room_id, slots in MOCK_SCHEDULE.items()})
+    _indexes_by_date.clear()
+    get_classroom_snapshot()
+
+async def start_services(app: FastAPI):
+    """Lifespan startup: in-memory indexes first, then the database and background tasks"""
+    started = time.perf_counter()
+    build_indexes()
+    # A stand-in database may already be installed (load tests)
+    if db is None:
+        connect_database()
+    app.state.db_ready = False
+    app.state.booking_sync = None
+    app.state.transition_scheduler = None
+    app.state.revocation_sync = None
+    app.state.shared_snapshot_sync = None
+    if SHARED_SNAPSHOT_PATH:
+        # Workers started after the first one serve the published generation from their first request
+        forget_shared_changes()
+        existing = map_shared_snapshot(None)
+        if existing is not None:
+            adopt_shared_snapshot(existing)
+        app.state.shared_snapshot_sync = asyncio.create_task(sync_shared_snapshot())
+    app.state.db_preparation = asyncio.create_task(prepare_database())
+    app.state.snapshot_refresher = asyncio.create_task(refresh_classroom_snapshots())
+    logger.info(f"Startup finished in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+async def stop_services(app: FastAPI):
+    app.state.snapshot_refresher.cancel()
+    app.state.db_preparation.cancel()
+    if app.state.booking_sync:
+        app.state.booking_sync.cancel()
+    if app.state.transition_scheduler:
+        app.state.transition_scheduler.cancel()
+    if app.state.revocation_sync:
+        app.state.revocation_sync.cancel()
+    if app.state.shared_snapshot_sync:
+        app.state.shared_snapshot_sync.cancel()
+    await notification_sink.close()
+    bcrypt_pool.shutdown(wait=False)
+    if client is not None:
+        client.close()
@@ -0,0 +1,100 @@
+"""Booking contention benchmark.
+
+Many users race to book the same free slots of one room against a live backend
+(e.g. `uvicorn server:app --port 8001`). Checks that every slot is won exactly
+once and that the stored bookings never overlap, and reports booking throughput
+and latency.
+
+    python benchmarks/booking_contention.py --base-url http://localhost:8001/api --users 100 --slots 4
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+import httpx
+
+from login_burst import summarize
+
+
+async def register_users(client, count):
+    tokens = []
+    for i in range(count):
+        email = f"booker_{uuid.uuid4().hex[:8]}_{i}@iips.edu.in"
+        response = await client.post("/auth/register", json={"name": f"Booker {i}", "email": email, "password": "BenchPass123!"})
+        response.raise_for_status()
+        tokens.append(response.json()["token"])
+    return tokens
+
+
+async def free_slots(client, token, room_id, day, count, slot_minutes):
+    """First `count` fully free slots of the room on the given day, from the day grid"""
+    response = await client.get("/classrooms/day-grid", params={"date": day, "room_ids": room_id, "slot_minutes": slot_minutes},
+                                headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    grid = response.json()
+    row = grid["matrix"][0]
+    slots = [(start, start + slot_minutes / 60) for start, cell in zip(grid["slots"], row) if cell == "1"]
+    return slots[:count]
+
+
+async def book(client, token, room_id, day, slot, start_gate, results):
+    await start_gate.wait()
+    started = time.perf_counter()
+    response = await client.post("/bookings", json={"room_id": room_id, "date": day, "start_hour": slot[0], "end_hour": slot[1],
+                                                    "purpose": "contention benchmark"},
+                                 headers={"Authorization": f"Bearer {token}"})
+    results.append((slot, response.status_code, time.perf_counter() - started, token if response.status_code == 201 else None,
+                    response.json() if response.status_code == 201 else None))
+
+
+async def main(args):
+    day = (date.today() + timedelta(days=1)).isoformat()
+    limits = httpx.Limits(max_connections=args.users + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        print(f"🔍 Registering {args.users} benchmark users...")
+        tokens = await register_users(client, args.users)
+
+        slots = await free_slots(client, tokens[0], args.room, day, args.slots, args.slot_minutes)
+        if not slots:
+            print(f"❌ {args.room} has no free {args.slot_minutes}-minute slots on {day}")
+            return
+        print(f"🔍 {args.users} users racing for {len(slots)} slot(s) of {args.room} on {day}...")
+        results, start_gate = [], asyncio.Event()
+        tasks = [
+            asyncio.create_task(book(client, token, args.room, day, slots[i % len(slots)], start_gate, results))
+            for i, token in enumerate(tokens)
+        ]
+        started = time.perf_counter()
+        start_gate.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        winners = [(token, booking) for _, code, _, token, booking in results if code == 201]
+        codes = Counter(code for _, code, _, _, _ in results)
+        wins_per_slot = Counter(slot for slot, code, _, _, _ in results if code == 201)
+        spans = sorted((booking["start_hour"], booking["end_hour"]) for _, booking in winners)
+        overlapping = any(end > next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+        print("\n📊 Results")
+        print(f"   requests: {len(results)} in {elapsed:.2f}s -> {len(results) / elapsed:.1f} bookings attempted/s")
+        print(f"   status codes: {dict(codes)}")
+        summarize("booking latency", [latency for _, _, latency, _, _ in results])
+        correct = all(wins_per_slot[slot] == 1 for slot in slots) and not overlapping and codes[201] == len(slots)
+        print(f"   {'✅' if correct else '❌'} {len(winners)} winner(s) for {len(slots)} slot(s), overlapping bookings: {overlapping}")
+
+        print("🔍 Cancelling benchmark bookings...")
+        for token, booking in winners:
+            await client.delete(f"/bookings/{booking['id']}", headers={"Authorization": f"Bearer {token}"})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--room", default="LT-1")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--slots", type=int, default=1)
+    parser.add_argument("--slot-minutes", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
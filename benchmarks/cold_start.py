@@ -0,0 +1,159 @@
+"""Cold start benchmark.
+
+Measures, in fresh interpreters, how long `import server` takes and how long a
+newly spawned API process needs until it answers liveness, readiness and its
+first authenticated /api/classrooms request.
+
+By default the spawned process runs with the in-memory Mongo and fake LLM
+stand-ins (see stand_ins.py); --real starts `uvicorn server:app` with the
+backend's own environment instead.
+
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --runs 3 --importtime
+    python benchmarks/cold_start.py --real
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import jwt
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCHMARKS_DIR.parent / "backend"
+JWT_SECRET = "cold-start-secret"
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import server; print(time.perf_counter() - started)"
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def child_env():
+    pythonpath = os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")]))
+    return dict(os.environ, JWT_SECRET=JWT_SECRET, PYTHONPATH=pythonpath)
+
+
+def measure_import(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=child_env(),
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(limit):
+    """Modules imported directly by server, by cumulative import time"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"], cwd=BACKEND_DIR, env=child_env(),
+                            capture_output=True, text=True, check=True).stderr
+    rows = []
+    for match in IMPORTTIME_RE.finditer(stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        if len(indent) == 2:
+            rows.append((int(cumulative_us), int(self_us), name))
+        elif name == "server":
+            rows.append((int(cumulative_us), int(self_us), "server (total)"))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def token():
+    now = datetime.now(timezone.utc)
+    payload = {"user_id": "cold-start", "name": "Cold Start", "role": "student", "jti": uuid.uuid4().hex,
+               "iat": now, "exp": now + timedelta(hours=1)}
+    return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
+
+
+def wait_for(client, path, started, timeout, headers=None):
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path, headers=headers).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def measure_first_request(real, timeout):
+    port = free_port()
+    if real:
+        command = [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"]
+    else:
+        command = [sys.executable, str(Path(__file__).resolve()), "--serve", str(port)]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}/api", timeout=timeout) as client:
+            live = wait_for(client, "/health/live", started, timeout)
+            classrooms = wait_for(client, "/classrooms", started, timeout, {"Authorization": f"Bearer {token()}"})
+            ready = wait_for(client, "/health/ready", started, timeout)
+    finally:
+        process.terminate()
+        process.wait()
+    return live, classrooms, ready
+
+
+def serve(port):
+    """Child process: the backend with stand-ins for Mongo and the LLM"""
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+    from stand_ins import FakeLlmChat, FakeUserMessage, InMemoryDatabase
+    import uvicorn
+    import server
+
+    server.db = InMemoryDatabase()
+    server.LlmChat, server.UserMessage = FakeLlmChat, FakeUserMessage
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def describe(label, samples):
+    samples = [s * 1000 for s in samples if s is not None]
+    if not samples:
+        print(f"   {label}: ❌ never answered")
+        return
+    print(f"   {label}: median={statistics.median(samples):.0f}ms min={min(samples):.0f}ms max={max(samples):.0f}ms (n={len(samples)})")
+
+
+def main(args):
+    print(f"🔍 Importing server in {args.runs} fresh interpreters...")
+    imports = measure_import(args.runs)
+    if args.importtime:
+        print("🔍 Slowest direct imports (-X importtime, cumulative):")
+        for cumulative_us, self_us, name in slowest_imports(args.importtime):
+            print(f"   {name:<40} {cumulative_us / 1000:8.1f}ms (self {self_us / 1000:.1f}ms)")
+
+    print(f"🔍 Spawning {'uvicorn server:app' if args.real else 'the backend with stand-ins'} {args.runs} times...")
+    runs = [measure_first_request(args.real, args.timeout) for _ in range(args.runs)]
+
+    print("\n📊 Results")
+    describe("import server", imports)
+    describe("spawn -> liveness", [live for live, _, _ in runs])
+    describe("spawn -> first /classrooms", [first for _, first, _ in runs])
+    describe("spawn -> readiness", [ready for _, _, ready in runs])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, nargs="?", const=10, default=0, metavar="N",
+                        help="also list the N slowest direct imports")
+    parser.add_argument("--real", action="store_true", help="spawn uvicorn with the real database and LLM SDK")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve)
+    else:
+        main(args)
@@ -0,0 +1,285 @@
+"""Self-contained load test.
+
+Starts the backend in-process (ASGI transport, no sockets) or on a localhost
+port with uvicorn, backed by the in-memory Mongo stand-in and a fake LlmChat, so
+results are repeatable offline. Drives a weighted mix of logins, classroom
+listings and searches from concurrent clients, reports throughput and
+p50/p95/p99 latency per operation, and can save or compare against baselines.
+
+    python benchmarks/loadtest.py --concurrency 32 --duration 20 --mix login=1,classrooms=6,search=3
+    python benchmarks/loadtest.py --save-baseline default
+    python benchmarks/loadtest.py --compare default --tolerance 0.25
+
+Use --base-url to drive an already running backend instead (the stand-ins are
+then not involved). Exits with status 1 when --compare finds a regression and
+with status 2 when it refuses to compare: the baseline was recorded with other
+settings or on a different machine (Python, platform, CPU count). Baselines are
+machine-specific, so record one on the machine that runs the comparison; they
+are not committed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from login_burst import percentile
+from stand_ins import FakeLlmChat, FakeUserMessage, InMemoryDatabase
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BASELINES_DIR = BENCHMARKS_DIR / "baselines"
+PASSWORD = "LoadTest123!"
+
+# Phrasings the local parser answers, plus open-ended ones that need the LLM.
+LOCAL_QUERIES = [
+    "rooms available now",
+    "ground floor rooms with projector",
+    "empty rooms on first floor",
+    "rooms free from 2 PM to 4 PM",
+    "classrooms with 60 seats available at 11 AM",
+]
+LLM_QUERY_TEMPLATES = [
+    "somewhere quiet where my study group of {n} can revise ({tag})",
+    "a big hall for a guest lecture with a podium and speakers ({tag})",
+    "any space to practise a presentation on a projector later ({tag})",
+]
+
+
+def load_server(args):
+    """Import the backend with the stand-ins patched in place of Motor and the LLM client"""
+    sys.path.insert(0, str(BENCHMARKS_DIR.parent / "backend"))
+    import server
+
+    server.db = InMemoryDatabase(latency=args.db_latency_ms / 1000)
+    FakeLlmChat.latency = args.llm_latency_ms / 1000
+    FakeLlmChat.jitter = args.llm_jitter_ms / 1000
+    FakeLlmChat.failure_rate = args.llm_failure_rate
+    server.LlmChat = FakeLlmChat
+    server.UserMessage = FakeUserMessage
+    return server
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"❌ Unknown operation '{name.strip()}' (choose from {', '.join(OPERATIONS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def op_login(client, user, rng, args):
+    return await client.post("/auth/login", json={"email": user["email"], "password": PASSWORD})
+
+
+async def op_classrooms(client, user, rng, args):
+    return await client.get("/classrooms", headers=user["headers"])
+
+
+async def op_search(client, user, rng, args):
+    if rng.random() < args.llm_query_rate:
+        query = rng.choice(LLM_QUERY_TEMPLATES).format(n=rng.randint(3, 40), tag=uuid.uuid4().hex[:6])
+    else:
+        query = rng.choice(LOCAL_QUERIES)
+    return await client.post("/search", json={"query": query}, headers=user["headers"])
+
+
+OPERATIONS = {"login": op_login, "classrooms": op_classrooms, "search": op_search}
+
+
+async def wait_until_ready(client, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise SystemExit("❌ Backend did not become healthy")
+
+
+async def register_users(client, count):
+    users = []
+    for i in range(count):
+        email = f"load_{uuid.uuid4().hex[:8]}_{i}@iips.edu.in"
+        response = await client.post("/auth/register", json={"name": f"Load {i}", "email": email, "password": PASSWORD})
+        response.raise_for_status()
+        users.append({"email": email, "headers": {"Authorization": f"Bearer {response.json()['token']}"}})
+    return users
+
+
+async def worker(client, users, mix, deadline, samples, seed, args):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await OPERATIONS[name](client, rng.choice(users), rng, args)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples[name].append((ok, time.perf_counter() - started))
+
+
+async def run_load(client, args):
+    await wait_until_ready(client)
+    print(f"🔍 Registering {args.users} load-test users...")
+    users = await register_users(client, args.users)
+    mix = parse_mix(args.mix)
+
+    if args.warmup > 0:
+        print(f"🔍 Warming up for {args.warmup}s...")
+        await asyncio.gather(*(worker(client, users, mix, time.perf_counter() + args.warmup, defaultdict(list), args.seed + 1000 + i, args)
+                               for i in range(args.concurrency)))
+
+    print(f"🔍 Driving {args.concurrency} concurrent clients for {args.duration}s (mix {args.mix})...")
+    samples = defaultdict(list)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(client, users, mix, deadline, samples, args.seed + i, args) for i in range(args.concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarize_samples(samples, elapsed):
+    report = {}
+    combined = [sample for results in samples.values() for sample in results]
+    for name, results in sorted(samples.items()) + [("all", combined)]:
+        ms = [latency * 1000 for _, latency in results]
+        report[name] = {
+            "requests": len(results),
+            "errors": sum(1 for ok, _ in results if not ok),
+            "throughput": round(len(results) / elapsed, 2),
+            "p50_ms": round(percentile(ms, 50), 2),
+            "p95_ms": round(percentile(ms, 95), 2),
+            "p99_ms": round(percentile(ms, 99), 2),
+            "max_ms": round(max(ms, default=0), 2),
+        }
+    return report
+
+
+def print_report(report, elapsed):
+    print("\n📊 Results")
+    print(f"   duration: {elapsed:.1f}s")
+    for name, row in report.items():
+        print(f"   {name:>10}: n={row['requests']} errors={row['errors']} {row['throughput']:.1f} req/s "
+              f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms p99={row['p99_ms']:.1f}ms max={row['max_ms']:.1f}ms")
+
+
+def compare(report, baseline, tolerance):
+    """Regressions against a saved baseline: throughput drops or p95/p99 rises beyond the tolerance"""
+    regressions = []
+    for name, row in report.items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        if row["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name} throughput {row['throughput']:.1f} < {previous['throughput']:.1f} req/s")
+        for key in ("p95_ms", "p99_ms"):
+            if row[key] > previous[key] * (1 + tolerance) and row[key] - previous[key] > 1.0:
+                regressions.append(f"{name} {key} {row[key]:.1f} > {previous[key]:.1f}")
+        if row["errors"] > previous["errors"] and row["errors"] / max(row["requests"], 1) > 0.01:
+            regressions.append(f"{name} errors {row['errors']} > {previous['errors']}")
+    return regressions
+
+
+def environment():
+    """Where a baseline was recorded; latencies from different machines are not comparable"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+            samples, elapsed = await run_load(client, args)
+    else:
+        server = load_server(args)
+        if args.mode == "localhost":
+            import uvicorn
+
+            port = free_port()
+            uvicorn_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning"))
+            serving = asyncio.create_task(uvicorn_server.serve())
+            try:
+                async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}/api", timeout=60, limits=limits) as client:
+                    samples, elapsed = await run_load(client, args)
+            finally:
+                uvicorn_server.should_exit = True
+                await serving
+        else:
+            async with server.app.router.lifespan_context(server.app):
+                transport = httpx.ASGITransport(app=server.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://loadtest/api", timeout=60) as client:
+                    samples, elapsed = await run_load(client, args)
+        print(f"   fake LLM calls: {FakeLlmChat.calls}")
+
+    report = summarize_samples(samples, elapsed)
+    print_report(report, elapsed)
+
+    config = {key: getattr(args, key) for key in ("mode", "concurrency", "duration", "mix", "users", "llm_latency_ms",
+                                                  "llm_jitter_ms", "llm_failure_rate", "llm_query_rate", "db_latency_ms", "seed")}
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps({"config": config, "environment": environment(), "results": report}, indent=2) + "\n")
+        print(f"💾 Saved baseline to {path}")
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        if baseline["config"] != config:
+            print(f"   ❌ Baseline '{args.compare}' was recorded with different settings: {baseline['config']}")
+            return 2
+        if baseline.get("environment") != environment():
+            print(f"   ❌ Baseline '{args.compare}' was recorded on a different machine: {baseline.get('environment')}")
+            return 2
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"   ❌ {regression}")
+        if regressions:
+            return 1
+        print(f"   ✅ No regressions against '{args.compare}' (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("in-process", "localhost"), default="in-process")
+    parser.add_argument("--base-url", help="drive a running backend instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--mix", default="login=1,classrooms=6,search=3")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=400)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-query-rate", type=float, default=0.2, help="share of searches the local parser cannot answer")
+    parser.add_argument("--db-latency-ms", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,108 @@
+"""Login burst benchmark.
+
+Measures login throughput and /api/classrooms tail latency while a burst of
+logins is running, against a live backend (e.g. `uvicorn server:app --port 8001`).
+
+    python benchmarks/login_burst.py --base-url http://localhost:8001/api --users 50 --concurrency 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"   {label}: n={len(ms)} p50={percentile(ms, 50):.1f}ms p95={percentile(ms, 95):.1f}ms "
+          f"p99={percentile(ms, 99):.1f}ms max={max(ms, default=0):.1f}ms")
+
+
+async def register_users(client, count, password):
+    emails = []
+    for i in range(count):
+        email = f"bench_{uuid.uuid4().hex[:8]}_{i}@iips.edu.in"
+        response = await client.post("/auth/register", json={"name": f"Bench {i}", "email": email, "password": password})
+        response.raise_for_status()
+        emails.append(email)
+    token = response.json()["token"]
+    return emails, token
+
+
+async def probe_classrooms(client, token, stop, latencies):
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/classrooms", headers=headers)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        await asyncio.sleep(0.01)
+
+
+async def login_worker(client, emails, password, deadline, results):
+    i = 0
+    while time.perf_counter() < deadline:
+        email = emails[i % len(emails)]
+        i += 1
+        started = time.perf_counter()
+        response = await client.post("/auth/login", json={"email": email, "password": password})
+        results.append((response.status_code, time.perf_counter() - started))
+
+
+async def main(args):
+    password = "BenchPass123!"
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        print(f"🔍 Registering {args.users} benchmark users...")
+        emails, token = await register_users(client, args.users, password)
+
+        print(f"🔍 Baseline /classrooms latency ({args.baseline}s, no login load)...")
+        baseline, stop = [], asyncio.Event()
+        prober = asyncio.create_task(probe_classrooms(client, token, stop, baseline))
+        await asyncio.sleep(args.baseline)
+        stop.set()
+        await prober
+
+        print(f"🔍 Login burst: {args.concurrency} concurrent clients for {args.duration}s...")
+        under_load, results, stop = [], [], asyncio.Event()
+        prober = asyncio.create_task(probe_classrooms(client, token, stop, under_load))
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker(client, emails, password, deadline, results) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    ok = [latency for code, latency in results if code == 200]
+    busy = sum(1 for code, _ in results if code == 503)
+    failed = len(results) - len(ok) - busy
+    print("\n📊 Results")
+    print(f"   logins: {len(ok)} ok, {busy} shed (503), {failed} failed in {elapsed:.1f}s "
+          f"-> {len(ok) / elapsed:.1f} logins/s")
+    if ok:
+        summarize("login latency", ok)
+    summarize("/classrooms baseline", baseline)
+    summarize("/classrooms during burst", under_load)
+    if baseline and under_load:
+        print(f"   p99 inflation: {percentile(under_load, 99) / max(percentile(baseline, 99), 1e-9):.1f}x "
+              f"(median {statistics.median(under_load) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--baseline", type=float, default=3)
+    asyncio.run(main(parser.parse_args()))
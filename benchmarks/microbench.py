@@ -0,0 +1,252 @@
+"""Micro-benchmarks for the availability core.
+
+Generates synthetic campuses (10 to 10,000 rooms, sparse or dense timetables),
+installs them in the backend and times the pure functions every request relies
+on: is_room_available, get_room_status, get_predicted_availability,
+get_current_hour, the search filter chain (build_search_response) and the
+get_classrooms handler called directly with the auth dependency bypassed, both
+on a warm snapshot and on a forced rebuild.
+
+    python benchmarks/microbench.py --sizes 10,100,1000,10000 --output microbench.json
+    python benchmarks/microbench.py --save-baseline microbench
+    python benchmarks/microbench.py --compare microbench --threshold 0.3
+
+Results are written as JSON, with the settings and the machine they were
+measured on. With --compare, exits with status 1 when any case loses more than
+--threshold of its baseline throughput, and with status 2 when it refuses to
+compare: the baseline was recorded with other settings or on a different
+machine. Baselines are machine-specific, so record one on the machine that runs
+the comparison; they are not committed.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from starlette.requests import Request
+
+from loadtest import environment
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BASELINES_DIR = BENCHMARKS_DIR / "baselines"
+
+FLOORS = ["Ground", "First", "Second", "Third", "Fourth"]
+FACILITIES = ["Projector", "Speaker", "Whiteboard", "Blackboard", "Podium", "Smartboard", "AC", "Lab"]
+CAPACITIES = [30, 40, 60, 90, 120, 180]
+# Occupied slots per room per day
+DENSITIES = {"sparse": (0, 2), "dense": (5, 9)}
+# A Wednesday, mid-morning IST
+FIXED_NOW = datetime(2026, 3, 11, 11, 20, tzinfo=timezone.utc) + timedelta(hours=5, minutes=30)
+QUERIES = [
+    {"action": "search", "filters": {}, "time_context": "now"},
+    {"action": "search", "filters": {"floor": "First", "facilities": ["Projector"]}, "time_context": "now"},
+    {"action": "search", "filters": {"min_capacity": 60, "start_hour": 14, "end_hour": 16}, "time_context": "specific"},
+    {"action": "search", "filters": {"facilities": ["Smartboard", "AC"], "start_hour": 9.5, "end_hour": 10.5}, "time_context": "specific"},
+]
+
+
+def import_server():
+    sys.path.insert(0, str(BENCHMARKS_DIR.parent / "backend"))
+    import server
+    return server
+
+
+def synthetic_campus(rooms, density, seed):
+    """Catalog and every-day timetable on whole and half hours between 8:00 and 18:30"""
+    rng = random.Random(seed)
+    catalog, schedule = [], {}
+    low, high = DENSITIES[density]
+    for i in range(rooms):
+        room_id = f"R-{i:05d}"
+        catalog.append({
+            "room_id": room_id,
+            "floor": FLOORS[i % len(FLOORS)],
+            "capacity": rng.choice(CAPACITIES),
+            "facilities": sorted(rng.sample(FACILITIES, rng.randint(1, 5))),
+            "map_link": f"https://maps.google.com/?q=IIPS+DAVV+{room_id}",
+        })
+        slots, cursor = [], 8.0
+        for _ in range(rng.randint(low, high)):
+            start = cursor + rng.choice((0, 0, 0.5, 1))
+            end = start + rng.choice((0.5, 1, 1, 1.5, 2))
+            if end > 18.5:
+                break
+            slots.append((start, end))
+            cursor = end
+        schedule[room_id] = slots
+    return catalog, schedule
+
+
+def measure(func, min_time):
+    """Best-of-five operations per second, calibrating the loop so each repeat runs for ~min_time"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 24:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(4):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return number / best
+
+
+def cycler(items):
+    """Callable returning the next item on each call, so inputs vary without per-call RNG cost"""
+    state = {"i": 0}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return next_item
+
+
+def bench_cases(server, rooms, seed):
+    rng = random.Random(seed)
+    day = FIXED_NOW.date()
+    room_ids = [room["room_id"] for room in rooms]
+    ranges = []
+    for _ in range(1024):
+        start = rng.choice(range(16, 36)) / 2
+        ranges.append((rng.choice(room_ids), start, min(start + rng.choice((0.5, 1, 2)), 18.5)))
+    hours = [(rng.choice(room_ids), rng.uniform(8, 18.5)) for _ in range(1024)]
+    next_range, next_hour, next_query = cycler(ranges), cycler(hours), cycler(QUERIES)
+    loop = asyncio.new_event_loop()
+    request = Request({"type": "http", "method": "GET", "path": "/api/classrooms", "headers": [], "query_string": b""})
+    user = {"id": "bench", "email": "bench@iips.edu.in", "role": "student"}
+
+    def is_room_available():
+        room_id, start, end = next_range()
+        server.is_room_available(room_id, start, end, day)
+
+    def get_room_status():
+        room_id, hour = next_hour()
+        server.get_room_status(room_id, hour, day)
+
+    def get_predicted_availability():
+        room_id, hour = next_hour()
+        server.get_predicted_availability(room_id, hour, day)
+
+    def search_filter_chain():
+        server.build_search_response(next_query(), 11.33)
+
+    def get_classrooms():
+        loop.run_until_complete(server.get_classrooms(request, fields=None, compact=False, current_user=user))
+
+    def get_classrooms_rebuild():
+        server._classroom_snapshot = None
+        loop.run_until_complete(server.get_classrooms(request, fields=None, compact=False, current_user=user))
+
+    return {
+        "is_room_available": is_room_available,
+        "get_room_status": get_room_status,
+        "get_predicted_availability": get_predicted_availability,
+        "search_filter_chain": search_filter_chain,
+        "get_classrooms": get_classrooms,
+        "get_classrooms_rebuild": get_classrooms_rebuild,
+    }, loop
+
+
+def run(server, args):
+    results = []
+    real_clock = server.get_current_ist
+    print("🔍 get_current_hour")
+    results.append({"case": "get_current_hour", "rooms": 0, "density": "-", "ops_per_sec": measure(server.get_current_hour, args.min_time)})
+    # Every other path is timed at a fixed campus time so runs are comparable whatever the wall clock says.
+    server.get_current_ist = lambda: FIXED_NOW
+    try:
+        for size in args.sizes:
+            for density in args.densities:
+                catalog, schedule = synthetic_campus(size, density, args.seed)
+                server.set_classroom_catalog(catalog)
+                server.rebuild_availability_index(schedule)
+                cases, loop = bench_cases(server, catalog, args.seed)
+                print(f"🔍 {size} rooms, {density} timetable")
+                for name, func in cases.items():
+                    if args.cases and name not in args.cases:
+                        continue
+                    func()
+                    results.append({"case": name, "rooms": size, "density": density, "ops_per_sec": measure(func, args.min_time)})
+                loop.close()
+    finally:
+        server.get_current_ist = real_clock
+    for result in results:
+        result["ops_per_sec"] = round(result["ops_per_sec"], 1)
+        result["us_per_op"] = round(1e6 / result["ops_per_sec"], 3)
+    return results
+
+
+def print_results(results):
+    print("\n📊 Results")
+    for r in results:
+        print(f"   {r['case']:>26} {r['rooms']:>6} rooms {r['density']:>6}: {r['ops_per_sec']:>14,.1f} ops/s {r['us_per_op']:>12,.3f} µs/op")
+
+
+def compare(results, baseline, threshold):
+    previous = {(r["case"], r["rooms"], r["density"]): r["ops_per_sec"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        before = previous.get((r["case"], r["rooms"], r["density"]))
+        if before and r["ops_per_sec"] < before * (1 - threshold):
+            regressions.append(f"{r['case']} ({r['rooms']} rooms, {r['density']}): {r['ops_per_sec']:,.1f} ops/s "
+                               f"vs {before:,.1f} baseline ({r['ops_per_sec'] / before - 1:+.0%})")
+    return regressions
+
+
+def main(args):
+    server = import_server()
+    results = run(server, args)
+    print_results(results)
+    config = {"sizes": args.sizes, "densities": args.densities, "seed": args.seed, "min_time": args.min_time}
+    report = {"config": config, "environment": environment(), "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"💾 Wrote {args.output}")
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"💾 Saved baseline to {path}")
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        if baseline.get("config") != config:
+            print(f"   ❌ Baseline '{args.compare}' was recorded with different settings: {baseline.get('config')}")
+            return 2
+        if baseline.get("environment") != report["environment"]:
+            print(f"   ❌ Baseline '{args.compare}' was recorded on a different machine: {baseline.get('environment')}")
+            return 2
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"   ❌ {regression}")
+        if regressions:
+            return 1
+        print(f"   ✅ No case regressed more than {args.threshold:.0%} against '{args.compare}'")
+    return 0
+
+
+def csv_list(convert):
+    return lambda text: [convert(part.strip()) for part in text.split(",") if part.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=csv_list(int), default=[10, 100, 1000, 10000])
+    parser.add_argument("--densities", type=csv_list(str), default=list(DENSITIES))
+    parser.add_argument("--cases", type=csv_list(str), help="only run these cases (comma-separated)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed throughput loss before failing")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,284 @@
+"""In-memory stand-ins for MongoDB (Motor) and the LLM client, for offline load tests.
+
+Only the query and update operators the backend actually uses are supported:
+equality (including dotted paths into arrays), $gt/$gte/$lt/$lte/$ne/$exists,
+$elemMatch, $not, and $set/$push/$addToSet/$pull/$inc updates with upserts.
+Unique indexes are enforced so duplicate registrations and booking races behave
+like the real database.
+"""
+import asyncio
+import copy
+import json
+import random
+import re
+from types import SimpleNamespace
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+def _values(document, path):
+    """Every value at a dotted path, descending into arrays like MongoDB does"""
+    values = [document]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, list):
+                found.extend(item.get(part, _MISSING) for item in value if isinstance(item, dict))
+            elif isinstance(value, dict):
+                found.append(value.get(part, _MISSING))
+        values = found
+    flattened = []
+    for value in values:
+        flattened.extend(value if isinstance(value, list) else [value])
+    return values + [value for value in flattened if value not in values]
+
+
+def _compare(value, op, operand):
+    if value is _MISSING:
+        return op == "$ne" or (op == "$exists" and not operand)
+    try:
+        return {
+            "$gt": lambda: value > operand,
+            "$gte": lambda: value >= operand,
+            "$lt": lambda: value < operand,
+            "$lte": lambda: value <= operand,
+            "$ne": lambda: value != operand,
+            "$exists": lambda: bool(operand),
+        }[op]()
+    except TypeError:
+        return False
+
+
+def _matches_condition(document, path, condition):
+    raw = document.get(path, _MISSING) if "." not in path else _MISSING
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$not":
+                if _matches_condition(document, path, operand):
+                    return False
+            elif op == "$elemMatch":
+                array = raw if "." not in path else None
+                if not isinstance(array, list) or not any(isinstance(item, dict) and matches(item, operand) for item in array):
+                    return False
+            elif op == "$ne":
+                if any(value == operand for value in _values(document, path)):
+                    return False
+            elif op == "$exists":
+                present = any(value is not _MISSING for value in _values(document, path))
+                if present != bool(operand):
+                    return False
+            elif not any(_compare(value, op, operand) for value in _values(document, path)):
+                return False
+        return True
+    return any(value == condition for value in _values(document, path))
+
+
+def matches(document, query):
+    return all(_matches_condition(document, path, condition) for path, condition in query.items())
+
+
+def _project(document, projection):
+    document = copy.deepcopy(document)
+    if not projection:
+        return document
+    included = {key for key, flag in projection.items() if flag and key != "_id"}
+    if included:
+        keep = included | ({"_id"} if projection.get("_id", 1) else set())
+        return {key: value for key, value in document.items() if key in keep}
+    return {key: value for key, value in document.items() if projection.get(key, 1)}
+
+
+def _apply_update(document, update):
+    for op, fields in update.items():
+        for key, value in fields.items():
+            if op == "$set":
+                document[key] = copy.deepcopy(value)
+            elif op == "$inc":
+                document[key] = document.get(key, 0) + value
+            elif op == "$push":
+                document.setdefault(key, []).append(copy.deepcopy(value))
+            elif op == "$addToSet":
+                array = document.setdefault(key, [])
+                if value not in array:
+                    array.append(copy.deepcopy(value))
+            elif op == "$pull":
+                array = document.get(key, [])
+                if isinstance(value, dict):
+                    document[key] = [item for item in array if not (isinstance(item, dict) and matches(item, value))]
+                else:
+                    document[key] = [item for item in array if item != value]
+            else:
+                raise NotImplementedError(f"update operator {op}")
+
+
+class InMemoryCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._documents:
+            yield document
+
+    def sort(self, key, direction=1):
+        self._documents = sorted(self._documents, key=lambda document: document.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self._documents if length is None else self._documents[:length]
+
+
+class InMemoryCollection:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.documents = []
+        self.unique_indexes = []
+        self._next_id = 0
+
+    async def _round_trip(self):
+        await asyncio.sleep(self.latency)
+
+    def _check_unique(self, candidate, ignore=None):
+        for fields in self.unique_indexes:
+            key = tuple(candidate.get(field, _MISSING) for field in fields)
+            if _MISSING in key:
+                continue
+            for document in self.documents:
+                if document is not ignore and tuple(document.get(field, _MISSING) for field in fields) == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key error: {dict(zip(fields, key))}")
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        fields = [keys] if isinstance(keys, str) else [field for field, _ in keys]
+        if unique and fields not in self.unique_indexes:
+            self.unique_indexes.append(fields)
+        return "_".join(fields)
+
+    async def find_one(self, query=None, projection=None):
+        await self._round_trip()
+        for document in self.documents:
+            if matches(document, query or {}):
+                return _project(document, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        return InMemoryCursor([_project(d, projection) for d in self.documents if matches(d, query or {})])
+
+    async def insert_one(self, document):
+        await self._round_trip()
+        self._next_id += 1
+        stored = copy.deepcopy(document)
+        stored.setdefault("_id", self._next_id)
+        self._check_unique(stored)
+        self.documents.append(stored)
+        document["_id"] = stored["_id"]
+        return SimpleNamespace(inserted_id=stored["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        await self._round_trip()
+        for document in self.documents:
+            if matches(document, query):
+                candidate = copy.deepcopy(document)
+                _apply_update(candidate, update)
+                self._check_unique(candidate, ignore=document)
+                document.clear()
+                document.update(candidate)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        self._next_id += 1
+        document = {key: value for key, value in query.items() if not isinstance(value, dict) and "." not in key}
+        document["_id"] = self._next_id
+        _apply_update(document, update)
+        self._check_unique(document)
+        self.documents.append(document)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=document["_id"])
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=ReturnDocument.BEFORE, upsert=False):
+        await self._round_trip()
+        for document in self.documents:
+            if matches(document, query):
+                before = _project(document, projection)
+                _apply_update(document, update)
+                return _project(document, projection) if return_document == ReturnDocument.AFTER else before
+        return None
+
+
+class InMemoryDatabase:
+    """Attribute access creates collections on demand, like a Motor database"""
+
+    def __init__(self, latency=0.0):
+        self._latency = latency
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self._latency)
+        return self._collections[name]
+
+    async def command(self, name, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        return {"ok": 1.0}
+
+
+class FakeUserMessage:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeLlmChat:
+    """Drop-in for emergentintegrations' LlmChat with configurable latency and failure rate"""
+
+    latency = 0.8
+    jitter = 0.4
+    failure_rate = 0.0
+    malformed_rate = 0.0
+    calls = 0
+
+    _FLOORS = {"ground": "Ground", "first": "First", "second": "Second"}
+    _FACILITIES = ("Projector", "Speaker", "Whiteboard", "Blackboard", "Podium")
+
+    def __init__(self, api_key=None, session_id=None, system_message=None):
+        self.session_id = session_id
+
+    def with_model(self, provider, model):
+        return self
+
+    async def send_message(self, message):
+        type(self).calls += 1
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter / 2)))
+        if random.random() < self.failure_rate:
+            raise RuntimeError("fake LLM failure")
+        if random.random() < self.malformed_rate:
+            return "Sorry, I could not understand that."
+        text = getattr(message, "text", str(message)).lower()
+        floor = next((name for word, name in self._FLOORS.items() if word in text), None)
+        facilities = [name for name in self._FACILITIES if name.lower() in text] or None
+        capacity = re.search(r"(\d+)\s*(?:seats?|seater|people|students)", text)
+        return "```json\n" + json.dumps({
+            "action": "search",
+            "filters": {
+                "floor": floor,
+                "min_capacity": int(capacity.group(1)) if capacity else None,
+                "facilities": facilities,
+                "room_ids": None,
+                "start_hour": None,
+                "end_hour": None,
+            },
+            "message": "",
+            "time_context": "now",
+        }) + "\n```"
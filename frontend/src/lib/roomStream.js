@@ -0,0 +1,47 @@
+const RECONNECT_DELAY_MS = 5000;
+
+const parseEvent = (raw) => {
+  let event = 'message';
+  const data = [];
+  for (const line of raw.split('\n')) {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data.push(line.slice(5).trimStart());
+  }
+  return data.length ? { event, data: JSON.parse(data.join('\n')) } : null;
+};
+
+// Subscribes to a server-sent events endpoint that needs an Authorization header
+// (EventSource cannot send one). Reconnects until the returned function is called.
+export const subscribeToRoomStream = (url, headers, onEvent) => {
+  const controller = new AbortController();
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const response = await fetch(url, { headers, signal: controller.signal });
+        if (!response.ok) throw new Error(`Stream request failed with ${response.status}`);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let boundary;
+          while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const parsed = parseEvent(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            if (parsed) onEvent(parsed.event, parsed.data);
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        console.error('Room status stream interrupted:', error);
+      }
+      await new Promise((resolve) => setTimeout(resolve, RECONNECT_DELAY_MS));
+    }
+  };
+
+  run();
+  return () => controller.abort();
+};
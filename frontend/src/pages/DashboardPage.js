@@ -1,7 +1,8 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import axios from 'axios';
 import { useAuth } from '@/context/AuthContext';
+import { subscribeToRoomStream } from '@/lib/roomStream';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Badge } from '@/components/ui/badge';
@@ -42,6 +43,7 @@ export default function DashboardPage() {
   const [clarification, setClarification] = useState('');
   const [selectedFloor, setSelectedFloor] = useState('All Floors');
   const [showFilters, setShowFilters] = useState(false);
+  const showingSearch = useRef(false);
 
   // Load all classrooms on mount
   useEffect(() => {
@@ -60,8 +62,22 @@ export default function DashboardPage() {
     loadClassrooms();
   }, []);
 
+  // Keep room statuses live: the server pushes only rooms that changed at each schedule boundary
+  useEffect(() => {
+    return subscribeToRoomStream(`${API}/classrooms/stream`, getAuthHeader().headers, (event, data) => {
+      if (event === 'snapshot') {
+        setAllRooms(data);
+      } else if (event === 'update') {
+        const changed = new Map(data.map((room) => [room.room_id, room]));
+        setAllRooms((prev) => prev.map((room) => changed.get(room.room_id) || room));
+      }
+    });
+  }, []);
+
   // Filter rooms by floor
   useEffect(() => {
+    // Live updates must not replace search results computed for another time range
+    if (showingSearch.current) return;
     if (selectedFloor === 'All Floors') {
       setRooms(allRooms);
     } else {
@@ -72,6 +88,7 @@ export default function DashboardPage() {
   const handleSearch = async (e) => {
     e?.preventDefault();
     if (!query.trim()) {
+      showingSearch.current = false;
       setRooms(allRooms);
       setMessage('');
       setClarification('');
@@ -96,6 +113,7 @@ export default function DashboardPage() {
         setClarification(response.data.clarification_needed);
       }
       if (response.data.rooms) {
+        showingSearch.current = true;
         setRooms(response.data.rooms);
         if (response.data.rooms.length === 0 && !response.data.message) {
           setMessage('No classrooms found matching your criteria.');
@@ -115,6 +133,7 @@ export default function DashboardPage() {
   };
 
   const clearSearch = () => {
+    showingSearch.current = false;
     setQuery('');
     setRooms(allRooms);
     setMessage('');
@@ -273,7 +292,10 @@ export default function DashboardPage() {
                         key={floor}
                         variant="ghost"
                         size="sm"
-                        onClick={() => setSelectedFloor(floor)}
+                        onClick={() => {
+                          showingSearch.current = false;
+                          setSelectedFloor(floor);
+                        }}
                         data-testid={`floor-filter-${floor.toLowerCase().replace(' ', '-')}`}
                         className={`
                           ${selectedFloor === floor 
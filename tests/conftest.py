@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "backend"), str(ROOT / "benchmarks")]
+
+import server  # noqa: E402
+from stand_ins import InMemoryDatabase  # noqa: E402
+
+DEFAULT_CLASSROOMS = list(server.CLASSROOMS)
+
+
+def reset_server():
+    server.timetable_store.clear()
+    server.booked_slots.clear()
+    server.CLASSROOMS = list(DEFAULT_CLASSROOMS)
+    server._classroom_snapshot = None
+    server.shared_snapshot = None
+    server._shared_base_generation = 0
+    server.build_indexes()
+    server.forget_shared_changes()
+
+
+@pytest.fixture
+def campus():
+    """The server module with the built-in catalog and mock timetable freshly indexed; reset afterwards"""
+    reset_server()
+    yield server
+    reset_server()
+
+
+@pytest.fixture
+def database(campus, monkeypatch):
+    """The in-memory Mongo stand-in installed as server.db"""
+    db = InMemoryDatabase()
+    monkeypatch.setattr(campus, "db", db)
+    return db
+
+
+@pytest.fixture
+def client(campus):
+    """TestClient for the API (no lifespan) signed in as a student"""
+    campus.app.dependency_overrides[campus.get_current_user] = lambda: {"id": "u1", "name": "User", "role": "student"}
+    yield TestClient(campus.app)
+    campus.app.dependency_overrides.clear()
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+
+def issue_token(server, user_id="u1"):
+    return server.create_token({"id": user_id, "name": "User", "role": "student"})
+
+
+def assert_revoked(server, token):
+    with pytest.raises(HTTPException) as error:
+        server.decode_token(token)
+    assert error.value.detail == "Token revoked"
+
+
+def test_logout_on_one_worker_revokes_the_token_on_every_worker(database, campus, monkeypatch):
+    server = campus
+    worker_a, worker_b = server.TokenRevocations(), server.TokenRevocations()
+    first, second = issue_token(server), issue_token(server)
+
+    async def run():
+        monkeypatch.setattr(server, "token_revocations", worker_b)
+        await server.sync_revocations()
+
+        monkeypatch.setattr(server, "token_revocations", worker_a)
+        await server.logout(current_user={"token": server.decode_token(first)})
+        assert_revoked(server, first)
+
+        # Worker B accepts the token until its next sync, then rejects it
+        monkeypatch.setattr(server, "token_revocations", worker_b)
+        server.decode_token(first)
+        await server.sync_revocations()
+        assert_revoked(server, first)
+
+        # A worker starting later loads every unexpired revocation
+        monkeypatch.setattr(server, "token_revocations", server.TokenRevocations())
+        await server.sync_revocations()
+        assert_revoked(server, first)
+        server.decode_token(second)
+    asyncio.run(run())
+
+
+def test_sync_prunes_expired_revocations(database, campus, monkeypatch):
+    server = campus
+    revocations = server.TokenRevocations()
+    monkeypatch.setattr(server, "token_revocations", revocations)
+    now = time.time()
+    revocations.add("expired", now - 1)
+    revocations.add("live", now + 60)
+    assert revocations.is_revoked({"jti": "expired"})
+    asyncio.run(server.sync_revocations())
+    assert not revocations.is_revoked({"jti": "expired"})
+    assert revocations.is_revoked({"jti": "live"})
+
+
+def test_loading_many_revocations_is_linear(campus):
+    revocations = campus.TokenRevocations()
+    expires_at = time.time() + 60
+    started = time.perf_counter()
+    for n in range(50_000):
+        revocations.add(f"jti-{n}", expires_at)
+    revocations.prune()
+    assert time.perf_counter() - started < 1.0
+    assert revocations.is_revoked({"jti": "jti-49999"})
@@ -0,0 +1,41 @@
+import random
+
+
+def test_matrix_matches_cell_by_cell_checks(campus):
+    index = campus.get_availability_index()
+    rng = random.Random(7)
+    ranges = []
+    for _ in range(40):
+        start = rng.uniform(8, 18)
+        ranges.append((start, min(start + rng.choice([0.25, 1, 2]), 18.5)))
+    matrix = campus.availability_matrix(index, campus.CLASSROOMS, ranges)
+    for room, row in zip(campus.CLASSROOMS, matrix):
+        timeline = index.timeline(room["room_id"])
+        assert row == "".join("1" if timeline.is_free(start, end) else "0" for start, end in ranges)
+
+
+def test_batch_checks_and_matrix(client, campus):
+    response = client.post("/api/classrooms/availability", json={
+        "checks": [
+            {"room_id": "LT-1", "start_hour": 10, "end_hour": 11},
+            {"room_id": "LT-1", "start_hour": 9.5, "end_hour": 10.5},
+            {"room_id": "XX-9", "start_hour": 10, "end_hour": 11},
+        ],
+        "ranges": [[13, 14], [10, 11], [8, 9]],
+        "floor": "Ground",
+        "min_capacity": 100,
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"] == "10-"
+    assert body["rooms"] == ["LT-1", "LT-2"]
+    # LT-1 busy 8-10, 11-13, 14-16; LT-2 busy 9-11, 12-14, 15-17
+    assert body["matrix"] == ["110", "001"]
+
+
+def test_batch_rejects_off_campus_ranges_and_oversized_requests(client, campus, monkeypatch):
+    response = client.post("/api/classrooms/availability", json={"ranges": [[7, 9]]})
+    assert response.status_code == 400
+    monkeypatch.setattr(campus, "BATCH_MAX_CELLS", 10)
+    response = client.post("/api/classrooms/availability", json={"ranges": [[9, 10]]})
+    assert response.status_code == 413
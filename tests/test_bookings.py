@@ -0,0 +1,72 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+
+@pytest.fixture
+def bookings(campus, database):
+    """Database with the production room_bookings indexes, and tomorrow's date"""
+    asyncio.run(database.room_bookings.create_index([("room_id", 1), ("date", 1)], unique=True))
+    return campus.get_current_ist().date() + timedelta(days=1)
+
+
+def booking(start_hour, end_hour, booking_id):
+    return {"id": booking_id, "start_hour": start_hour, "end_hour": end_hour, "user_id": "u2", "user_name": "Other", "purpose": ""}
+
+
+def request(day, start_hour, end_hour, room_id="LT-1"):
+    return {"room_id": room_id, "date": day.isoformat(), "start_hour": start_hour, "end_hour": end_hour}
+
+
+def test_commit_rejects_overlaps_but_not_neighbours(campus, bookings):
+    day = bookings
+    assert asyncio.run(campus.commit_booking("LT-1", day, booking(10, 11, "a")))
+    assert not asyncio.run(campus.commit_booking("LT-1", day, booking(10.5, 11.5, "b")))
+    assert asyncio.run(campus.commit_booking("LT-1", day, booking(11, 12, "c")))
+    assert asyncio.run(campus.commit_booking("LT-2", day, booking(10, 11, "d")))
+
+
+@pytest.mark.parametrize("first_booking", [True, False])
+def test_concurrent_commits_for_one_slot_have_one_winner(campus, database, bookings, first_booking):
+    day = bookings
+    if not first_booking:
+        asyncio.run(campus.commit_booking("LT-1", day, booking(8, 9, "existing")))
+    database.room_bookings.latency = 0.01
+
+    async def race():
+        return await asyncio.gather(*(campus.commit_booking("LT-1", day, booking(10, 11, f"b{n}")) for n in range(5)))
+
+    assert sorted(asyncio.run(race())) == [False] * 4 + [True]
+    documents = [d for d in database.room_bookings.documents if d["room_id"] == "LT-1"]
+    assert len(documents) == 1
+    assert [b["start_hour"] for b in documents[0]["bookings"]] == ([10] if first_booking else [8, 10])
+
+
+def test_booking_endpoint_conflicts(client, campus, bookings):
+    day = bookings
+    response = client.post("/api/bookings", json=request(day, 10, 11))
+    assert response.status_code == 201
+    assert not campus.get_availability_index(day).timeline("LT-1").is_free(10, 11)
+    # Same slot again, then a timetabled slot: both caught by the local index
+    assert client.post("/api/bookings", json=request(day, 10.5, 11)).status_code == 409
+    assert client.post("/api/bookings", json=request(day, 9, 10)).status_code == 409
+    assert client.post("/api/bookings", json=request(day, 13, 14)).status_code == 201
+
+
+def test_booking_made_by_another_worker_is_caught_by_the_commit(client, campus, bookings):
+    day = bookings
+    # Committed straight to Mongo, so this worker's mirror has not seen it yet
+    asyncio.run(campus.commit_booking("LT-1", day, booking(10, 11, "elsewhere")))
+    assert campus.get_availability_index(day).timeline("LT-1").is_free(10, 11)
+    assert client.post("/api/bookings", json=request(day, 10, 11)).status_code == 409
+    asyncio.run(campus.sync_bookings())
+    assert not campus.get_availability_index(day).timeline("LT-1").is_free(10, 11)
+
+
+def test_cancelled_booking_frees_the_slot(client, campus, bookings):
+    day = bookings
+    created = client.post("/api/bookings", json=request(day, 10, 11)).json()
+    assert client.delete(f"/api/bookings/{created['id']}").status_code == 200
+    assert campus.get_availability_index(day).timeline("LT-1").is_free(10, 11)
+    assert client.post("/api/bookings", json=request(day, 10, 11)).status_code == 201
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta
+
+DAY = datetime(2026, 10, 19)
+
+
+def at(hour, minute=0):
+    return DAY + timedelta(hours=hour, minutes=minute)
+
+
+def states(server, day, minute):
+    hour = minute / 60
+    return {
+        room["room_id"]: (server.get_room_status(room["room_id"], hour, day), server.get_predicted_availability(room["room_id"], hour, day))
+        for room in server.CLASSROOMS
+    }
+
+
+def test_boundaries_include_slot_edges_and_prediction_edges(campus):
+    boundaries = campus.get_availability_index(DAY.date()).segment_boundaries
+    # LT-1 is busy 8-10: the slot edges, and "next30" first seeing the 8:00 start one minute past 7:30
+    assert {480, 600, 451, 421, 391} <= set(boundaries)
+    assert boundaries == sorted(set(boundaries))
+
+
+def test_statuses_are_constant_within_a_segment(campus):
+    day = DAY.date()
+    index = campus.get_availability_index(day)
+    boundaries = [0] + index.segment_boundaries
+    for start, end in zip(boundaries, boundaries[1:] + [campus.MINUTES_PER_DAY]):
+        assert index.segment_at(start) == index.segment_at(end - 1) == (boundaries.index(start), end)
+        assert states(campus, day, start) == states(campus, day, end - 1), (start, end)
+
+
+def test_snapshot_is_reused_within_a_segment_and_rebuilt_at_the_boundary(campus):
+    first = campus.get_classroom_snapshot(at(8, 5))
+    assert campus.get_classroom_snapshot(at(8, 20)) is first
+    assert first.expires_minute == 8 * 60 + 31
+    assert first.seconds_until_expiry(at(8, 20)) == 11 * 60
+    later = campus.get_classroom_snapshot(at(8, 31))
+    assert later is not first and later.segment == first.segment + 1
+
+
+def test_snapshot_is_rebuilt_when_the_index_changes(campus):
+    first = campus.get_classroom_snapshot(at(8, 5))
+    assert first.states["LT-2"][0] == "Available"
+    campus.set_room_bookings(DAY.date(), "LT-2", [(8.0, 9.0, "b1")])
+    rebuilt = campus.get_classroom_snapshot(at(8, 5))
+    assert rebuilt.key[1] != first.key[1]
+    assert rebuilt.states["LT-2"][0] == "Occupied"
+
+
+def test_refresh_swaps_in_the_precomputed_snapshot_at_the_boundary(campus, monkeypatch):
+    clock = [at(8, 20)]
+    sleeps = []
+
+    async def sleep(seconds):
+        if sleeps:
+            raise asyncio.CancelledError
+        sleeps.append(seconds)
+        clock[0] += timedelta(seconds=seconds)
+
+    monkeypatch.setattr(campus, "get_current_ist", lambda: clock[0])
+    monkeypatch.setattr(campus.asyncio, "sleep", sleep)
+    current = campus.get_classroom_snapshot()
+    try:
+        asyncio.run(campus.refresh_classroom_snapshots())
+    except asyncio.CancelledError:
+        pass
+    assert sleeps == [11 * 60 + 0.05]
+    swapped = campus._classroom_snapshot
+    assert swapped.segment == current.segment + 1
+    # The swapped-in snapshot is what requests after the boundary get, without a rebuild
+    assert campus.get_classroom_snapshot(at(8, 31)) is swapped
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+DAY = datetime(2026, 10, 19)
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def clock(campus, monkeypatch):
+    """Settable IST clock, starting at 8:20 (the segment runs until 8:31)"""
+    now = [DAY + timedelta(hours=8, minutes=20)]
+    monkeypatch.setattr(campus, "get_current_ist", lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize("path", ["/api/classrooms", "/api/classrooms/LT-2"])
+def test_cached_until_the_next_boundary(client, clock, path):
+    response = client.get(path, headers=IDENTITY)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, max-age=660"
+    clock[0] += timedelta(minutes=10, seconds=30)
+    assert client.get(path, headers=IDENTITY).headers["cache-control"] == "private, max-age=30"
+
+
+@pytest.mark.parametrize("path", ["/api/classrooms", "/api/classrooms/LT-2"])
+def test_matching_etag_gets_304(client, clock, path):
+    etag = client.get(path, headers=IDENTITY).headers["etag"]
+    for candidate in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get(path, headers={**IDENTITY, "If-None-Match": candidate})
+        assert response.status_code == 304, candidate
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    assert client.get(path, headers={**IDENTITY, "If-None-Match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/api/classrooms", "/api/classrooms/LT-2"])
+def test_etag_changes_when_the_payload_does(client, clock, path):
+    etag = client.get(path, headers=IDENTITY).headers["etag"]
+    clock[0] = DAY + timedelta(hours=9, minutes=5)  # LT-2 is busy from 9:00
+    response = client.get(path, headers={**IDENTITY, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_room_etags_are_per_room(client, clock):
+    assert client.get("/api/classrooms/LT-1").headers["etag"] != client.get("/api/classrooms/LT-2").headers["etag"]
+    assert client.get("/api/classrooms/XX-9").status_code == 404
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+
+def random_schedule(rooms, seed):
+    """Occupied intervals at arbitrary (not whole-minute) hours, some overlapping or past campus hours"""
+    rng = random.Random(seed)
+    schedule = {}
+    for room_id in rooms:
+        slots = []
+        for _ in range(rng.randint(0, 6)):
+            start = rng.uniform(6, 19)
+            slots.append((start, start + rng.choice([0.25, 0.5, 1, 1.5, rng.uniform(0.01, 2)])))
+        schedule[room_id] = slots
+    return schedule
+
+
+def naive_is_free(intervals, start, end):
+    return not any(slot_start < end and start < slot_end for slot_start, slot_end in intervals if slot_end > slot_start)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_day_grid_agrees_with_the_interval_timelines(campus, seed):
+    index = campus.AvailabilityIndex(random_schedule([f"R{n}" for n in range(20)], seed))
+    grid = index.grid
+    rng = random.Random(seed)
+    for room_id, timeline in index.timelines.items():
+        for _ in range(300):
+            start = rng.randrange(grid.first_minute, grid.last_minute)
+            end = rng.randrange(start + 1, grid.last_minute + 1)
+            expected = timeline.is_free(start / 60, end / 60)
+            assert grid.is_free(room_id, start, end) == expected, (room_id, start, end)
+            assert naive_is_free(timeline.intervals(), start / 60, end / 60) == expected
+
+
+@pytest.mark.parametrize("slot_minutes", [5, 15, 25, 60])
+def test_day_grid_slots_agree_with_the_interval_timelines(campus, slot_minutes):
+    index = campus.AvailabilityIndex(random_schedule([f"R{n}" for n in range(20)], slot_minutes))
+    grid = index.grid
+    edges = list(range(grid.first_minute, grid.last_minute, slot_minutes)) + [grid.last_minute]
+    for room_id, row in grid.slot_rows(slot_minutes).items():
+        timeline = index.timeline(room_id)
+        assert row == "".join("1" if timeline.is_free(lo / 60, hi / 60) else "0" for lo, hi in zip(edges, edges[1:]))
+
+
+def test_day_grid_endpoint_matches_todays_timelines(client, campus):
+    response = client.get("/api/classrooms/day-grid", params={"slot_minutes": 30, "floor": "Ground"})
+    assert response.status_code == 200
+    body = response.json()
+    index = campus.get_availability_index()
+    assert body["rooms"] == ["LT-1", "LT-2", "LH-2", "LH-3"]
+    for room_id, row in zip(body["rooms"], body["matrix"]):
+        timeline = index.timeline(room_id)
+        assert row == "".join("1" if timeline.is_free(start, start + 0.5) else "0" for start in body["slots"])
+    # LT-1 is timetabled 8-10, 11-13 and 14-16
+    assert body["matrix"][0][:8] == "00001100"
@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+DAY = date(2026, 10, 19)
+
+
+def brute_force(server, rooms, duration, first_hour, limit, days):
+    """Every room's gaps on every day, sorted: what the heap merge must reproduce"""
+    windows = []
+    for position, room in enumerate(rooms):
+        for offset in range(days):
+            day = DAY + timedelta(days=offset)
+            cursor = max(server.CAMPUS_OPEN_HOUR, first_hour) if offset == 0 else server.CAMPUS_OPEN_HOUR
+            busy = server.get_availability_index(day).timeline(room["room_id"]).intervals()
+            for start, end in busy + [(server.CAMPUS_CLOSE_HOUR, server.CAMPUS_CLOSE_HOUR)]:
+                if min(start, server.CAMPUS_CLOSE_HOUR) - cursor >= duration:
+                    windows.append((offset, cursor, position, min(start, server.CAMPUS_CLOSE_HOUR)))
+                cursor = max(cursor, end)
+    return [(rooms[position], DAY + timedelta(days=offset), start, end) for offset, start, position, end in sorted(windows)[:limit]]
+
+
+def test_gaps(campus):
+    timeline = campus.RoomTimeline([(9, 10), (9.5, 11), (12, 13), (13, 14)])
+    assert list(timeline.gaps(8, 18.5)) == [(8, 9), (11, 12), (14, 18.5)]
+    assert list(timeline.gaps(9.5, 12.5)) == [(11, 12)]
+    assert list(timeline.gaps(13.5, 14)) == []
+    assert list(campus.RoomTimeline([]).gaps(8, 18.5)) == [(8, 18.5)]
+
+
+@pytest.mark.parametrize("duration", [0.5, 1, 2, 3, 10.5])
+@pytest.mark.parametrize("first_hour", [0.0, 8.5, 12.25, 18.0])
+def test_merge_agrees_with_a_brute_force_search(campus, duration, first_hour):
+    campus.set_room_bookings(DAY + timedelta(days=1), "LT-2", [(8.0, 9.0, "b1"), (17.0, 18.5, "b2")])
+    campus.set_room_bookings(DAY + timedelta(days=2), "104", [(8.0, 10.0, "b3")])
+    rooms = campus.CLASSROOMS
+    for limit in (1, 5, 200):
+        expected = brute_force(campus, rooms, duration, first_hour, limit, 3)
+        assert campus.find_free_windows(rooms, duration, DAY, first_hour, limit, 3) == expected
+
+
+def test_endpoint_returns_the_earliest_windows_from_now(client, campus, monkeypatch):
+    monkeypatch.setattr(campus, "get_current_ist", lambda: datetime(2026, 10, 19, 8, 20))
+    response = client.get("/api/classrooms/free-windows", params={"room_ids": ["LT-1", "LT-2"], "duration_minutes": 60, "limit": 4})
+    assert response.status_code == 200
+    windows = [(w["room_id"], w["date"], w["start_hour"], w["end_hour"]) for w in response.json()]
+    # LT-2's 8:20-9:00 gap is too short
+    assert windows == [
+        ("LT-1", "2026-10-19", 10.0, 11.0),
+        ("LT-2", "2026-10-19", 11.0, 12.0),
+        ("LT-1", "2026-10-19", 13.0, 14.0),
+        ("LT-2", "2026-10-19", 14.0, 15.0),
+    ]
+    assert response.json()[0]["capacity"] == campus.room_index.by_id["LT-1"]["capacity"]
+
+
+def test_endpoint_filters_and_limits(client, campus):
+    response = client.get("/api/classrooms/free-windows", params={"floor": "Second", "limit": 3, "days": 2})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert all(window["floor"] == "Second" for window in response.json())
+    assert client.get("/api/classrooms/free-windows", params={"duration_minutes": 0}).status_code == 422
+    assert client.get("/api/classrooms/free-windows", params={"room_ids": ["XX-9"]}).json() == []
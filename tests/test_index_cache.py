@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import pytest
+
+
+def test_other_dates_cannot_evict_todays_index(campus):
+    server = campus
+    today = server.get_current_ist().date()
+    version = server.get_availability_index(today).version
+    snapshot_key = server.get_classroom_snapshot().key
+    for offset in range(1, 3 * server.INDEX_CACHE_DAYS):
+        server.get_availability_index(today + timedelta(days=offset))
+    assert len(server._indexes_by_date) == server.INDEX_CACHE_DAYS
+    assert server.get_availability_index(today).version == version
+    assert server.get_classroom_snapshot().key == snapshot_key
+
+
+def test_cache_evicts_least_recently_used(campus):
+    server = campus
+    today = server.get_current_ist().date()
+    days = [today + timedelta(days=offset) for offset in range(1, server.INDEX_CACHE_DAYS)]
+    versions = {day: server.get_availability_index(day).version for day in days}
+    server.get_availability_index(days[0])  # most recently used now
+    server.get_availability_index(today + timedelta(days=server.INDEX_CACHE_DAYS + 5))
+    assert days[0] in server._indexes_by_date
+    assert days[1] not in server._indexes_by_date
+    assert server.get_availability_index(days[0]).version == versions[days[0]]
+
+
+def window_day(server, edge, beyond):
+    offset = -server.AVAILABILITY_DAYS_BACK if edge == "first" else server.AVAILABILITY_DAYS_AHEAD
+    return (server.get_current_ist().date() + timedelta(days=offset + beyond * (-1 if edge == "first" else 1))).isoformat()
+
+
+@pytest.mark.parametrize("edge", ["first", "last"])
+def test_dates_outside_the_window_are_rejected(client, campus, edge):
+    day = window_day(campus, edge, beyond=1)
+    assert client.get("/api/classrooms/day-grid", params={"date": day}).status_code == 400
+    response = client.post("/api/classrooms/availability", json={"date": day, "checks": [{"room_id": "LT-1", "start_hour": 9, "end_hour": 10}]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("edge", ["first", "last"])
+def test_dates_inside_the_window_are_served(client, campus, edge):
+    day = window_day(campus, edge, beyond=0)
+    assert client.get("/api/classrooms/day-grid", params={"date": day}).status_code == 200
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from stand_ins import FakeLlmChat, FakeUserMessage
+
+
+def test_lookups_are_counted(campus):
+    cache = campus.InterpretationCache(maxsize=4, ttl=60)
+    assert cache.get(("a", None)) is None
+    cache.put(("a", None), {"action": "search"})
+    assert cache.get(("a", None)) == {"action": "search"}
+    assert cache.get(("a", None)) == {"action": "search"}
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 1, "hit_ratio": 2 / 3}
+
+
+def test_least_recently_used_entry_is_evicted(campus):
+    cache = campus.InterpretationCache(maxsize=2, ttl=60)
+    cache.put(("a", None), {"n": 1})
+    cache.put(("b", None), {"n": 2})
+    cache.get(("a", None))
+    cache.put(("c", None), {"n": 3})
+    assert cache.get(("b", None)) is None
+    assert cache.get(("a", None)) == {"n": 1}
+    assert cache.get(("c", None)) == {"n": 3}
+
+
+def test_entries_expire_after_the_ttl(campus):
+    cache = campus.InterpretationCache(maxsize=2, ttl=0.05)
+    cache.put(("a", None), {"n": 1})
+    assert cache.get(("a", None)) == {"n": 1}
+    time.sleep(0.1)
+    assert cache.get(("a", None)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_keys_ignore_case_punctuation_and_spacing(campus):
+    assert campus.interpretation_cache_key("Somewhere  QUIET, to revise?", 10.0) == ("somewhere quiet to revise", None)
+    assert campus.interpretation_cache_key("lecture hall LT-1 at 10:30", 10.0) == ("lecture hall lt-1 at 10:30", None)
+
+
+@pytest.mark.parametrize("query", ["a quiet room right now", "anything free for the next hour", "empty hall until lunch"])
+def test_relative_queries_are_bucketed_by_the_clock(campus, monkeypatch, query):
+    monkeypatch.setattr(campus, "LLM_CACHE_BUCKET_MINUTES", 15)
+    key = lambda hour: campus.interpretation_cache_key(query, hour)
+    assert key(10.0) == key(10.2) != key(10.25)
+    assert key(10.0)[1] == 40
+
+
+def test_absolute_queries_share_one_entry_all_day(campus):
+    key = lambda hour: campus.interpretation_cache_key("seminar room with a podium", hour)
+    assert key(8.0) == key(17.9)
+    assert key(8.0)[1] is None
+
+
+def test_repeated_query_is_answered_from_the_cache(client, campus, monkeypatch):
+    monkeypatch.setattr(campus, "llm_breaker", campus.CircuitBreaker(campus.LLM_BREAKER_FAILURES, campus.LLM_BREAKER_RESET_SECONDS))
+    monkeypatch.setattr(campus, "LlmChat", FakeLlmChat)
+    monkeypatch.setattr(campus, "UserMessage", FakeUserMessage)
+    monkeypatch.setattr(FakeLlmChat, "latency", 0.0)
+    monkeypatch.setattr(FakeLlmChat, "jitter", 0.0)
+    monkeypatch.setattr(FakeLlmChat, "calls", 0)
+    monkeypatch.setattr(campus, "get_current_hour", lambda: 10.0)
+    campus.interpretation_cache.clear()
+    hits = campus.interpretation_cache.hits
+
+    first = client.post("/api/search", json={"query": "Somewhere quiet where my study group can revise"})
+    second = client.post("/api/search", json={"query": "somewhere quiet, where my study group can revise!"})
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert FakeLlmChat.calls == 1
+    assert campus.interpretation_cache.hits == hits + 1
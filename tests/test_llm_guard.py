@@ -0,0 +1,144 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from stand_ins import FakeLlmChat, FakeUserMessage
+
+OPEN_ENDED_QUERY = "somewhere quiet where my study group can revise"
+
+
+class ScriptedLlmChat(FakeLlmChat):
+    reply = ""
+
+    async def send_message(self, message):
+        return self.reply
+
+
+@pytest.fixture
+def llm(campus, monkeypatch):
+    monkeypatch.setattr(campus, "llm_breaker", campus.CircuitBreaker(campus.LLM_BREAKER_FAILURES, campus.LLM_BREAKER_RESET_SECONDS))
+    monkeypatch.setattr(campus, "UserMessage", FakeUserMessage)
+    monkeypatch.setattr(FakeLlmChat, "latency", 0.0)
+    monkeypatch.setattr(FakeLlmChat, "jitter", 0.0)
+    campus.interpretation_cache.clear()
+    return campus
+
+
+@pytest.mark.parametrize("reply", ['["LT-1", "LT-2"]', '"LT-1"', "42", '```json\n{"action": "search", "filters": ["LT-1"]}\n```'])
+def test_well_formed_json_of_the_wrong_shape_falls_back(llm, monkeypatch, reply):
+    server = llm
+    monkeypatch.setattr(ScriptedLlmChat, "reply", reply)
+    monkeypatch.setattr(server, "LlmChat", ScriptedLlmChat)
+    server.app.dependency_overrides[server.get_current_user] = lambda: {"id": "u1", "name": "User", "role": "student"}
+    try:
+        response = TestClient(server.app).post("/api/search", json={"query": OPEN_ENDED_QUERY})
+    finally:
+        server.app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.json()["message"] == "Here are the currently available classrooms."
+    assert server.llm_breaker.failures == 0
+
+
+def test_cold_sdk_import_does_not_count_against_the_llm_budget(llm, monkeypatch):
+    server = llm
+    monkeypatch.setattr(server, "LLM_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(server, "LlmChat", None)
+
+    def slow_import(name):
+        time.sleep(0.5)
+        return SimpleNamespace(LlmChat=FakeLlmChat, UserMessage=FakeUserMessage)
+    monkeypatch.setattr(server.importlib, "import_module", slow_import)
+
+    parsed = asyncio.run(server._interpret_guarded(OPEN_ENDED_QUERY, 10.0, (OPEN_ENDED_QUERY, None)))
+    assert parsed["action"] == "search"
+    assert server.llm_breaker.failures == 0
+
+
+def test_missing_sdk_uses_the_fallback(llm, monkeypatch):
+    server = llm
+    monkeypatch.setattr(server, "LlmChat", None)
+
+    def missing(name):
+        raise ModuleNotFoundError(name)
+    monkeypatch.setattr(server.importlib, "import_module", missing)
+    assert asyncio.run(server._interpret_guarded(OPEN_ENDED_QUERY, 10.0, (OPEN_ENDED_QUERY, None))) is None
+
+
+def test_broken_sdk_during_a_half_open_trial_does_not_wedge_the_breaker(llm, monkeypatch):
+    server = llm
+    breaker = server.llm_breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    monkeypatch.setattr(breaker, "reset_seconds", 0)
+    assert breaker.state == "half-open"
+    monkeypatch.setattr(server, "LlmChat", None)
+    # The module imports but lacks LlmChat: an AttributeError, not an ImportError
+    monkeypatch.setattr(server.importlib, "import_module", lambda name: SimpleNamespace(UserMessage=FakeUserMessage))
+    assert asyncio.run(server._interpret_guarded(OPEN_ENDED_QUERY, 10.0, (OPEN_ENDED_QUERY, None))) is None
+
+    monkeypatch.setattr(server, "LlmChat", FakeLlmChat)
+    parsed = asyncio.run(server._interpret_guarded(OPEN_ENDED_QUERY, 10.0, (OPEN_ENDED_QUERY, None)))
+    assert parsed["action"] == "search"
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_after_consecutive_failures_and_admits_one_trial(campus, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(campus.time, "monotonic", lambda: clock[0])
+    breaker = campus.CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_identical_concurrent_queries_share_one_llm_call(llm, monkeypatch):
+    server = llm
+    monkeypatch.setattr(server, "LlmChat", FakeLlmChat)
+    monkeypatch.setattr(FakeLlmChat, "latency", 0.05)
+    monkeypatch.setattr(FakeLlmChat, "calls", 0)
+    other = "somewhere with a projector for my study group"
+
+    async def run():
+        return await asyncio.gather(
+            *(server.interpret_coalesced(OPEN_ENDED_QUERY, 10.0, (OPEN_ENDED_QUERY, None)) for _ in range(5)),
+            server.interpret_coalesced(other, 10.0, (other, None)),
+        )
+    results = asyncio.run(run())
+    assert FakeLlmChat.calls == 2
+    assert all(result is results[0] for result in results[:5])
+    assert results[5]["filters"]["facilities"] == ["Projector"]
+    assert not server._llm_inflight
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_shared_call(llm, monkeypatch):
+    server = llm
+    monkeypatch.setattr(server, "LlmChat", FakeLlmChat)
+    monkeypatch.setattr(FakeLlmChat, "latency", 0.05)
+    monkeypatch.setattr(FakeLlmChat, "calls", 0)
+    key = (OPEN_ENDED_QUERY, None)
+
+    async def run():
+        leaving = asyncio.ensure_future(server.interpret_coalesced(OPEN_ENDED_QUERY, 10.0, key))
+        staying = asyncio.ensure_future(server.interpret_coalesced(OPEN_ENDED_QUERY, 10.0, key))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying
+    assert asyncio.run(run())["action"] == "search"
+    assert FakeLlmChat.calls == 1
+    assert server.interpretation_cache.get(key) is not None
@@ -0,0 +1,86 @@
+import pytest
+
+from stand_ins import FakeLlmChat
+
+
+def filters_of(server, query, current_hour=10.0):
+    parsed, confidence = server.parse_query_locally(query, current_hour)
+    assert confidence == 1.0, parsed
+    return parsed["filters"]
+
+
+def test_floor_and_facility(campus):
+    filters = filters_of(campus, "free rooms on the second floor with a projector")
+    assert filters["floor"] == "Second"
+    assert filters["facilities"] == ["Projector"]
+    assert filters["start_hour"] is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("rooms with 100 seats", 100),
+    ("rooms with at least 60 seats", 60),
+    ("rooms with more than 60 seats", 61),
+    ("capacity of 30", 30),
+])
+def test_capacity(campus, query, expected):
+    assert filters_of(campus, query)["min_capacity"] == expected
+
+
+@pytest.mark.parametrize("query, hours", [
+    ("room with 100 seats from 2 to 4 pm", (14.0, 16.0)),
+    ("rooms free between 9 and 11", (9.0, 11.0)),
+    ("is LT-1 free at 3pm", (15.0, 16.0)),
+    ("free for the next 30 minutes", (10.0, 10.5)),
+    ("lh 3 free until 5", (10.0, 17.0)),
+])
+def test_time_ranges(campus, query, hours):
+    filters = filters_of(campus, query)
+    assert (filters["start_hour"], filters["end_hour"]) == hours
+
+
+def test_room_codes_match_the_catalog(campus):
+    assert filters_of(campus, "is lt1 free")["room_ids"] == ["LT-1"]
+    assert filters_of(campus, "lh 3 free until 5")["room_ids"] == ["LH-3"]
+
+
+def test_when_queries_look_for_a_window(campus):
+    parsed, confidence = campus.parse_query_locally("when is 204 free for 2 hours", 10.0)
+    assert confidence == 1.0
+    assert parsed["action"] == "find_window"
+    assert parsed["filters"]["room_ids"] == ["204"]
+    assert parsed["filters"]["duration_hours"] == 2.0
+
+
+@pytest.mark.parametrize("query, current_hour", [("free from 7pm to 9pm", 10.0), ("free rooms now", 20.0)])
+def test_outside_campus_hours_is_an_error(campus, query, current_hour):
+    parsed, _ = campus.parse_query_locally(query, current_hour)
+    assert parsed["action"] == "error"
+    assert parsed["message"] == campus.CAMPUS_HOURS_MESSAGE
+
+
+@pytest.mark.parametrize("query", ["rooms not on the first floor", "ground floor first floor rooms", "when is LT-1 free at 3pm"])
+def test_ambiguous_queries_are_left_to_the_llm(campus, query):
+    assert campus.parse_query_locally(query, 10.0) == (None, 0.0)
+
+
+@pytest.mark.parametrize("query", ["rooms for 10 to 20 students", "room for 8 to 15 students", "rooms for 10-20 people"])
+def test_capacity_ranges_are_not_read_as_times(campus, query):
+    parsed, confidence = campus.parse_query_locally(query, 10.0)
+    assert confidence < campus.LOCAL_PARSER_MIN_CONFIDENCE
+    assert parsed["filters"]["start_hour"] is None
+
+
+def test_unexplained_words_lower_the_confidence(campus):
+    _, confidence = campus.parse_query_locally("book me a pizza", 10.0)
+    assert confidence < campus.LOCAL_PARSER_MIN_CONFIDENCE
+
+
+def test_confident_queries_never_reach_the_llm(client, campus, monkeypatch):
+    monkeypatch.setattr(campus, "LlmChat", FakeLlmChat)
+    monkeypatch.setattr(FakeLlmChat, "calls", 0)
+    monkeypatch.setattr(campus, "get_current_hour", lambda: 10.0)
+    response = client.post("/api/search", json={"query": "free rooms on the second floor with a projector"})
+    assert response.status_code == 200
+    assert FakeLlmChat.calls == 0
+    rooms = response.json()["rooms"]
+    assert rooms and all(room["floor"] == "Second" and "Projector" in room["facilities"] for room in rooms)
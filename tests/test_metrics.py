@@ -0,0 +1,62 @@
+def scrape(client):
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return response.text, samples
+
+
+def test_histogram_buckets_are_cumulative(campus):
+    histogram = campus.Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+    assert list(histogram.render()) == [
+        "# HELP demo_seconds Demo",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="a",le="0.1"} 2',
+        'demo_seconds_bucket{stage="a",le="1.0"} 3',
+        'demo_seconds_bucket{stage="a",le="+Inf"} 4',
+        'demo_seconds_sum{stage="a"} 3.65',
+        'demo_seconds_count{stage="a"} 4',
+    ]
+
+
+def test_counter_series_are_sorted_by_label(campus):
+    counter = campus.Counter("demo_total", "Demo", ("source",))
+    counter.inc("llm")
+    counter.inc("cache", amount=2)
+    assert list(counter.render())[2:] == ['demo_total{source="cache"} 2', 'demo_total{source="llm"} 1']
+
+
+def test_requests_are_counted_by_route_template(client):
+    _, before = scrape(client)
+    client.get("/api/classrooms/LT-1")
+    client.get("/api/classrooms/LT-2")
+    client.get("/api/classrooms/XX-9")
+    client.get("/api/no-such-page")
+    text, after = scrape(client)
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    route = 'method="GET",route="/api/classrooms/{room_id}"'
+    assert delta(f'http_requests_total{{{route},status="200"}}') == 2
+    assert delta(f'http_requests_total{{{route},status="404"}}') == 1
+    assert delta(f'http_requests_total{{method="GET",route="unmatched",status="404"}}') == 1
+    assert delta(f"http_request_duration_seconds_count{{{route}}}") == 3
+    assert delta(f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 3
+    assert "LT-1" not in text
+
+
+def test_every_metric_is_described(client):
+    text, samples = scrape(client)
+    for name in ("http_requests_total", "http_request_duration_seconds", "stage_duration_seconds",
+                 "search_interpretations_total", "cache_hit_ratio", "llm_circuit_open", "room_status_subscribers"):
+        assert f"# HELP {name} " in text
+        assert f"# TYPE {name} " in text
+    assert samples['cache_hit_ratio{cache="llm_interpretation"}'] <= 1
+    assert samples["llm_circuit_open"] in (0, 1)
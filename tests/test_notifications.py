@@ -0,0 +1,113 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class RecordingSink:
+    def __init__(self):
+        self.events = []
+
+    async def deliver(self, event, user_ids):
+        self.events.append((event["room_id"], event["status"], user_ids))
+
+
+def at(server, hour, minute=0):
+    return server.get_current_ist().replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def test_transition_fires_at_its_boundary(campus):
+    server, sink = campus, RecordingSink()
+    scheduler = server.TransitionScheduler(sink)
+    scheduler.subscribe("u1", "LT-1")  # mock LT-1: occupied 8-10, 11-13, 14-16
+
+    async def run():
+        await scheduler.step(at(server, 9, 30))
+        await scheduler.step(at(server, 10))
+    asyncio.run(run())
+    assert sink.events == [("LT-1", "Available", ["u1"])]
+
+
+def test_missed_transitions_coalesce_to_the_current_status(campus):
+    server, sink = campus, RecordingSink()
+    scheduler = server.TransitionScheduler(sink)
+    scheduler.subscribe("u1", "LT-1")
+
+    async def run():
+        await scheduler.step(at(server, 9))
+        # Stalled through 10:00 (free), 11:00 (occupied) and 13:00 (free)
+        await scheduler.step(at(server, 13, 30))
+    asyncio.run(run())
+    assert sink.events == [("LT-1", "Available", ["u1"])]
+
+
+def test_stall_ending_in_the_same_status_sends_nothing(campus):
+    server, sink = campus, RecordingSink()
+    scheduler = server.TransitionScheduler(sink)
+    scheduler.subscribe("u1", "LT-1")
+
+    async def run():
+        await scheduler.step(at(server, 9))
+        await scheduler.step(at(server, 12))  # free 10-11, occupied again by now
+    asyncio.run(run())
+    assert sink.events == []
+
+
+def test_favourites_changed_on_another_worker_reach_the_scheduler_and_every_inbox(database, campus, monkeypatch):
+    server = campus
+    sink = server.MongoSink(inbox_size=50, retention_hours=1)
+    scheduler = server.TransitionScheduler(sink)
+    monkeypatch.setattr(server, "transition_scheduler", scheduler)
+
+    async def run():
+        since = (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat()
+        await database.users.insert_one({"id": "u1", "email": "u1@iips.edu.in"})
+        # What PUT /api/favorites/LT-1 does on a worker that does not run the scheduler
+        await server.update_favorites("u1", {"$addToSet": {"favorites": "LT-1"}})
+        assert scheduler.subscribers == {}
+        assert await server.load_favorites(since) == 1
+        assert scheduler.subscribers == {"LT-1": {"u1"}}
+
+        await scheduler.step(at(server, 9, 30))
+        await scheduler.step(at(server, 10))
+        # Any worker reads the same inbox from the database
+        inbox = await server.MongoSink(inbox_size=50, retention_hours=1).recent("u1")
+        assert [(event["room_id"], event["status"]) for event in inbox] == [("LT-1", "Available")]
+        assert await sink.recent("u1", after=inbox[-1]["id"]) == []
+
+        await server.update_favorites("u1", {"$pull": {"favorites": "LT-1"}})
+        await server.load_favorites(since)
+        assert scheduler.subscribers == {}
+    asyncio.run(run())
+
+
+def test_event_ids_are_time_based_and_strictly_increasing(campus):
+    started_ms = int(time.time() * 1000)
+    scheduler = campus.TransitionScheduler(RecordingSink())
+    ids = [scheduler.next_event_id() for _ in range(5)]
+    # A restarted scheduler starts from the clock, not from 1, so clients' `after` cursors stay valid
+    assert ids[0] >= started_ms
+    assert ids == sorted(set(ids))
+
+
+def test_only_the_elected_worker_runs_the_scheduler(database, campus, monkeypatch, tmp_path):
+    server = campus
+    monkeypatch.setattr(server, "SCHEDULER_LOCK_PATH", str(tmp_path / "scheduler.lock"))
+    monkeypatch.setattr(server, "TRANSITION_RECHECK_SECONDS", 0.01)
+    running = []
+
+    async def run_scheduler():
+        running.append(asyncio.current_task())
+        await asyncio.Event().wait()
+    monkeypatch.setattr(server.transition_scheduler, "run", run_scheduler)
+
+    async def run():
+        # Two workers; flock treats each open of the lock file as a separate holder
+        first = asyncio.create_task(server.run_transition_scheduler())
+        second = asyncio.create_task(server.run_transition_scheduler())
+        await asyncio.sleep(0.1)
+        assert running == [first]
+        first.cancel()  # the elected worker exits and releases the lock
+        await asyncio.sleep(0.1)
+        assert running == [first, second]
+        second.cancel()
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+DAY = date(2026, 10, 19)
+
+
+def reference(model):
+    """What FastAPI sends for a response_model value"""
+    return JSONResponse(content=jsonable_encoder(model)).body
+
+
+def availability(server, room, hour):
+    room_id = room["room_id"]
+    return server.RoomAvailability(
+        **{key: room[key] for key in ("room_id", "floor", "capacity", "facilities", "map_link")},
+        status=server.get_room_status(room_id, hour, DAY),
+        predicted_availability=server.get_predicted_availability(room_id, hour, DAY),
+    )
+
+
+@pytest.mark.parametrize("hour", [7.0, 8.0, 9.25, 12.5, 17.5, 18.25])
+def test_rooms_match_the_pydantic_encoding(campus, hour):
+    for room in campus.CLASSROOMS:
+        model = availability(campus, room, hour)
+        assert campus.encode_room(room, model.status, model.predicted_availability) == reference(model)
+
+
+def test_unusual_catalog_entries_match(campus):
+    room = {"room_id": "Café \"Ω\" 1", "floor": "Ground\\Annex", "capacity": 0, "facilities": [], "map_link": "https://maps/?q=a&b=<c>"}
+    campus.set_classroom_catalog([room])
+    model = availability(campus, room, 10.0)
+    assert campus.encode_room(room, model.status, model.predicted_availability) == reference(model)
+
+
+def test_edited_catalog_entry_is_re_encoded(campus):
+    room = dict(campus.CLASSROOMS[0])
+    campus.encode_room(room, "Available", {})
+    edited = {**room, "capacity": room["capacity"] + 1}
+    assert campus.encode_room(edited, "Available", {}) == reference(campus.RoomAvailability(**edited, status="Available", predicted_availability={}))
+
+
+def test_room_list_and_search_response_match(campus):
+    snapshot = campus.build_classroom_snapshot(DAY, 10 * 60)
+    models = [availability(campus, room, 10.0) for room in campus.CLASSROOMS]
+    assert snapshot.body == reference(models)
+    response = campus.search_response(message="Found", rooms=list(snapshot.room_bodies.values()))
+    assert response.body == reference(campus.SearchResponse(message="Found", rooms=models))
+    assert campus.search_response(clarification_needed="Which floor?").body == reference(campus.SearchResponse(clarification_needed="Which floor?"))
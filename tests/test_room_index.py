@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+
+
+def scan(rooms, floor=None, room_ids=None, min_capacity=None, facilities=None):
+    """The linear filter the index replaces"""
+    return [
+        room for room in rooms
+        if (not floor or room["floor"] == floor)
+        and (not room_ids or room["room_id"] in room_ids)
+        and (not min_capacity or room["capacity"] >= min_capacity)
+        and all(facility in room["facilities"] for facility in facilities or ())
+    ]
+
+
+FLOORS = [None, "Ground", "First", "Second", "Basement"]
+CAPACITIES = [None, 1, 30, 31, 60, 100, 120, 121]
+FACILITY_SETS = [None, ["Projector"], ["Projector", "Speaker"], ["Podium", "Whiteboard"], ["Hologram"]]
+
+
+@pytest.mark.parametrize("floor, min_capacity, facilities", list(itertools.product(FLOORS, CAPACITIES, FACILITY_SETS)))
+def test_match_agrees_with_a_linear_scan(campus, floor, min_capacity, facilities):
+    index = campus.room_index
+    selected = index.select(index.match(floor=floor, min_capacity=min_capacity, facilities=facilities))
+    assert selected == scan(campus.CLASSROOMS, floor, None, min_capacity, facilities)
+
+
+def test_room_ids_keep_catalog_order_and_ignore_unknown_rooms(campus):
+    index = campus.room_index
+    selected = index.select(index.match(room_ids=["212", "LT-2", "XX-9", "LT-2"], facilities=["Speaker"]))
+    assert [room["room_id"] for room in selected] == ["LT-2", "212"]
+    assert index.match(room_ids=["XX-9"]) == 0
+
+
+def test_no_filters_select_the_whole_catalog(campus):
+    index = campus.room_index
+    assert index.select(index.match()) == campus.CLASSROOMS
+
+
+def test_catalog_replacement_rebuilds_the_index(campus):
+    rooms = [
+        {"room_id": "A", "floor": "Ground", "capacity": 10, "facilities": ["Projector"], "map_link": ""},
+        {"room_id": "B", "floor": "Ground", "capacity": 40, "facilities": [], "map_link": ""},
+    ]
+    campus.set_classroom_catalog(rooms)
+    index = campus.room_index
+    assert [room["room_id"] for room in index.select(index.match(min_capacity=20))] == ["B"]
+    assert [room["room_id"] for room in index.select(index.match(facilities=["Projector"]))] == ["A"]
+    assert index.match(floor="First") == 0
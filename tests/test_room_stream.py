@@ -0,0 +1,71 @@
+import json
+from datetime import date
+
+DAY = date(2026, 10, 19)
+
+
+def parse_sse(message):
+    fields = dict(line.split(": ", 1) for line in message.decode("utf-8").strip().split("\n"))
+    return fields["id"], fields["event"], json.loads(fields["data"])
+
+
+def test_format_sse(campus):
+    assert campus.format_sse("update", b"[]", "1-2-3") == b"id: 1-2-3\nevent: update\ndata: []\n\n"
+    assert campus.format_sse("snapshot", b"[]") == b"event: snapshot\ndata: []\n\n"
+
+
+def test_boundary_sends_only_the_rooms_that_changed(campus):
+    broadcaster = campus.RoomStatusBroadcaster()
+    queue = broadcaster.subscribe()
+    before = campus.build_classroom_snapshot(DAY, 8 * 60 + 5)
+    after = campus.build_classroom_snapshot(DAY, 9 * 60 + 5)
+    broadcaster.publish(before, after)
+
+    event_id, event, rooms = parse_sse(queue.get_nowait())
+    assert (event_id, event) == ("-".join(map(str, after.key)), "update")
+    changed = [room_id for room_id, state in after.states.items() if before.states[room_id] != state]
+    assert [room["room_id"] for room in rooms] == changed
+    assert "LT-2" in changed and len(changed) < len(campus.CLASSROOMS)
+    assert rooms == [json.loads(after.room_bodies[room_id]) for room_id in changed]
+    assert queue.empty()
+
+
+def test_nothing_is_sent_when_no_room_changed(campus):
+    broadcaster = campus.RoomStatusBroadcaster()
+    queue = broadcaster.subscribe()
+    before = campus.build_classroom_snapshot(DAY, 8 * 60 + 5)
+    broadcaster.publish(before, before)
+    # A new index version (a room outside the catalog was booked) with the same statuses
+    campus.set_room_bookings(DAY, "ZZ-9", [(8.0, 9.0, "b1")])
+    after = campus.build_classroom_snapshot(DAY, 8 * 60 + 5)
+    assert after.key != before.key
+    broadcaster.publish(before, after)
+    broadcaster.publish(None, after)
+    assert queue.empty()
+
+
+def test_catalog_change_sends_a_full_snapshot(campus):
+    broadcaster = campus.RoomStatusBroadcaster()
+    queue = broadcaster.subscribe()
+    before = campus.build_classroom_snapshot(DAY, 8 * 60 + 5)
+    campus.set_classroom_catalog(campus.CLASSROOMS[:3])
+    after = campus.build_classroom_snapshot(DAY, 8 * 60 + 5)
+    broadcaster.publish(before, after)
+
+    _, event, rooms = parse_sse(queue.get_nowait())
+    assert event == "snapshot"
+    assert [room["room_id"] for room in rooms] == [room["room_id"] for room in campus.CLASSROOMS[:3]]
+
+
+def test_lagging_subscriber_is_dropped_and_told_to_resync(campus, monkeypatch):
+    monkeypatch.setattr(campus, "STREAM_QUEUE_SIZE", 2)
+    broadcaster = campus.RoomStatusBroadcaster()
+    lagging, keeping_up = broadcaster.subscribe(), broadcaster.subscribe()
+    snapshots = [campus.build_classroom_snapshot(DAY, hour * 60 + 5) for hour in (8, 9, 10, 11)]
+    for previous, current in zip(snapshots, snapshots[1:]):
+        broadcaster.publish(previous, current)
+        keeping_up.get_nowait()
+
+    assert broadcaster.subscribers == {keeping_up}
+    assert lagging.get_nowait() is None
+    assert lagging.empty()
@@ -0,0 +1,86 @@
+import pytest
+
+IDENTITY = {"Accept-Encoding": "identity"}
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def test_fields_select_keys_in_model_order_and_always_include_room_id(client, campus):
+    rooms = client.get("/api/classrooms", params={"fields": "status, floor"}).json()
+    assert [room["room_id"] for room in rooms] == [room["room_id"] for room in campus.CLASSROOMS]
+    assert all(list(room) == ["room_id", "floor", "status"] for room in rooms)
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/classrooms", params={"fields": "status,colour"})
+    assert response.status_code == 400
+    assert "colour" in response.json()["detail"]
+
+
+def test_compact_rooms_decode_against_the_catalog(client, campus):
+    full = client.get("/api/classrooms").json()
+    response = client.get("/api/classrooms", params={"compact": "true"})
+    catalog_response = client.get("/api/classrooms/catalog", headers=IDENTITY)
+    catalog = catalog_response.json()
+    assert response.headers["x-room-catalog"] == catalog_response.headers["etag"]
+
+    for room, compact in zip(full, response.json()):
+        entry = catalog["rooms"][compact["map_link"]]
+        assert entry["room_id"] == room["room_id"] and entry["map_link"] == room["map_link"]
+        facilities = [name for bit, name in enumerate(catalog["facilities"]) if compact["facilities"] >> bit & 1]
+        assert sorted(facilities) == sorted(room["facilities"])
+        assert dict(zip(catalog["prediction_windows"], compact["predicted_availability"])) == room["predicted_availability"]
+        assert (compact["room_id"], compact["status"], compact["capacity"]) == (room["room_id"], room["status"], room["capacity"])
+
+
+def test_search_accepts_views(client, campus, monkeypatch):
+    monkeypatch.setattr(campus, "get_current_hour", lambda: 10.0)
+    response = client.post("/api/search", params={"fields": "status", "compact": "true"}, json={"query": "free rooms on the second floor"})
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "x-room-catalog" in response.headers
+    assert all(list(room) == ["room_id", "status"] for room in response.json()["rooms"])
+
+
+def test_gzip_copy_has_its_own_etag(client):
+    plain = client.get("/api/classrooms", headers=IDENTITY)
+    zipped = client.get("/api/classrooms", headers=GZIP)
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert plain.headers["vary"] == zipped.headers["vary"] == "Accept-Encoding"
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert zipped.json() == plain.json()
+
+
+@pytest.mark.parametrize("headers", [IDENTITY, GZIP])
+def test_either_etag_revalidates(client, headers):
+    etags = [client.get("/api/classrooms", headers=encoding).headers["etag"] for encoding in (IDENTITY, GZIP)]
+    for etag in etags:
+        response = client.get("/api/classrooms", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_views_have_distinct_etags(client):
+    etags = {
+        client.get("/api/classrooms", params=params, headers=IDENTITY).headers["etag"]
+        for params in ({}, {"fields": "facilities"}, {"compact": "true"}, {"fields": "facilities", "compact": "true"})
+    }
+    assert len(etags) == 4
+    # compact changes nothing about status, so the bodies and ETags are the same
+    assert len({
+        client.get("/api/classrooms", params=params, headers=IDENTITY).headers["etag"]
+        for params in ({"fields": "status"}, {"fields": "status", "compact": "true"})
+    }) == 1
+
+
+@pytest.mark.parametrize("accept, gzipped", [("gzip;q=0", False), ("br, gzip;q=0.5", True), ("*", True), ("deflate", False)])
+def test_accept_encoding_negotiation(client, accept, gzipped):
+    response = client.get("/api/classrooms", headers={"Accept-Encoding": accept})
+    assert (response.headers.get("content-encoding") == "gzip") is gzipped
+
+
+def test_small_payloads_are_not_compressed(client, campus):
+    response = client.get("/api/classrooms", params={"fields": "room_id"}, headers=GZIP)
+    assert len(response.content) < campus.GZIP_MIN_BYTES
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_worker(path, room_id, slots, ready, go, results):
+    """One uvicorn-like worker: sync loop running, edits one room's timetable when told to, reports what it sees"""
+    os.environ.update(SHARED_SNAPSHOT_PATH=path, SHARED_SNAPSHOT_POLL_SECONDS="0.05")
+    sys.path[:0] = [str(ROOT / "backend")]
+    import server
+
+    async def main():
+        server.build_indexes()
+        server.forget_shared_changes()
+        existing = server.map_shared_snapshot(None)
+        if existing is not None:
+            server.adopt_shared_snapshot(existing)
+        sync = asyncio.create_task(server.sync_shared_snapshot())
+        while server._shared_base_generation == 0:
+            await asyncio.sleep(0.01)
+        ready.put(room_id)
+        await asyncio.to_thread(go.wait)
+        server.apply_timetable({room_id: server.schedule_every_day(slots)})
+        await asyncio.sleep(1.5)
+        today = server.get_current_ist().date()
+        results.put((room_id, {
+            room: (server.timetable_store[room].intervals_for(today), server.is_room_available(room, 8, 9, today))
+            for room in ("LT-1", "LT-2")
+        }))
+        sync.cancel()
+
+    asyncio.run(main())
+
+
+def test_concurrent_edits_from_two_workers_both_survive(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    ready, results, go = context.Queue(), context.Queue(), context.Event()
+    path = str(tmp_path / "snapshot")
+    # Worker A clears LT-1's timetable while worker B books LT-2 solid from 8 to 9, in the same poll window.
+    workers = [
+        context.Process(target=run_worker, args=(path, "LT-1", [], ready, go, results)),
+        context.Process(target=run_worker, args=(path, "LT-2", [(8.0, 9.0)], ready, go, results)),
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for _ in workers:
+            ready.get(timeout=60)
+        go.set()
+        seen = dict(results.get(timeout=60) for _ in workers)
+    finally:
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+    expected = {"LT-1": ([], True), "LT-2": ([(8.0, 9.0)], False)}
+    assert seen == {"LT-1": expected, "LT-2": expected}
+
+
+def test_shared_indexes_answer_like_local_ones(campus, tmp_path, monkeypatch):
+    server = campus
+    monkeypatch.setattr(server, "SHARED_SNAPSHOT_PATH", str(tmp_path / "snapshot"))
+    today = server.get_current_ist().date()
+    server.set_room_bookings(today, "LT-3", [(10.0, 11.5, "booking-1")])
+    room_ids = [room["room_id"] for room in server.CLASSROOMS]
+    hours = [8 + quarter / 4 for quarter in range(42)]
+
+    def answers():
+        return [
+            (server.get_room_status(room_id, hour, today), server.get_predicted_availability(room_id, hour, today),
+             server.is_room_available(room_id, hour, min(hour + 1, 18.5), today))
+            for room_id in room_ids for hour in hours
+        ]
+
+    local = answers()
+    shared = asyncio.run(server.publish_shared_snapshot())
+    server.adopt_shared_snapshot(shared)
+    assert isinstance(server.get_availability_index(today), server.SharedDayIndex)
+    assert answers() == local
+
+
+def test_bookings_are_not_published_and_adoption_keeps_the_local_mirror(campus, tmp_path, monkeypatch):
+    server = campus
+    monkeypatch.setattr(server, "SHARED_SNAPSHOT_PATH", str(tmp_path / "snapshot"))
+    today = server.get_current_ist().date()
+    without_booking = asyncio.run(server.publish_shared_snapshot())
+    server.adopt_shared_snapshot(without_booking)
+
+    server.set_room_bookings(today, "LT-3", [(10.0, 11.5, "booking-1")])
+    assert not server._shared_changes
+    assert not server.is_room_available("LT-3", 10, 11, today)
+    # A generation encoded before the booking (say, another worker's timetable import) does not undo it
+    server.adopt_shared_snapshot(without_booking)
+    assert not server.is_room_available("LT-3", 10, 11, today)
+
+    with_booking = asyncio.run(server.publish_shared_snapshot())
+    server.set_room_bookings(today, "LT-3", [])  # cancelled since that generation was encoded
+    server.adopt_shared_snapshot(with_booking)
+    assert server.is_room_available("LT-3", 10, 11, today)
+    assert isinstance(server.get_availability_index(today + timedelta(days=1)), server.SharedDayIndex)
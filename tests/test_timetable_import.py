@@ -0,0 +1,143 @@
+import asyncio
+import io
+from datetime import date, timedelta
+
+MONDAY = date(2025, 1, 6)
+TUESDAY = MONDAY + timedelta(days=1)
+
+
+def compile_csv(server, text, known_rooms=None):
+    compiler = server.compile_timetable_lines(io.StringIO(text), "csv", known_rooms)
+    return compiler, compiler.finish()
+
+
+def compile_ics(server, events):
+    lines = ["BEGIN:VCALENDAR"]
+    for event in events:
+        lines += ["BEGIN:VEVENT", *event, "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    compiler = server.compile_timetable_lines(io.StringIO("\r\n".join(lines) + "\r\n"), "ics", None)
+    return compiler, compiler.finish()
+
+
+def test_csv_duplicates_are_counted_once(campus):
+    compiler, schedules = compile_csv(campus, "room_id,day,start,end\nLT-1,mon,9,10\nLT-1,mon,09:00,10:00\nLT-1,\"mon,tue\",9,10\n")
+    assert (compiler.rows, compiler.accepted, compiler.duplicates) == (3, 3, 2)
+    assert schedules["LT-1"].intervals_for(MONDAY) == [(9.0, 10.0)]
+    assert schedules["LT-1"].intervals_for(TUESDAY) == [(9.0, 10.0)]
+
+
+def test_csv_overlaps_merge_but_back_to_back_slots_do_not(campus):
+    compiler, schedules = compile_csv(campus, "room_id,day,start,end\nLT-1,mon,9,11\nLT-1,mon,10,12\nLT-1,mon,12,13\n")
+    assert compiler.overlaps_merged == 1
+    assert schedules["LT-1"].intervals_for(MONDAY) == [(9.0, 12.0), (12.0, 13.0)]
+
+
+def test_csv_slots_only_merge_within_the_same_validity_window(campus):
+    text = "room_id,day,start,end,valid_from,valid_until\nLT-1,mon,9,11,,\nLT-1,mon,10,12,2025-01-01,2025-01-31\n"
+    compiler, schedules = compile_csv(campus, text)
+    assert compiler.overlaps_merged == 0
+    assert sorted(schedules["LT-1"].intervals_for(MONDAY)) == [(9.0, 11.0), (10.0, 12.0)]
+    assert schedules["LT-1"].intervals_for(MONDAY + timedelta(weeks=4)) == [(9.0, 11.0)]
+
+
+def test_csv_dated_rows_and_rejections(campus):
+    text = (
+        "room_id,day,date,start,end\n"
+        f"LT-1,,{MONDAY.isoformat()},2:00 PM,3:30 PM\n"
+        "LT-1,mon,,11,10\n"
+        "XX-9,mon,,9,10\n"
+        "LT-1,someday,,9,10\n"
+    )
+    compiler, schedules = compile_csv(campus, text, known_rooms={"LT-1"})
+    assert (compiler.accepted, compiler.rejected) == (1, 3)
+    assert compiler.errors == [
+        "record 2: end 10.0 is not after start 11.0",
+        "record 3: unknown room 'XX-9'",
+        "record 4: invalid weekday 'someday'",
+    ]
+    assert schedules["LT-1"].intervals_for(MONDAY) == [(14.0, 15.5)]
+    assert schedules["LT-1"].intervals_for(MONDAY + timedelta(weeks=1)) == []
+
+
+def test_ics_weekly_rrule_with_until(campus):
+    compiler, schedules = compile_ics(campus, [[
+        "DTSTART:20250106T090000",
+        "DTEND:20250106T103000",
+        "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20250131T000000Z",
+        "LOCATION:LT-1",
+    ]])
+    schedule = schedules["LT-1"]
+    assert compiler.accepted == 1
+    assert schedule.intervals_for(MONDAY) == [(9.0, 10.5)]
+    assert schedule.intervals_for(MONDAY + timedelta(days=2)) == [(9.0, 10.5)]
+    assert schedule.intervals_for(TUESDAY) == []
+    assert schedule.intervals_for(MONDAY - timedelta(weeks=1)) == []
+    assert schedule.intervals_for(date(2025, 2, 3)) == []
+
+
+def test_ics_rrule_count_and_daily(campus):
+    _, schedules = compile_ics(campus, [
+        ["DTSTART:20250106T090000", "DTEND:20250106T100000", "RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=2", "LOCATION:LT-1"],
+        ["DTSTART:20250106T140000", "DTEND:20250106T150000", "RRULE:FREQ=DAILY;COUNT=3", "LOCATION:LT-2"],
+    ])
+    assert schedules["LT-1"].intervals_for(MONDAY + timedelta(weeks=1)) == [(9.0, 10.0)]
+    assert schedules["LT-1"].intervals_for(MONDAY + timedelta(weeks=2)) == []
+    assert [bool(schedules["LT-2"].intervals_for(MONDAY + timedelta(days=n))) for n in range(4)] == [True, True, True, False]
+
+
+def test_ics_utc_times_folding_and_unsupported_events(campus):
+    compiler, schedules = compile_ics(campus, [
+        ["DTSTART:20250106T033000Z", "DTEND:20250106T043000Z", "LOCATION:LT-", " 1"],
+        ["DTSTART;VALUE=DATE:20250106", "DTEND;VALUE=DATE:20250107", "LOCATION:LT-2"],
+        ["DTSTART:20250106T090000", "DTEND:20250106T100000", "RRULE:FREQ=MONTHLY", "LOCATION:LT-2"],
+    ])
+    assert schedules["LT-1"].intervals_for(MONDAY) == [(9.0, 10.0)]
+    assert schedules["LT-1"].intervals_for(TUESDAY) == []
+    assert compiler.rejected == 2
+    assert compiler.errors == ["record 2: all-day events are not supported", "record 3: unsupported RRULE frequency 'MONTHLY'"]
+
+
+def test_apply_timetable_recompiles_only_changed_rooms(campus):
+    server = campus
+    today = server.get_current_ist().date()
+    before = server.get_availability_index(today)
+    _, schedules = compile_csv(server, "room_id,day,start,end\nLT-1,*,17,18\nLT-2,*,9,11\nLT-2,*,12,14\nLT-2,*,15,17\n")
+    assert server.apply_timetable(schedules) == ["LT-1"]
+    after = server.get_availability_index(today)
+    assert after.timeline("LT-1").intervals() == [(17.0, 18.0)]
+    assert after.timeline("LT-2") is before.timeline("LT-2")
+    assert after.timeline("LT-3") is before.timeline("LT-3")
+    assert server.apply_timetable(schedules) == []
+
+
+def test_apply_timetable_replace_all_drops_missing_rooms(campus):
+    server = campus
+    _, schedules = compile_csv(server, "room_id,day,start,end\nLT-1,*,17,18\n")
+    changed = server.apply_timetable(schedules, replace_all=True)
+    assert set(changed) == set(server.MOCK_SCHEDULE)
+    assert list(server.timetable_store) == ["LT-1"]
+    assert server.get_availability_index().timeline("LT-2").intervals() == []
+
+
+def test_import_endpoint_reports_the_upload(client, campus):
+    campus.app.dependency_overrides[campus.require_admin] = lambda: {"id": "admin", "name": "Admin", "role": "admin"}
+    text = "room_id,day,start,end\nLT-1,*,17,18\nLT-1,*,17,18\nXX-9,mon,9,10\n"
+    response = client.post("/api/admin/timetable/import", files={"file": ("timetable.csv", text.encode(), "text/csv")})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["accepted"], report["rejected"]) == (3, 2, 1)
+    assert report["duplicates"] == 7
+    assert report["changed_rooms"] == ["LT-1"]
+
+
+def test_import_from_mongo(campus, database):
+    server = campus
+    for document in (
+        {"room_id": "LT-1", "day": "mon,tue", "start_hour": 8, "end_hour": 9},
+        {"room_id": "LT-1", "date": MONDAY.isoformat(), "start_hour": 8.5, "end_hour": 10},
+    ):
+        asyncio.run(database.timetable.insert_one(document))
+    report = asyncio.run(server.import_timetable_mongo(database.timetable))
+    assert (report.accepted, report.changed_rooms) == (2, ["LT-1"])
+    assert server.timetable_store["LT-1"].intervals_for(MONDAY) == [(8.0, 9.0), (8.5, 10.0)]
@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture
+def slow_log(campus, monkeypatch):
+    """Every request counts as slow; the log starts empty"""
+    monkeypatch.setattr(campus, "SLOW_REQUEST_SECONDS", 0)
+    campus.slow_requests.clear()
+    yield campus.slow_requests
+    campus.slow_requests.clear()
+
+
+def test_incoming_trace_ids_are_echoed_and_invalid_ones_replaced(client):
+    assert client.get("/api/", headers={"X-Trace-Id": "abcdef0123456789"}).headers["x-trace-id"] == "abcdef0123456789"
+    generated = client.get("/api/", headers={"X-Trace-Id": "bad id!"}).headers["x-trace-id"]
+    assert generated != "bad id!" and len(generated) == 16
+    assert client.get("/api/").headers["x-trace-id"] != client.get("/api/").headers["x-trace-id"]
+
+
+@pytest.mark.parametrize("sample_rate", [0.0, 1.0])
+def test_slow_requests_are_logged_whether_or_not_sampled(client, campus, slow_log, monkeypatch, sample_rate):
+    monkeypatch.setattr(campus, "TRACE_SAMPLE_RATE", sample_rate)
+    response = client.post("/api/search", json={"query": "free rooms on the first floor, mail me at a.b@example.com"},
+                           headers={"X-Trace-Id": "trace-0123456789"})
+    assert response.status_code == 200
+    [entry] = slow_log
+    assert entry["trace_id"] == "trace-0123456789"
+    assert (entry["method"], entry["path"], entry["status"]) == ("POST", "/api/search", 200)
+    assert entry["sampled"] is bool(sample_rate)
+    assert entry["attributes"]["query"] == "free rooms on the first floor, mail me at <email>"
+    assert entry["attributes"]["interpretation"] in ("local", "cache", "llm", "fallback")
+    assert bool(entry["spans"]) is bool(sample_rate)
+
+
+def test_fast_requests_are_not_logged(client, campus, slow_log, monkeypatch):
+    monkeypatch.setattr(campus, "SLOW_REQUEST_SECONDS", 60)
+    client.get("/api/classrooms")
+    assert not slow_log
+
+
+def test_slow_request_log_is_newest_first(client, campus, slow_log):
+    campus.app.dependency_overrides[campus.require_admin] = lambda: {"id": "admin", "name": "Admin", "role": "admin"}
+    client.get("/api/", headers={"X-Trace-Id": "first-0123456789"})
+    client.get("/api/", headers={"X-Trace-Id": "second-0123456789"})
+    entries = client.get("/api/admin/slow-requests").json()
+    assert [entry["trace_id"] for entry in entries[:2]] == ["second-0123456789", "first-0123456789"]
+
+
+def test_redact_query(campus):
+    assert campus.redact_query("call +91 98765 43210 or x@y.org") == "call <number> or <email>"